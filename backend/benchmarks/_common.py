@@ -0,0 +1,120 @@
+"""
+Benchmark 共用設定：與 tests/ 相同，使用暫存目錄裡的 SQLite，不需要 MySQL / AWS。
+要在 import src 之前 import 這個模組 (database.py 在 import 時就會建立 Engine)。
+"""
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+TMP_DIR = tempfile.mkdtemp(prefix="backend-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{TMP_DIR}/bench.db")
+os.environ.setdefault("ASYNC_DATABASE_URL", f"sqlite+aiosqlite:///{TMP_DIR}/bench.db")
+os.environ.setdefault("DB_ASYNC_ENABLED", "false")
+os.environ.setdefault("OUTBOX_DISPATCH_ENABLED", "false")
+os.environ.setdefault("OUTBOX_BROADCAST_ENABLED", "false")
+os.environ.setdefault("S3_BUCKET_NAME", "bench-bucket")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logger = logging.getLogger("benchmarks")
+
+
+def reset_database() -> None:
+    from src.database import engine
+    from src.modules.iam.infrastructure.models import Base
+
+    import src.main  # noqa: F401  (載入所有 Model 並掛上 Session hooks)
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+
+WORDS = ["計算機", "微積分", "教科書", "檯燈", "電風扇", "書桌", "耳機", "lamp", "calculator", "desk", "chair", "cable"]
+BENCH_OWNER_ID = "bench-owner"
+
+
+def seed_items(size: int, chunk: int = 10000) -> None:
+    """用 Core INSERT 準備 size 筆物品 (不經過 ORM / Session hooks)，標題與狀態、分類隨機"""
+    from sqlalchemy import insert
+
+    from src.database import SessionLocal
+    from src.modules.iam.infrastructure.models import UserModel
+    from src.modules.inventory.domain.entity import ItemCategory, ItemStatus
+    from src.modules.inventory.infrastructure.models import ItemModel
+
+    rng = random.Random(size)
+    statuses = [ItemStatus.AVAILABLE] * 3 + [ItemStatus.TRADED, ItemStatus.HIDDEN]
+    categories = list(ItemCategory)
+    base_time = datetime(2026, 1, 1)
+    db = SessionLocal()
+    try:
+        if db.get(UserModel, BENCH_OWNER_ID) is None:
+            db.add(UserModel(id=BENCH_OWNER_ID, email="bench@example.com", name="bench"))
+            db.commit()
+        for start in range(0, size, chunk):
+            rows = [
+                {
+                    "id": f"item-{n:08d}",
+                    "owner_id": BENCH_OWNER_ID,
+                    "title": " ".join(rng.sample(WORDS, 2)),
+                    "description": " ".join(rng.sample(WORDS, 4)),
+                    "category": rng.choice(categories),
+                    "status": rng.choice(statuses),
+                    "image_url": f"https://example.com/items/{n}.jpg",
+                    "created_at": base_time + timedelta(seconds=n),
+                    "updated_at": base_time + timedelta(seconds=n),
+                }
+                for n in range(start, min(size, start + chunk))
+            ]
+            db.execute(insert(ItemModel), rows)
+            db.commit()
+    finally:
+        db.close()
+
+
+@contextmanager
+def stopwatch(label: str):
+    start = time.perf_counter()
+    yield
+    logger.info(f"{label}: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+def measure(fn: Callable[[], object], repeat: int) -> List[float]:
+    """執行 repeat 次，回傳每次的耗時 (ms)"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+
+    def pick(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+    return {
+        "mean": statistics.fmean(ordered),
+        "p50": pick(0.50),
+        "p95": pick(0.95),
+        "p99": pick(0.99),
+    }
+
+
+def report(label: str, samples: List[float]) -> None:
+    stats = percentiles(samples)
+    logger.info(
+        f"{label}: n={len(samples)} mean={stats['mean']:.2f}ms p50={stats['p50']:.2f}ms "
+        f"p95={stats['p95']:.2f}ms p99={stats['p99']:.2f}ms"
+    )
@@ -0,0 +1,96 @@
+"""
+壓測用工具：在子 Process 啟動 uvicorn (可以指定環境變數 / worker 數)，再用 httpx 以固定併發量打 API。
+"""
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import httpx
+
+from ._common import logger, percentiles
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def serve(env: Optional[Dict[str, str]] = None, workers: int = 1) -> Iterator[str]:
+    """啟動 uvicorn，回傳 base URL；離開時關閉"""
+    port = _free_port()
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "src.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning",
+        ],
+        cwd=BACKEND_DIR,
+        env={**os.environ, **(env or {})},
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                if httpx.get(f"{base_url}/", timeout=1).status_code == 200:
+                    break
+            except httpx.TransportError:
+                pass
+            if process.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError("uvicorn did not start")
+            time.sleep(0.2)
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+async def _worker(client: httpx.AsyncClient, paths: Sequence[str], stop_at: float, samples: List[float], errors: List[int]):
+    n = 0
+    while time.monotonic() < stop_at:
+        path = paths[n % len(paths)]
+        n += 1
+        start = time.perf_counter()
+        try:
+            response = await client.get(path)
+            if response.status_code >= 500:
+                errors.append(response.status_code)
+        except httpx.HTTPError:
+            errors.append(0)
+        samples.append((time.perf_counter() - start) * 1000)
+
+
+async def _run(base_url: str, paths: Sequence[str], concurrency: int, duration: float):
+    samples: List[float] = []
+    errors: List[int] = []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        # 暖機：第一個請求會建立索引 / 連線
+        for path in paths:
+            await client.get(path)
+        stop_at = time.monotonic() + duration
+        await asyncio.gather(*(_worker(client, paths, stop_at, samples, errors) for _ in range(concurrency)))
+    return samples, errors
+
+
+def load(label: str, base_url: str, paths: Sequence[str], concurrency: int, duration: float) -> Dict[str, float]:
+    """以 concurrency 個併發連線持續打 duration 秒，記錄吞吐量與延遲分位數"""
+    samples, errors = asyncio.run(_run(base_url, paths, concurrency, duration))
+    stats = percentiles(samples) if samples else {"mean": 0, "p50": 0, "p95": 0, "p99": 0}
+    stats["rps"] = len(samples) / duration
+    stats["errors"] = len(errors)
+    logger.info(
+        f"{label}: c={concurrency} rps={stats['rps']:.0f} p50={stats['p50']:.1f}ms "
+        f"p95={stats['p95']:.1f}ms p99={stats['p99']:.1f}ms errors={stats['errors']}"
+    )
+    return stats
@@ -0,0 +1,105 @@
+"""
+接受一個有 N 筆待處理申請的物品 (其他申請在同一個 Transaction 內自動拒絕) 的耗時與 SQL 數量。
+python -m benchmarks.accept_fanout [--pending 10,100,1000] [--repeat 5]
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from ._common import logger, percentiles, reset_database
+
+from sqlalchemy import insert  # noqa: E402
+
+from src.database import SessionLocal  # noqa: E402
+from src.modules.exchanges.application.dtos import UpdateExchangeStatusRequest  # noqa: E402
+from src.modules.exchanges.application.service import ExchangeService  # noqa: E402
+from src.modules.exchanges.domain.entity import ExchangeStatus  # noqa: E402
+from src.modules.exchanges.infrastructure.models import ExchangeModel  # noqa: E402
+from src.modules.exchanges.infrastructure.repository import SqlAlchemyExchangeRepository  # noqa: E402
+from src.modules.iam.infrastructure.models import UserModel  # noqa: E402
+from src.modules.inventory.domain.entity import ItemCategory, ItemStatus  # noqa: E402
+from src.modules.inventory.infrastructure.models import ItemModel  # noqa: E402
+from src.modules.inventory.infrastructure.repository import SqlAlchemyItemRepository  # noqa: E402
+from src.sql_profiler import profile_sql  # noqa: E402
+
+REQUESTERS = 50
+
+
+def seed_item_with_requests(db, label: str, pending: int) -> str:
+    """建立一個物品與 pending 筆申請，回傳第一筆申請的 id"""
+    base_time = datetime(2026, 1, 1)
+    item_id = f"item-{label}"
+    db.execute(
+        insert(ItemModel),
+        [{
+            "id": item_id, "owner_id": "owner", "title": "lamp", "description": "desk lamp",
+            "category": ItemCategory.OTHER, "status": ItemStatus.AVAILABLE,
+            "created_at": base_time, "updated_at": base_time,
+        }],
+    )
+    db.execute(
+        insert(ExchangeModel),
+        [
+            {
+                "id": f"exchange-{label}-{n}", "requester_id": f"requester-{n % REQUESTERS}", "owner_id": "owner",
+                "target_item_id": item_id, "offered_item_id": None, "status": ExchangeStatus.PENDING,
+                "message": "還有嗎?", "requester_confirmed": False, "owner_confirmed": False,
+                "created_at": base_time + timedelta(seconds=n), "updated_at": base_time + timedelta(seconds=n),
+            }
+            for n in range(pending)
+        ],
+    )
+    db.commit()
+    return f"exchange-{label}-0"
+
+
+def accept(exchange_id: str):
+    db = SessionLocal()
+    try:
+        service = ExchangeService(SqlAlchemyExchangeRepository(db), SqlAlchemyItemRepository(db), db)
+        with profile_sql() as profile:
+            start = time.perf_counter()
+            service.update_status("owner", exchange_id, UpdateExchangeStatusRequest(action="accept"))
+            elapsed = (time.perf_counter() - start) * 1000
+        return elapsed, profile.count
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pending", default="10,100,1000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    reset_database()
+    db = SessionLocal()
+    try:
+        db.execute(
+            insert(UserModel),
+            [{"id": "owner", "email": "owner@example.com", "name": "owner"}]
+            + [{"id": f"requester-{n}", "email": f"r{n}@example.com", "name": f"r{n}"} for n in range(REQUESTERS)],
+        )
+        db.commit()
+
+        for pending in (int(p) for p in args.pending.split(",")):
+            samples, statements = [], set()
+            for run in range(args.repeat):
+                exchange_id = seed_item_with_requests(db, f"{pending}-{run}", pending)
+                elapsed, count = accept(exchange_id)
+                samples.append(elapsed)
+                statements.add(count)
+
+                rejected = db.query(ExchangeModel).filter(
+                    ExchangeModel.target_item_id == f"item-{pending}-{run}",
+                    ExchangeModel.status == ExchangeStatus.REJECTED,
+                ).count()
+                assert rejected == pending - 1, rejected
+
+            stats = percentiles(samples)
+            logger.info(
+                f"pending={pending}: mean={stats['mean']:.1f}ms p50={stats['p50']:.1f}ms "
+                f"max={max(samples):.1f}ms statements={sorted(statements)}"
+            )
+    finally:
+        db.close()
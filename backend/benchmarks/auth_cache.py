@@ -0,0 +1,87 @@
+"""
+每個請求的驗證成本：沒有快取 (每次 RSA 驗證 + 查 DB，舊做法) vs VerifiedTokenCache 命中。
+JWKS 由本機產生的 RSA 金鑰提供 (不連到 Cognito)。
+python -m benchmarks.auth_cache [--requests 2000]
+"""
+import argparse
+import statistics
+import time
+
+from ._common import logger, measure, report, reset_database
+
+from cryptography.hazmat.primitives import serialization  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import rsa  # noqa: E402
+from jose import jwk, jwt  # noqa: E402
+
+from src.database import SessionLocal  # noqa: E402
+from src.modules.iam.application.service import AuthService  # noqa: E402
+from src.modules.iam.dependencies import authenticate_token  # noqa: E402
+from src.modules.iam.infrastructure import cognito  # noqa: E402
+from src.modules.iam.infrastructure.models import UserModel  # noqa: E402
+from src.modules.iam.infrastructure.repository import SqlAlchemyUserRepository  # noqa: E402
+from src.modules.iam.infrastructure.token_cache import verified_token_cache  # noqa: E402
+
+CLIENT_ID = "bench-client"
+EMAIL = "bench@example.com"
+
+
+class LocalJwks:
+    """取代 requests.get，回傳本機產生的公鑰"""
+
+    def __init__(self, public_jwk):
+        self.public_jwk = public_jwk
+
+    def __call__(self, url, timeout=None):
+        return self
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"keys": [self.public_jwk]}
+
+
+def make_token():
+    private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    public_pem = private.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    private_pem = private.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    public_jwk = {**jwk.construct(public_pem, "RS256").to_dict(), "kid": "bench"}
+    claims = {"email": EMAIL, "aud": CLIENT_ID, "exp": int(time.time()) + 3600}
+    return jwt.encode(claims, private_pem, algorithm="RS256", headers={"kid": "bench"}), public_jwk
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    reset_database()
+    db = SessionLocal()
+    db.add(UserModel(id="bench-user", email=EMAIL, name="bench"))
+    db.commit()
+
+    token, public_jwk = make_token()
+    cognito.requests.get = LocalJwks(public_jwk)
+    provider = cognito.CognitoIdentityProvider("us-east-1", "bench-pool", CLIENT_ID, "", "", "")
+    service = AuthService(SqlAlchemyUserRepository(db), provider, verified_token_cache)
+    authenticate_token(token, service)  # 暖機 (下載 JWKS)
+
+    def without_cache():
+        verified_token_cache.clear()
+        authenticate_token(token, service)
+
+    report("verify_token only (RSA)", measure(lambda: provider.verify_token(token), args.requests))
+    before = measure(without_cache, args.requests)
+    report("auth without cache (verify + DB)", before)
+    authenticate_token(token, service)
+    after = measure(lambda: authenticate_token(token, service), args.requests)
+    report("auth with cache hit", after)
+    logger.info(
+        f"per request: {statistics.fmean(before) * 1000:.1f}us -> {statistics.fmean(after) * 1000:.1f}us "
+        f"({statistics.fmean(before) / statistics.fmean(after):.0f}x)"
+    )
+    db.close()
@@ -0,0 +1,115 @@
+"""
+批次刊登 POST /items/batch 與逐筆呼叫 N 次 POST /items/ 的比較 (moto 模擬 S3，每次上傳加上模擬的網路延遲)：
+- 單一使用者：一次批次 vs N 次逐筆的總時間
+- 同時多個批次：共用的 upload_executor 讓執行緒數維持在上限內
+python -m benchmarks.batch_upload [--items 20] [--rounds 5] [--latency-ms 50] [--concurrent 4]
+"""
+import argparse
+import io
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ._common import logger, measure, report, reset_database
+
+from fastapi.testclient import TestClient  # noqa: E402
+from moto import mock_aws  # noqa: E402
+
+from src.main import app  # noqa: E402
+from src.modules.iam.dependencies import get_current_user  # noqa: E402
+from src.modules.iam.domain.entity import User  # noqa: E402
+from src.modules.iam.infrastructure.models import UserModel  # noqa: E402
+from src.database import SessionLocal  # noqa: E402
+from src.modules.inventory.application.service import BATCH_UPLOAD_WORKERS  # noqa: E402
+from src.modules.inventory.dependencies import get_image_processor, get_image_storage  # noqa: E402
+from src.modules.inventory.infrastructure.s3_uploader import S3ImageStorage  # noqa: E402
+
+USER = User(id="bench-user", email="bench@example.com", password_hash="", name="bench")
+IMAGE = b"\xff\xd8\xff" + b"0" * 200 * 1024  # 200 KiB 的 "JPEG" (沒有縮圖，只量上傳)
+
+
+class SlowS3ImageStorage(S3ImageStorage):
+    """moto 沒有網路延遲：每次上傳多等 latency 秒，接近實際 S3 的來回時間"""
+
+    def __init__(self, latency: float):
+        super().__init__()
+        self.latency = latency
+
+    def upload_stream(self, file_obj, filename, content_type):
+        time.sleep(self.latency)
+        return super().upload_stream(file_obj, filename, content_type)
+
+
+def sequential(client: TestClient, items: int):
+    for n in range(items):
+        response = client.post(
+            "/items/",
+            data={"title": f"item {n}", "description": "moving out", "category": "OTHER"},
+            files={"image": (f"{n}.jpg", io.BytesIO(IMAGE), "image/jpeg")},
+        )
+        assert response.status_code == 201, response.text
+
+
+def batch(client: TestClient, items: int):
+    response = client.post(
+        "/items/batch",
+        data={
+            "items": json.dumps(
+                [{"title": f"item {n}", "description": "moving out", "category": "OTHER"} for n in range(items)]
+            )
+        },
+        files=[("images", (f"{n}.jpg", io.BytesIO(IMAGE), "image/jpeg")) for n in range(items)],
+    )
+    assert response.status_code == 200 and response.json()["created"] == items, response.text
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--concurrent", type=int, default=4)
+    args = parser.parse_args()
+
+    with mock_aws():
+        reset_database()
+        db = SessionLocal()
+        db.add(UserModel(id=USER.id, email=USER.email, name=USER.name))
+        db.commit()
+        db.close()
+
+        storage = SlowS3ImageStorage(args.latency_ms / 1000)
+        storage.s3_client.create_bucket(Bucket=storage.bucket_name)
+        app.dependency_overrides[get_current_user] = lambda: USER
+        app.dependency_overrides[get_image_storage] = lambda: storage
+        # 縮圖 Process Pool 不是這裡要比較的對象 (圖片也不是真的 JPEG)
+        app.dependency_overrides[get_image_processor] = lambda: None
+
+        with TestClient(app) as client:
+            report(f"{args.items} x POST /items/", measure(lambda: sequential(client, args.items), args.rounds))
+            report(f"POST /items/batch ({args.items} items)", measure(lambda: batch(client, args.items), args.rounds))
+
+            # 同時多個批次：執行緒數不會隨批次數增加
+            peak = threading.active_count()
+            done = threading.Event()
+
+            def watch_threads():
+                global peak
+                while not done.is_set():
+                    peak = max(peak, threading.active_count())
+                    time.sleep(0.005)
+
+            watcher = threading.Thread(target=watch_threads)
+            watcher.start()
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.concurrent) as users:
+                list(users.map(lambda _: batch(client, args.items), range(args.concurrent)))
+            elapsed = time.perf_counter() - start
+            done.set()
+            watcher.join()
+            logger.info(
+                f"{args.concurrent} concurrent batches: {elapsed * 1000:.0f}ms, "
+                f"peak threads={peak} (upload workers={BATCH_UPLOAD_WORKERS})"
+            )
+        app.dependency_overrides.clear()
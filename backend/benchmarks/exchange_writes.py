@@ -0,0 +1,106 @@
+"""
+交換寫入路徑 (建立申請 / 傳訊息) 每次請求的耗時，以及其中花在 SQL 上的比例。
+用來判斷寫入路徑要不要改成 async：async 只省下「等 DB 回應」時佔住的執行緒，
+其餘時間 (ORM flush、Session hooks 寫 outbox / read model / counters、Domain 邏輯) 仍然是 CPU 工作。
+SQLite 沒有網路來回，每個 SQL 另外加上 --rtt-ms (RDS 同一個 AZ 約 0.5~1ms) 來估算 MySQL 的情況。
+最後用 Little's law 換算：每秒 --write-rps 筆寫入需要同時佔用幾條 threadpool 執行緒 (預設 40 條)。
+python -m benchmarks.exchange_writes [--requests 500] [--write-rps 200] [--rtt-ms 1]
+"""
+import argparse
+
+from ._common import logger, measure, percentiles, reset_database
+
+from sqlalchemy import insert  # noqa: E402
+
+from src.database import SessionLocal  # noqa: E402
+from src.modules.exchanges.application.dtos import CreateExchangeRequest  # noqa: E402
+from src.modules.exchanges.application.service import ExchangeService  # noqa: E402
+from src.modules.exchanges.infrastructure.repository import SqlAlchemyExchangeRepository  # noqa: E402
+from src.modules.iam.infrastructure.models import UserModel  # noqa: E402
+from src.modules.inventory.domain.entity import ItemCategory, ItemStatus  # noqa: E402
+from src.modules.inventory.infrastructure.models import ItemModel  # noqa: E402
+from src.modules.inventory.infrastructure.repository import SqlAlchemyItemRepository  # noqa: E402
+from src.sql_profiler import profile_sql  # noqa: E402
+
+THREADPOOL_SIZE = 40  # anyio 預設
+
+
+def seed(requests: int) -> None:
+    db = SessionLocal()
+    try:
+        db.execute(
+            insert(UserModel),
+            [{"id": "owner", "email": "owner@example.com", "name": "owner"},
+             {"id": "requester", "email": "requester@example.com", "name": "requester"}],
+        )
+        db.execute(
+            insert(ItemModel),
+            [
+                {
+                    "id": f"item-{n}", "owner_id": "owner", "title": "lamp", "description": "desk lamp",
+                    "category": ItemCategory.OTHER, "status": ItemStatus.AVAILABLE,
+                }
+                for n in range(requests)
+            ],
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def profiled(operation):
+    """回傳 (耗時 ms, SQL 耗時 ms, SQL 數量)"""
+    db = SessionLocal()
+    try:
+        service = ExchangeService(SqlAlchemyExchangeRepository(db), SqlAlchemyItemRepository(db), db)
+        with profile_sql() as profile:
+            elapsed = measure(lambda: operation(service), 1)[0]
+        return elapsed, profile.total_seconds * 1000, profile.count
+    finally:
+        db.close()
+
+
+def report_operation(label: str, results, write_rps: float, rtt_ms: float) -> None:
+    elapsed = [r[0] + r[2] * rtt_ms for r in results]
+    sql = [r[1] + r[2] * rtt_ms for r in results]
+    stats = percentiles(elapsed)
+    sql_share = sum(sql) / sum(elapsed)
+    busy_threads = write_rps * stats["mean"] / 1000
+    logger.info(
+        f"{label}: mean={stats['mean']:.2f}ms p99={stats['p99']:.2f}ms statements={sorted({r[2] for r in results})} "
+        f"sql={sql_share:.0%} of the request (rtt={rtt_ms}ms per statement)"
+    )
+    logger.info(
+        f"  {write_rps:.0f} writes/s keep {busy_threads:.1f} of {THREADPOOL_SIZE} threads busy; "
+        f"async could release at most {busy_threads * sql_share:.1f} of them"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--write-rps", type=float, default=200)
+    parser.add_argument("--rtt-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    reset_database()
+    seed(args.requests)
+
+    created = []
+
+    def create(service, n):
+        exchange = service.create_exchange("requester", f"item-{n}", CreateExchangeRequest(message="還有嗎?"))
+        created.append(exchange.id)
+
+    report_operation(
+        "create_exchange",
+        [profiled(lambda service, n=n: create(service, n)) for n in range(args.requests)],
+        args.write_rps,
+        args.rtt_ms,
+    )
+    report_operation(
+        "send_message",
+        [profiled(lambda service: service.send_message("requester", created[0], "3 點見")) for _ in range(args.requests)],
+        args.write_rps,
+        args.rtt_ms,
+    )
@@ -0,0 +1,63 @@
+"""
+縮圖 Pipeline 的處理量與節省的傳輸量。
+python -m benchmarks.image_variants [--images 24] [--workers 1,2,4] [--size 3024x4032]
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ._common import logger
+
+from PIL import Image  # noqa: E402
+
+from src.modules.inventory.infrastructure.image_processing import (  # noqa: E402
+    ProcessPoolImageProcessor,
+    render_variants,
+)
+
+
+def make_photo(width: int, height: int) -> bytes:
+    # 有雜訊的照片比純色圖更接近手機照片的壓縮率
+    noise = Image.effect_noise((width, height), 40)
+    image = Image.merge("RGB", [noise, noise.transpose(Image.FLIP_LEFT_RIGHT), Image.linear_gradient("L").resize((width, height))])
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=92)
+    return buffer.getvalue()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--images", type=int, default=24)
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--size", default="3024x4032")
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.split("x"))
+    photo = make_photo(width, height)
+    with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False) as f:
+        f.write(photo)
+        path = f.name
+
+    try:
+        variants = render_variants(path)
+        logger.info(f"original: {len(photo)} bytes ({width}x{height} JPEG)")
+        for name, variant in variants.items():
+            logger.info(f"{name}: {len(variant.content)} bytes, {1 - len(variant.content) / len(photo):.1%} saved")
+
+        for workers in (int(w) for w in args.workers.split(",")):
+            processor = ProcessPoolImageProcessor(max_workers=workers)
+            try:
+                processor.generate_variants(path)  # 暖機：啟動子 Process
+                start = time.perf_counter()
+                # 模擬多個請求同時上傳 (每個請求在自己的執行緒等結果)
+                with ThreadPoolExecutor(max_workers=workers * 2) as requests:
+                    list(requests.map(lambda _: processor.generate_variants(path), range(args.images)))
+                elapsed = time.perf_counter() - start
+            finally:
+                processor.shutdown()
+            logger.info(f"process pool workers={workers}: {args.images / elapsed:.2f} images/s")
+    finally:
+        os.unlink(path)
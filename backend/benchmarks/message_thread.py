@@ -0,0 +1,99 @@
+"""
+10k 則訊息的聊天室：比較一次取回整份歷史 (舊做法) 與 limit / after_id / before_id 的延遲與回應大小。
+python -m benchmarks.message_thread [--messages 10000] [--requests 50]
+"""
+import argparse
+from datetime import datetime, timedelta
+from typing import List
+
+from ._common import logger, measure, percentiles, reset_database
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import insert, select  # noqa: E402
+
+from src.database import SessionLocal  # noqa: E402
+from src.main import app  # noqa: E402
+from src.modules.exchanges.domain.entity import ExchangeStatus  # noqa: E402
+from src.modules.exchanges.infrastructure.models import ExchangeModel, MessageModel  # noqa: E402
+from src.modules.iam.dependencies import get_current_user  # noqa: E402
+from src.modules.iam.domain.entity import User  # noqa: E402
+from src.modules.iam.infrastructure.models import UserModel  # noqa: E402
+from src.modules.inventory.domain.entity import ItemCategory, ItemStatus  # noqa: E402
+from src.modules.inventory.infrastructure.models import ItemModel  # noqa: E402
+
+EXCHANGE_ID = "bench-exchange"
+USER_IDS = ("bench-requester", "bench-owner")
+
+
+def seed_thread(messages: int) -> List[int]:
+    base_time = datetime(2026, 1, 1)
+    db = SessionLocal()
+    try:
+        db.add_all(UserModel(id=user_id, email=f"{user_id}@example.com", name=user_id) for user_id in USER_IDS)
+        db.add(
+            ItemModel(
+                id="bench-item",
+                owner_id=USER_IDS[1],
+                title="lamp",
+                description="lamp",
+                category=ItemCategory.OTHER,
+                status=ItemStatus.AVAILABLE,
+            )
+        )
+        db.add(
+            ExchangeModel(
+                id=EXCHANGE_ID,
+                requester_id=USER_IDS[0],
+                owner_id=USER_IDS[1],
+                target_item_id="bench-item",
+                status=ExchangeStatus.ACCEPTED,
+                message="",
+            )
+        )
+        db.commit()
+        db.execute(
+            insert(MessageModel),
+            [
+                {
+                    "exchange_id": EXCHANGE_ID,
+                    "sender_id": USER_IDS[n % 2],
+                    "content": f"message {n}: 請問明天下午三點在圖書館門口可以嗎？",
+                    "created_at": base_time + timedelta(seconds=n),
+                }
+                for n in range(messages)
+            ],
+        )
+        db.commit()
+        return list(db.scalars(select(MessageModel.id).order_by(MessageModel.id)))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    reset_database()
+    ids = seed_thread(args.messages)
+    app.dependency_overrides[get_current_user] = lambda: User(
+        id=USER_IDS[0], email="", password_hash="", name=USER_IDS[0]
+    )
+
+    url = f"/exchanges/{EXCHANGE_ID}/messages"
+    cases = {
+        "full history": url,
+        "latest 50": f"{url}?limit=50",
+        "poll, nothing new": f"{url}?after_id={ids[-1]}",
+        "poll, 10 new": f"{url}?after_id={ids[-11]}",
+        "scroll up 50": f"{url}?before_id={ids[len(ids) // 2]}&limit=50",
+    }
+    with TestClient(app) as client:
+        for label, path in cases.items():
+            size = len(client.get(path).content)
+            stats = percentiles(measure(lambda: client.get(path), args.requests))
+            logger.info(
+                f"{label}: {size / 1024:.1f} KiB, p50={stats['p50']:.2f}ms p95={stats['p95']:.2f}ms p99={stats['p99']:.2f}ms"
+            )
+    app.dependency_overrides.clear()
@@ -0,0 +1,103 @@
+"""
+Metrics 在熱路徑上的成本：
+- 單次 Counter.inc / Histogram.observe 的時間
+- 只有 MetricsMiddleware 的空 ASGI app，每個請求多花的時間
+- 實際 API (GET /items/、GET /items/{id}) 開啟 / 關閉 MetricsMiddleware 與 SQL hooks 的延遲
+python -m benchmarks.metrics_overhead [--items 1000] [--requests 2000]
+"""
+import argparse
+import asyncio
+import time
+
+from ._common import logger, measure, report, reset_database, seed_items
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.engine import Engine  # noqa: E402
+
+from src import instrumentation  # noqa: E402
+from src.instrumentation import MetricsMiddleware  # noqa: E402
+from src.main import app  # noqa: E402
+from src.metrics import MetricsRegistry  # noqa: E402
+
+
+def per_call_ns(fn, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1e9
+
+
+async def _empty_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def asgi_call_us(asgi_app, n: int) -> float:
+    """直接呼叫 ASGI app n 次 (不經過 HTTP)，回傳每次的時間 (µs)"""
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": []}
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    async def run():
+        start = time.perf_counter()
+        for _ in range(n):
+            await asgi_app(scope, receive, send)
+        return (time.perf_counter() - start) / n * 1e6
+
+    return asyncio.run(run())
+
+
+def set_instrumentation(enabled: bool) -> None:
+    """掛上 / 拿掉 MetricsMiddleware 與 SQL hooks (middleware stack 會在下一個請求重建)"""
+    app.middleware_stack = None
+    app.user_middleware = [m for m in app.user_middleware if m.cls is not MetricsMiddleware]
+    if enabled:
+        app.add_middleware(MetricsMiddleware)
+        instrumentation.install_sql_hooks()
+    else:
+        for name in ("before_cursor_execute", "after_cursor_execute"):
+            hook = getattr(instrumentation, f"_{name}")
+            if event.contains(Engine, name, hook):
+                event.remove(Engine, name, hook)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    registry = MetricsRegistry()
+    counter = registry.counter("bench_total")
+    histogram = registry.histogram("bench_seconds")
+    logger.info(f"Counter.inc: {per_call_ns(lambda: counter.inc(route='/items/', method='GET'), 200000):.0f} ns")
+    logger.info(f"Histogram.observe: {per_call_ns(lambda: histogram.observe(0.01, route='/items/'), 200000):.0f} ns")
+
+    bare = asgi_call_us(_empty_app, 20000)
+    wrapped = asgi_call_us(MetricsMiddleware(_empty_app), 20000)
+    logger.info(f"MetricsMiddleware on an empty app: {bare:.1f} us -> {wrapped:.1f} us (+{wrapped - bare:.1f} us/request)")
+
+    reset_database()
+    seed_items(args.items)
+
+    with TestClient(app) as client:
+        paths = {"GET /items/": "/items/?limit=20", "GET /items/{id}": "/items/item-00000042"}
+        results = {}
+        # 交替量兩輪，減少暖機 / 快取造成的偏差
+        for round_ in range(2):
+            for enabled in (True, False):
+                set_instrumentation(enabled)
+                for label, path in paths.items():
+                    client.get(path)
+                    samples = measure(lambda: client.get(path), args.requests // 2)
+                    results.setdefault((label, enabled), []).extend(samples)
+        set_instrumentation(True)
+
+    for label in paths:
+        report(f"{label} with metrics", results[(label, True)])
+        report(f"{label} without metrics", results[(label, False)])
@@ -0,0 +1,53 @@
+"""
+不同 Connection Pool 設定 (DB_POOL_SIZE / DB_MAX_OVERFLOW / DB_POOL_TIMEOUT) 在滿載時的尾端延遲與錯誤數。
+每組設定各自啟動一次 uvicorn，壓測後讀 /internal/metrics 的等待時間與逾時次數。
+預設用 SQLite 檔案 (一樣走 QueuePool)；要測 MySQL 時設定 DATABASE_URL。
+python -m benchmarks.pool_settings [--items 10000] [--concurrency 80] [--duration 15] [--settings 5/0/1,5/10/30,10/30/10]
+"""
+import argparse
+
+import httpx
+
+from ._common import logger, reset_database, seed_items
+from ._load import load, serve
+
+PATHS = [
+    "/items/?limit=20",
+    "/items/?limit=20&category=3C",
+    "/items/item-00000042",
+    "/items/categories",
+]
+
+
+def _pool_metrics(base_url: str) -> dict:
+    snapshot = httpx.get(f"{base_url}/internal/metrics", timeout=10).json()
+    wait = snapshot.get("db_pool_checkout_seconds", {}).get("pool=primary") or {}
+    return {
+        "wait_p99": (wait.get("p99") or 0) * 1000,
+        "timeouts": snapshot.get("db_pool_timeouts_total", {}).get("pool=primary", 0),
+        "connects": snapshot.get("db_pool_connects_total", {}).get("pool=primary", 0),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=80)
+    parser.add_argument("--duration", type=float, default=15)
+    # pool_size/max_overflow/timeout；5/10/30 是 SQLAlchemy 的預設值，10/30/10 是目前的預設值
+    parser.add_argument("--settings", default="5/0/1,5/10/30,10/30/10")
+    args = parser.parse_args()
+
+    reset_database()
+    seed_items(args.items)
+
+    for setting in args.settings.split(","):
+        size, overflow, timeout = setting.split("/")
+        env = {"DB_POOL_SIZE": size, "DB_MAX_OVERFLOW": overflow, "DB_POOL_TIMEOUT": timeout}
+        with serve(env) as base_url:
+            stats = load(f"pool {setting}", base_url, PATHS, args.concurrency, args.duration)
+            pool = _pool_metrics(base_url)
+        logger.info(
+            f"pool {setting}: checkout wait p99={pool['wait_p99']:.1f}ms "
+            f"timeouts={pool['timeouts']:.0f} connects={pool['connects']:.0f}"
+        )
@@ -0,0 +1,62 @@
+"""
+Read Replica 分流前後 Primary 的負載：同一組唯讀 API，分別在沒有 / 有 REPLICA_DATABASE_URL 時壓測，
+比較 Primary / Replica 各被借出幾次連線 (/internal/metrics 的 db_pool_checkout_seconds 次數) 與延遲。
+本機用兩個 SQLite 檔案模擬 (seed 完複製一份當 Replica)；要測 MySQL 時設定 DATABASE_URL / REPLICA_DATABASE_URL。
+python -m benchmarks.replica_routing [--items 10000] [--concurrency 50] [--duration 15]
+"""
+import argparse
+import os
+import shutil
+
+import httpx
+
+from ._common import TMP_DIR, logger, reset_database, seed_items
+from ._load import load, serve
+
+PATHS = [
+    "/items/?limit=20",
+    "/items/?limit=20&category=3C",
+    "/items/?limit=20&keyword=lamp",
+    "/items/item-00000042",
+    "/items/categories",
+]
+
+
+def _checkouts(base_url: str) -> dict:
+    snapshot = httpx.get(f"{base_url}/internal/metrics", timeout=10).json()
+    waits = snapshot.get("db_pool_checkout_seconds", {})
+    return {pool: (waits.get(f"pool={pool}") or {}).get("count", 0) for pool in ("primary", "replica")}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=15)
+    args = parser.parse_args()
+
+    reset_database()
+    seed_items(args.items)
+
+    replica_url = os.getenv("REPLICA_DATABASE_URL")
+    if not replica_url:
+        shutil.copy(os.path.join(TMP_DIR, "bench.db"), os.path.join(TMP_DIR, "replica.db"))
+        replica_url = f"sqlite:///{TMP_DIR}/replica.db"
+
+    results = {}
+    for label, env in (("primary only", {"REPLICA_DATABASE_URL": ""}), ("with replica", {"REPLICA_DATABASE_URL": replica_url})):
+        with serve(env) as base_url:
+            stats = load(label, base_url, PATHS, args.concurrency, args.duration)
+            checkouts = _checkouts(base_url)
+        results[label] = (stats, checkouts)
+        logger.info(f"{label}: checkouts primary={checkouts['primary']} replica={checkouts['replica']}")
+
+    (before, before_checkouts), (after, after_checkouts) = results["primary only"], results["with replica"]
+    # 以每個請求借出的 Primary 連線數比較，排除兩次吞吐量不同的影響
+    per_request_before = before_checkouts["primary"] / max(before["rps"] * args.duration, 1)
+    per_request_after = after_checkouts["primary"] / max(after["rps"] * args.duration, 1)
+    logger.info(
+        f"primary checkouts per request {per_request_before:.2f} -> {per_request_after:.2f} "
+        f"({1 - per_request_after / max(per_request_before, 1e-9):.0%} less), "
+        f"p99 {before['p99']:.1f}ms -> {after['p99']:.1f}ms"
+    )
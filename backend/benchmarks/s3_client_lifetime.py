@@ -0,0 +1,56 @@
+"""
+比較「每個 Request 建立 S3ImageStorage + boto3 client」(舊做法) 與「lifespan 共用、client 延遲建立」的成本：
+- 啟動：建立 S3ImageStorage / 第一次建立 boto3 client 的時間
+- 每個請求：GET /items/ 的延遲 (查詢 API 完全不會建立 client)
+python -m benchmarks.s3_client_lifetime [--items 1000] [--requests 300]
+"""
+import argparse
+import contextlib
+import io
+
+from ._common import measure, report, reset_database, seed_items
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from src.main import app  # noqa: E402
+from src.modules.inventory.dependencies import get_image_storage  # noqa: E402
+from src.modules.inventory.infrastructure.s3_uploader import S3ImageStorage  # noqa: E402
+
+
+def per_request_storage() -> S3ImageStorage:
+    # 舊做法：每個請求都建立新的 boto3 client (重新解析憑證、建立新的連線池)
+    storage = S3ImageStorage()
+    storage.s3_client
+    return storage
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+
+    reset_database()
+    seed_items(args.items)
+
+    # _create_client 會 print 使用的憑證來源，壓測時不要洗版
+    with contextlib.redirect_stdout(io.StringIO()):
+        report("startup: S3ImageStorage() (lazy client)", measure(S3ImageStorage, 20))
+        report("startup: S3ImageStorage() + boto3 client", measure(per_request_storage, 20))
+
+        def start_app():
+            with TestClient(app):
+                pass
+
+        report("startup: app lifespan", measure(start_app, 5))
+
+        with TestClient(app) as client:
+            get_items = lambda: client.get("/items/?limit=20")  # noqa: E731
+            get_items()
+            report("GET /items/ shared storage", measure(get_items, args.requests))
+
+            app.dependency_overrides[get_image_storage] = per_request_storage
+            try:
+                report("GET /items/ storage per request", measure(get_items, args.requests))
+            finally:
+                app.dependency_overrides.clear()
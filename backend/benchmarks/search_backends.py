@@ -0,0 +1,56 @@
+"""
+比較關鍵字搜尋後端 (LIKE / 倒排索引) 在不同資料量下的延遲。
+python -m benchmarks.search_backends [--sizes 10000,100000,1000000] [--repeat 50]
+"""
+import argparse
+
+from . import _common
+from ._common import logger, measure, report, reset_database, seed_items, stopwatch
+
+from src.database import SessionLocal  # noqa: E402
+from src.modules.inventory.domain.entity import ItemCategory  # noqa: E402
+from src.modules.inventory.infrastructure.models import ItemModel  # noqa: E402
+from src.modules.inventory.infrastructure.repository import SqlAlchemyItemRepository  # noqa: E402
+from src.modules.inventory.infrastructure.search import (  # noqa: E402
+    InvertedIndexSearchBackend,
+    LikeSearchBackend,
+)
+
+QUERIES = ["計算機", "書", "教科書", "lamp", "電風扇 書桌"]
+
+
+def run(size: int, repeat: int) -> None:
+    reset_database()
+    with stopwatch(f"[{size}] seed"):
+        seed_items(size)
+
+    db = SessionLocal()
+    try:
+        memory = InvertedIndexSearchBackend()
+        with stopwatch(f"[{size}] memory: build index"):
+            memory.filter(db.query(ItemModel), "warmup", db)
+
+        for name, backend in (("like", LikeSearchBackend()), ("memory", memory)):
+            repo = SqlAlchemyItemRepository(db, backend)
+            for keyword in QUERIES:
+                report(
+                    f"[{size}] {name} q={keyword!r} first page",
+                    measure(lambda: repo.search(keyword, None, limit=21), repeat),
+                )
+                report(
+                    f"[{size}] {name} q={keyword!r} category=3C first page",
+                    measure(lambda: repo.search(keyword, ItemCategory.ELECTRONICS, limit=21), repeat),
+                )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    logger.info(f"SQLite: {_common.TMP_DIR}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        run(size, args.repeat)
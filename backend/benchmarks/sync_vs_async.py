@@ -0,0 +1,44 @@
+"""
+同樣的 worker 數下，比較同步 (threadpool + pymysql) 與 async (AsyncSession) 查詢 API 的吞吐量與延遲。
+預設用 SQLite / aiosqlite；要測 MySQL 時設定 DATABASE_URL / ASYNC_DATABASE_URL。
+python -m benchmarks.sync_vs_async [--items 10000] [--workers 1] [--concurrency 10,50,200] [--duration 15]
+"""
+import argparse
+
+from ._common import logger, reset_database, seed_items
+from ._load import load, serve
+
+PATHS = [
+    "/items/?limit=20",
+    "/items/?limit=20&category=3C",
+    "/items/?limit=20&keyword=lamp",
+    "/items/item-00000042",
+    "/items/categories",
+]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--concurrency", default="10,50,200")
+    parser.add_argument("--duration", type=float, default=15)
+    args = parser.parse_args()
+
+    reset_database()
+    seed_items(args.items)
+
+    results = {}
+    for stack, use_async in (("sync", "false"), ("async", "true")):
+        with serve({"DB_ASYNC_ENABLED": use_async}, workers=args.workers) as base_url:
+            for concurrency in (int(c) for c in args.concurrency.split(",")):
+                results[(stack, concurrency)] = load(
+                    f"{stack} workers={args.workers}", base_url, PATHS, concurrency, args.duration
+                )
+
+    for concurrency in (int(c) for c in args.concurrency.split(",")):
+        sync, async_ = results[("sync", concurrency)], results[("async", concurrency)]
+        logger.info(
+            f"c={concurrency}: async/sync rps = {async_['rps'] / max(sync['rps'], 1):.2f}x, "
+            f"p99 {sync['p99']:.1f}ms -> {async_['p99']:.1f}ms"
+        )
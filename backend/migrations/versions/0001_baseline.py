@@ -0,0 +1,92 @@
+"""baseline: 原本由 create_all 建立的資料表
+
+已經在跑的資料庫 (先前由 create_all 建好) 不要執行這個 revision，
+請用 `alembic stamp 0001_baseline` 標記後再 `alembic upgrade head`。
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0001_baseline"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Enum 以「當時」的成員名稱凍結，之後 Domain 改了也不影響這個 revision
+ITEM_CATEGORY = sa.Enum("TEXTBOOK", "ELECTRONICS", "DAILY_USE", "FOODSTUFF", "FURNITURE", "OTHER", name="itemcategory")
+ITEM_STATUS = sa.Enum("AVAILABLE", "TRADING", "TRADED", "HIDDEN", name="itemstatus")
+EXCHANGE_STATUS = sa.Enum("PENDING", "ACCEPTED", "REJECTED", "COMPLETED", "CANCELLED", name="exchangestatus")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("email", sa.String(255), nullable=False),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("password_hash", sa.String(255), nullable=True),
+        sa.Column("avatar_url", sa.String(1024), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("is_admin", sa.Boolean(), nullable=False),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "items",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("owner_id", sa.String(36), nullable=False),
+        sa.Column("title", sa.String(255), nullable=False),
+        sa.Column("description", sa.String(2048), nullable=False),
+        sa.Column("category", ITEM_CATEGORY, nullable=False),
+        sa.Column("status", ITEM_STATUS, nullable=False),
+        sa.Column("image_url", sa.String(1024), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_items_id", "items", ["id"])
+    op.create_index("ix_items_owner_id", "items", ["owner_id"])
+    op.create_index("ix_items_title", "items", ["title"])
+
+    op.create_table(
+        "exchanges",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("requester_id", sa.String(36), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("owner_id", sa.String(36), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("target_item_id", sa.String(36), sa.ForeignKey("items.id"), nullable=False),
+        sa.Column("offered_item_id", sa.String(36), sa.ForeignKey("items.id"), nullable=True),
+        sa.Column("status", EXCHANGE_STATUS, nullable=False),
+        sa.Column("message", sa.Text(), nullable=True),
+        sa.Column("meetup_location_id", sa.Integer(), nullable=True),
+        sa.Column("requester_confirmed", sa.Boolean(), nullable=False),
+        sa.Column("owner_confirmed", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_exchanges_id", "exchanges", ["id"])
+    op.create_index("ix_exchanges_requester_id", "exchanges", ["requester_id"])
+    op.create_index("ix_exchanges_owner_id", "exchanges", ["owner_id"])
+
+    op.create_table(
+        "exchange_messages",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("exchange_id", sa.String(36), sa.ForeignKey("exchanges.id"), nullable=False),
+        sa.Column("sender_id", sa.String(36), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_exchange_messages_id", "exchange_messages", ["id"])
+    op.create_index("ix_exchange_messages_exchange_id", "exchange_messages", ["exchange_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("exchange_messages")
+    op.drop_table("exchanges")
+    op.drop_table("items")
+    op.drop_table("users")
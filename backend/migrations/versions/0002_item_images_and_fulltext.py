@@ -0,0 +1,33 @@
+"""items: 縮圖網址欄位 + 標題/描述全文索引 (MySQL)
+
+Revision ID: 0002_item_images_and_fulltext
+Revises: 0001_baseline
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0002_item_images_and_fulltext"
+down_revision: Union[str, None] = "0001_baseline"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("items", sa.Column("image_variants", sa.JSON(), nullable=True))
+
+    # FULLTEXT + ngram parser 只有 MySQL 有 (給 ITEM_SEARCH_BACKEND=fulltext 使用)
+    if op.get_context().dialect.name == "mysql":
+        op.execute(
+            "ALTER TABLE items ADD FULLTEXT INDEX ft_items_title_description (title, description) WITH PARSER ngram"
+        )
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name == "mysql":
+        op.drop_index("ft_items_title_description", table_name="items")
+    op.drop_column("items", "image_variants")
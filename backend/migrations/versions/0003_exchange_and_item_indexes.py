@@ -0,0 +1,32 @@
+"""exchanges / items: 熱門查詢條件的複合索引
+
+- exchanges (target_item_id, status): 重複請求檢查、拒絕其他請求、物品列表的 ACCEPTED join
+- exchanges (offered_item_id, status): 拒絕「同一個交換物」的其他請求
+- items (status, category, created_at): 搜尋 (上架中 + 分類 + 依時間排序 / 分頁)
+
+Revision ID: 0003_exchange_and_item_indexes
+Revises: 0002_item_images_and_fulltext
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "0003_exchange_and_item_indexes"
+down_revision: Union[str, None] = "0002_item_images_and_fulltext"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_exchanges_target_item_id_status", "exchanges", ["target_item_id", "status"])
+    op.create_index("ix_exchanges_offered_item_id_status", "exchanges", ["offered_item_id", "status"])
+    op.create_index("ix_items_status_category_created_at", "items", ["status", "category", "created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_items_status_category_created_at", table_name="items")
+    op.drop_index("ix_exchanges_offered_item_id_status", table_name="exchanges")
+    op.drop_index("ix_exchanges_target_item_id_status", table_name="exchanges")
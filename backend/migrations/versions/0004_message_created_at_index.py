@@ -0,0 +1,30 @@
+"""exchange_messages: (exchange_id, created_at) 複合索引
+
+聊天室依時間排序、after_id / before_id 增量查詢都走這個索引，不用整串訊息重新排序
+
+Revision ID: 0004_message_created_at_index
+Revises: 0003_exchange_and_item_indexes
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "0004_message_created_at_index"
+down_revision: Union[str, None] = "0003_exchange_and_item_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_exchange_messages_exchange_id_created_at",
+        "exchange_messages",
+        ["exchange_id", "created_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_exchange_messages_exchange_id_created_at", table_name="exchange_messages")
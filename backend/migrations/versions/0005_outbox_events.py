@@ -0,0 +1,40 @@
+"""outbox_events: 交換狀態變更的 Domain Event (Transactional Outbox)
+
+Revision ID: 0005_outbox_events
+Revises: 0004_message_created_at_index
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = "0005_outbox_events"
+down_revision: Union[str, None] = "0004_message_created_at_index"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "outbox_events",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("event_type", sa.String(length=64), nullable=False),
+        sa.Column("aggregate_id", sa.String(length=36), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("dispatched_at", sa.DateTime(), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_outbox_events_aggregate_id", "outbox_events", ["aggregate_id"])
+    op.create_index("ix_outbox_events_dispatched_at_id", "outbox_events", ["dispatched_at", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_outbox_events_dispatched_at_id", table_name="outbox_events")
+    op.drop_index("ix_outbox_events_aggregate_id", table_name="outbox_events")
+    op.drop_table("outbox_events")
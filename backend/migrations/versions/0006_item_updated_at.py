@@ -0,0 +1,32 @@
+"""items.updated_at: 物品詳情 Weak ETag 的版本資訊
+
+既有資料用 created_at 回填
+
+Revision ID: 0006_item_updated_at
+Revises: 0005_outbox_events
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = "0006_item_updated_at"
+down_revision: Union[str, None] = "0005_outbox_events"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("items", sa.Column("updated_at", sa.DateTime(), nullable=True))
+    op.execute("UPDATE items SET updated_at = created_at")
+    # SQLite 不支援 ALTER COLUMN，batch 模式會重建資料表
+    with op.batch_alter_table("items") as batch_op:
+        batch_op.alter_column("updated_at", existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("items") as batch_op:
+        batch_op.drop_column("updated_at")
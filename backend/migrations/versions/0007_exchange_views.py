@@ -0,0 +1,52 @@
+"""exchange_views: 交換列表 / 詳情的 Read Model (CQRS Projection)
+
+建立後請執行 python -m src.modules.exchanges.infrastructure.read_model 產生既有交換的資料
+
+Revision ID: 0007_exchange_views
+Revises: 0006_item_updated_at
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = "0007_exchange_views"
+down_revision: Union[str, None] = "0006_item_updated_at"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# 和 0001_baseline 一樣，Enum 依成員名稱凍結
+EXCHANGE_STATUS = sa.Enum("PENDING", "ACCEPTED", "REJECTED", "COMPLETED", "CANCELLED", name="exchangestatus")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "exchange_views",
+        sa.Column("exchange_id", sa.String(length=36), nullable=False),
+        sa.Column("requester_id", sa.String(length=36), nullable=False),
+        sa.Column("owner_id", sa.String(length=36), nullable=False),
+        sa.Column("status", EXCHANGE_STATUS, nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("document", sa.JSON(), nullable=False),
+        sa.Column("projected_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("exchange_id"),
+    )
+    op.create_index(
+        "ix_exchange_views_requester_id_created_at",
+        "exchange_views",
+        ["requester_id", "created_at", "exchange_id"],
+    )
+    op.create_index(
+        "ix_exchange_views_owner_id_created_at",
+        "exchange_views",
+        ["owner_id", "created_at", "exchange_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_exchange_views_owner_id_created_at", table_name="exchange_views")
+    op.drop_index("ix_exchange_views_requester_id_created_at", table_name="exchange_views")
+    op.drop_table("exchange_views")
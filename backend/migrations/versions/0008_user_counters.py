@@ -0,0 +1,51 @@
+"""user_counters / exchange_read_states: 首頁摘要的計數器與聊天室未讀數
+
+建立後請執行 python -m src.modules.dashboard.infrastructure.counters 由既有資料算出計數器
+
+Revision ID: 0008_user_counters
+Revises: 0007_exchange_views
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = "0008_user_counters"
+down_revision: Union[str, None] = "0007_exchange_views"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_counters",
+        sa.Column("user_id", sa.String(length=36), nullable=False),
+        sa.Column("name", sa.String(length=64), nullable=False),
+        sa.Column("value", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id", "name"),
+    )
+    op.create_table(
+        "exchange_read_states",
+        sa.Column("exchange_id", sa.String(length=36), nullable=False),
+        sa.Column("user_id", sa.String(length=36), nullable=False),
+        sa.Column("unread_count", sa.Integer(), nullable=False),
+        sa.Column("last_read_message_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["exchange_id"], ["exchanges.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("exchange_id", "user_id"),
+    )
+    op.create_index(
+        "ix_exchange_read_states_user_id_unread",
+        "exchange_read_states",
+        ["user_id", "unread_count"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_exchange_read_states_user_id_unread", table_name="exchange_read_states")
+    op.drop_table("exchange_read_states")
+    op.drop_table("user_counters")
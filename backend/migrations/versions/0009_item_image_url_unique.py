@@ -0,0 +1,27 @@
+"""items.image_url 唯一索引: 同一張上傳的圖片不能刊登成兩個物品
+
+建立前請先確認沒有重複的 image_url (SELECT image_url FROM items GROUP BY image_url HAVING COUNT(*) > 1)
+
+Revision ID: 0009_item_image_url_unique
+Revises: 0008_user_counters
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "0009_item_image_url_unique"
+down_revision: Union[str, None] = "0008_user_counters"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # MySQL 的 utf8mb4 索引長度有上限 (image_url 是 VARCHAR(1024))，只取前 255 字
+    op.create_index("uq_items_image_url", "items", ["image_url"], unique=True, mysql_length=255)
+
+
+def downgrade() -> None:
+    op.drop_index("uq_items_image_url", table_name="items")
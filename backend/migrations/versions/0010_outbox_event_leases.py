@@ -0,0 +1,27 @@
+"""outbox_events.locked_by / locked_until: Dispatcher 的租約與失敗重試時間
+
+Revision ID: 0010_outbox_event_leases
+Revises: 0009_item_image_url_unique
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = "0010_outbox_event_leases"
+down_revision: Union[str, None] = "0009_item_image_url_unique"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("outbox_events", sa.Column("locked_by", sa.String(length=36), nullable=True))
+    op.add_column("outbox_events", sa.Column("locked_until", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("outbox_events", "locked_until")
+    op.drop_column("outbox_events", "locked_by")
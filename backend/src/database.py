@@ -1,11 +1,20 @@
 from dotenv import load_dotenv
 
 load_dotenv()
+import hashlib
 import os
+import threading
+import time
+from typing import Dict, Optional
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from fastapi import Depends, Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
 
+from .metrics import registry
 from .modules.exchanges.infrastructure.models import ExchangeModel
 from .modules.iam.infrastructure.models import Base, UserModel
 from .modules.inventory.infrastructure.models import ItemModel
@@ -17,13 +26,210 @@ RDS_HOST = os.getenv("DB_HOST", "")
 RDS_PORT = os.getenv("DB_PORT", "")
 RDS_DB_NAME = os.getenv("DB_NAME", "")
 
-DATABASE_URL = (
-    f"mysql+pymysql://{RDS_USER}:{RDS_PASSWORD}@{RDS_HOST}:{RDS_PORT}/{RDS_DB_NAME}"
+# 可以用 DATABASE_URL / ASYNC_DATABASE_URL 直接覆寫 (例如本機測試用 sqlite / aiosqlite)
+DATABASE_URL = os.getenv(
+    "DATABASE_URL",
+    f"mysql+pymysql://{RDS_USER}:{RDS_PASSWORD}@{RDS_HOST}:{RDS_PORT}/{RDS_DB_NAME}",
 )
+ASYNC_DATABASE_URL = os.getenv(
+    "ASYNC_DATABASE_URL",
+    f"mysql+aiomysql://{RDS_USER}:{RDS_PASSWORD}@{RDS_HOST}:{RDS_PORT}/{RDS_DB_NAME}",
+)
+
+# --- Read Replica (選用) ---
+# 設定 DB_REPLICA_HOST (或直接給 REPLICA_DATABASE_URL) 後，唯讀的 API 會改查 Replica
+RDS_REPLICA_HOST = os.getenv("DB_REPLICA_HOST", "")
+REPLICA_DATABASE_URL = os.getenv("REPLICA_DATABASE_URL") or (
+    f"mysql+pymysql://{RDS_USER}:{RDS_PASSWORD}@{RDS_REPLICA_HOST}:{RDS_PORT}/{RDS_DB_NAME}"
+    if RDS_REPLICA_HOST
+    else None
+)
+# 使用者寫入後的幾秒內，他的讀取仍然走 Primary (避免 Replica 延遲而看不到剛剛的修改)
+REPLICA_STICKY_SECONDS = float(os.getenv("DB_REPLICA_STICKY_SECONDS", "5"))
+
+# 啟動時是否用 create_all 建立缺少的資料表 (本機開發用)
+# 正式環境請設成 false，改用 Alembic 管理 Schema: alembic upgrade head
+AUTO_CREATE_TABLES = os.getenv("DB_AUTO_CREATE_TABLES", "true").lower() == "true"
+
+# 是否啟用 async 的查詢路徑 (aiomysql + AsyncSession)
+USE_ASYNC_DB = os.getenv("DB_ASYNC_ENABLED", "false").lower() == "true"
+
+# --- Connection Pool 設定 ---
+# uvicorn 的 threadpool 預設 40 條執行緒，pool_size + max_overflow 最好能接住同時的請求，
+# 但總數也不要超過 RDS 的 max_connections (多個 worker / 多台機器要一起算)
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+POOL_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "30"))
+POOL_TIMEOUT = float(
+    os.getenv("DB_POOL_TIMEOUT", "10")
+)  # 等不到連線幾秒後放棄 (預設 30 太久)
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "3600"))
+POOL_PRE_PING = (
+    os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+)  # 取出前先確認連線還活著
+
+db_pool_checkout_seconds = registry.histogram(
+    "db_pool_checkout_seconds", "從 Pool 取得連線的等待時間"
+)
+db_pool_in_use = registry.gauge("db_pool_connections_in_use", "目前被借出的連線數")
+db_pool_overflow = registry.gauge(
+    "db_pool_overflow", "超出 pool_size、使用 overflow 的連線數"
+)
+db_pool_timeouts = registry.counter("db_pool_timeouts_total", "等不到連線而逾時的次數")
+db_pool_connects = registry.counter("db_pool_connects_total", "新建立的 DB 連線數")
+db_pool_invalidations = registry.counter(
+    "db_pool_invalidations_total", "被判定失效而丟棄的連線數"
+)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """記錄每次借連線要等多久 (QueuePool 本身沒有「開始等待」的 event)"""
+
+    metrics_label = "primary"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            db_pool_timeouts.inc(pool=self.metrics_label)
+            raise
+        finally:
+            db_pool_checkout_seconds.observe(
+                time.perf_counter() - start, pool=self.metrics_label
+            )
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    return url.startswith("sqlite") and (":memory:" in url or "///" not in url)
+
+
+def _pool_options(url: str) -> dict:
+    # 記憶體中的 sqlite 每條連線都是不同的資料庫，用 SQLAlchemy 預設的 Pool 就好
+    # (檔案型 sqlite 一樣用 QueuePool，本機壓測時 Pool 設定與 Metrics 才有作用)
+    if _is_memory_sqlite(url):
+        return {}
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": POOL_SIZE,
+        "max_overflow": POOL_MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT,
+        "pool_pre_ping": POOL_PRE_PING,
+    }
 
-engine = create_engine(DATABASE_URL, pool_recycle=3600)
+
+def instrument_pool(engine, label: str) -> None:
+    """用 Pool events 更新連線數相關的 Metrics"""
+    pool = engine.pool
+    pool.metrics_label = label
+
+    in_use = [0]
+    lock = threading.Lock()
+
+    def _update_gauges(delta: int):
+        # checkin event 觸發時連線還沒放回 Pool，所以自己計數，不用 pool.checkedout()
+        with lock:
+            in_use[0] += delta
+            db_pool_in_use.set(in_use[0], pool=label)
+            if isinstance(pool, QueuePool):
+                db_pool_overflow.set(max(in_use[0] - pool.size(), 0), pool=label)
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        db_pool_connects.inc(pool=label)
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        _update_gauges(1)
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        _update_gauges(-1)
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        db_pool_invalidations.inc(pool=label)
+
+    @event.listens_for(engine, "soft_invalidate")
+    def _on_soft_invalidate(dbapi_connection, connection_record, exception):
+        db_pool_invalidations.inc(pool=label)
+
+
+engine = create_engine(
+    DATABASE_URL, pool_recycle=POOL_RECYCLE, **_pool_options(DATABASE_URL)
+)
+instrument_pool(engine, "primary")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base.metadata.create_all(bind=engine)
+
+replica_engine = (
+    create_engine(
+        REPLICA_DATABASE_URL,
+        pool_recycle=POOL_RECYCLE,
+        **_pool_options(REPLICA_DATABASE_URL),
+    )
+    if REPLICA_DATABASE_URL
+    else None
+)
+if replica_engine:
+    instrument_pool(replica_engine, "replica")
+# Replica 的 Session 在 info 上做記號 (例如快取不可以用 Replica 上可能落後的資料回填)
+_READ_REPLICA_KEY = "read_replica"
+ReplicaSessionLocal = (
+    sessionmaker(
+        autocommit=False,
+        autoflush=False,
+        bind=replica_engine,
+        info={_READ_REPLICA_KEY: True},
+    )
+    if replica_engine
+    else None
+)
+if ReplicaSessionLocal:
+
+    @event.listens_for(ReplicaSessionLocal, "before_flush")
+    def _reject_replica_writes(session, flush_context, instances):
+        raise RuntimeError("Read replica session is read-only")
+
+
+def is_read_replica(db) -> bool:
+    return bool(db.info.get(_READ_REPLICA_KEY))
+
+
+# 不需要「讀到自己剛寫入的資料」的讀取 (例如串流匯出) 直接用這個
+ReadSessionLocal = ReplicaSessionLocal or SessionLocal
+
+# async driver 只有啟用時才建立 (沒安裝 aiomysql 也能正常啟動)
+async_engine = (
+    create_async_engine(
+        ASYNC_DATABASE_URL,
+        pool_recycle=POOL_RECYCLE,
+        pool_pre_ping=POOL_PRE_PING,
+        **(
+            {}
+            if ASYNC_DATABASE_URL.startswith("sqlite")
+            else {
+                "pool_size": POOL_SIZE,
+                "max_overflow": POOL_MAX_OVERFLOW,
+                "pool_timeout": POOL_TIMEOUT,
+            }
+        ),
+    )
+    if USE_ASYNC_DB
+    else None
+)
+if async_engine:
+    instrument_pool(async_engine.sync_engine, "async")
+
+AsyncSessionLocal = (
+    async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    if async_engine
+    else None
+)
+
+
+def init_db():
+    # create_all 只會建立不存在的資料表，不會幫既有的資料表加欄位/索引 (那些要靠 migration)
+    if AUTO_CREATE_TABLES:
+        Base.metadata.create_all(bind=engine)
 
 
 # --- Dependency: 取得 DB Session ---
@@ -33,3 +239,87 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# --- Dependency: 依 HTTP Method 分流到 Primary / Replica ---
+_SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+db_route_total = registry.counter(
+    "db_route_total", "Request 使用的資料庫 (primary / replica)"
+)
+
+
+class RecentWriters:
+    """記錄最近有寫入的使用者 (Process 內)，在時間內的讀取都改走 Primary"""
+
+    MAX_ENTRIES = 10000
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def mark(self, key: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if len(self._until) >= self.MAX_ENTRIES:
+                self._until = {k: t for k, t in self._until.items() if t > now}
+            self._until[key] = now + self.ttl_seconds
+
+    def is_recent(self, key: str) -> bool:
+        with self._lock:
+            return self._until.get(key, 0) > time.monotonic()
+
+
+recent_writers = RecentWriters(REPLICA_STICKY_SECONDS)
+
+
+def _client_key(request: Request) -> Optional[str]:
+    # 用 Token 的雜湊代表使用者，不必為了分流再驗證一次 Token
+    authorization = request.headers.get("authorization")
+    if not authorization:
+        return None
+    return hashlib.sha256(authorization.encode("utf-8")).hexdigest()
+
+
+def get_routed_db(request: Request, primary: Session = Depends(get_db)):
+    """
+    GET / HEAD / OPTIONS 走 Replica，其他 (POST / PATCH / DELETE) 走 Primary。
+    沒有設定 Replica 時就跟 get_db 一樣。
+    走 Primary 時直接沿用 get_db 的 Session (跟 get_current_user 共用同一條連線)；
+    Session 要到第一次查詢才會取連線，所以走 Replica 時不會多佔一條 Primary 連線。
+    """
+    key = _client_key(request)
+    is_read = request.method in _SAFE_METHODS
+    if not is_read and key:
+        recent_writers.mark(key)
+
+    use_replica = (
+        ReplicaSessionLocal is not None
+        and is_read
+        and not (key and recent_writers.is_recent(key))
+    )
+    db_route_total.inc(target="replica" if use_replica else "primary")
+
+    if not use_replica:
+        try:
+            yield primary
+        finally:
+            # 寫入完成後重新計時，黏著時間從 commit 之後開始算
+            if not is_read and key:
+                recent_writers.mark(key)
+        return
+
+    db = ReplicaSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# --- Dependency: 取得 Async DB Session ---
+async def get_async_db():
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async DB is not enabled (set DB_ASYNC_ENABLED=true)")
+    async with AsyncSessionLocal() as db:
+        yield db
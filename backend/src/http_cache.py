@@ -0,0 +1,104 @@
+import hashlib
+import json
+from typing import Any, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from .metrics import registry
+
+http_cache_responses = registry.counter(
+    "http_cache_responses_total",
+    "帶 ETag 的回應 (result=not_modified 代表回 304，result=full 代表回完整內容)",
+)
+http_cache_bytes_saved = registry.counter(
+    "http_cache_bytes_saved_total", "因為回 304 而不用送出的 Body 位元組數"
+)
+
+# 瀏覽器可以留著用，但每次都要帶 If-None-Match 回來確認 (確認成本很低)
+DEFAULT_CACHE_CONTROL = "no-cache"
+
+
+def _encode(payload: Any) -> bytes:
+    # 和 FastAPI 的 JSONResponse 相同的編碼方式 (ensure_ascii=False、不加空白)
+    return json.dumps(
+        jsonable_encoder(payload),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 使用 weak comparison：忽略 W/ 前綴，支援多個值與 *"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    target = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == target:
+            return True
+    return False
+
+
+def _not_modified(etag: str, cache_control: str) -> Response:
+    return Response(
+        status_code=304, headers={"ETag": etag, "Cache-Control": cache_control}
+    )
+
+
+class CachedJSON:
+    """
+    啟動時就把不會變的資料轉成 JSON bytes，並算好 Strong ETag (內容的 hash)。
+    每次請求只需要比對 If-None-Match，不用重新組資料、序列化，也不需要 DB Session。
+    """
+
+    def __init__(self, payload: Any, cache_control: str = DEFAULT_CACHE_CONTROL):
+        self.body = _encode(payload)
+        self.etag = f'"{hashlib.sha256(self.body).hexdigest()[:32]}"'
+        self.cache_control = cache_control
+
+    def respond(self, request: Request, route: str) -> Response:
+        if etag_matches(request.headers.get("if-none-match"), self.etag):
+            http_cache_responses.inc(route=route, result="not_modified")
+            http_cache_bytes_saved.inc(len(self.body), route=route)
+            return _not_modified(self.etag, self.cache_control)
+
+        http_cache_responses.inc(route=route, result="full")
+        return Response(
+            content=self.body,
+            media_type="application/json",
+            headers={"ETag": self.etag, "Cache-Control": self.cache_control},
+        )
+
+
+def weak_etag(*parts: Any) -> str:
+    """由版本資訊 (例如 id + updated_at) 產生 Weak ETag，不需要先序列化整個回應"""
+    raw = ":".join("" if part is None else str(part) for part in parts)
+    return f'W/"{hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]}"'
+
+
+def conditional_response(
+    request: Request,
+    response: Response,
+    etag: str,
+    route: str,
+    cache_control: str = DEFAULT_CACHE_CONTROL,
+) -> Optional[Response]:
+    """
+    If-None-Match 符合時回傳 304 Response (路由直接 return 它)；
+    不符合時把 ETag 加到原本的 response 上並回傳 None，路由照常回傳資料。
+    """
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        http_cache_responses.inc(route=route, result="not_modified")
+        return _not_modified(etag, cache_control)
+
+    http_cache_responses.inc(route=route, result="full")
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+    return None
@@ -0,0 +1,132 @@
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .metrics import registry
+
+# --- HTTP ---
+http_requests_total = registry.counter(
+    "http_requests_total", "HTTP 請求數 (依 route / method / status)"
+)
+http_request_seconds = registry.histogram(
+    "http_request_duration_seconds", "HTTP 請求處理時間"
+)
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "處理中的 HTTP 請求數"
+)
+
+# --- SQL ---
+sql_statements_total = registry.counter(
+    "sql_statements_total", "執行的 SQL 數 (依 SELECT / INSERT / UPDATE / DELETE)"
+)
+sql_statement_seconds = registry.histogram(
+    "sql_statement_duration_seconds", "單一 SQL 執行時間"
+)
+sql_per_request = registry.histogram(
+    "sql_statements_per_request",
+    "每個請求執行的 SQL 數",
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+sql_seconds_per_request = registry.histogram(
+    "sql_duration_per_request_seconds", "每個請求花在 SQL 的總時間"
+)
+
+# --- 外部服務 (S3 / Cognito) ---
+external_call_seconds = registry.histogram(
+    "external_call_duration_seconds", "呼叫外部服務的時間 (依 service / operation)"
+)
+
+
+@dataclass
+class RequestStats:
+    statements: int = 0
+    sql_seconds: float = 0.0
+
+
+# 目前請求的 SQL 統計 (sync 路由在 threadpool 執行時，contextvar 會一起被複製過去)
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar(
+    "request_stats", default=None
+)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _request_stats.get()
+
+
+class MetricsMiddleware:
+    """
+    純 ASGI Middleware (不用 BaseHTTPMiddleware，避免串流回應被整個緩衝)
+    route 用路由樣板 (例如 /exchanges/{exchange_id})，才不會每個 ID 各自一組 label
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        http_requests_in_flight.inc()
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_flight.dec()
+            _request_stats.reset(token)
+
+            route = scope.get("route")
+            # 沒有比對到路由的 (404) 統一成一組，避免被亂打的網址灌爆 label
+            path = getattr(route, "path", None) or "<unmatched>"
+            http_requests_total.inc(route=path, method=method, status=str(status_code))
+            http_request_seconds.observe(elapsed, route=path, method=method)
+            sql_per_request.observe(stats.statements, route=path, method=method)
+            sql_seconds_per_request.observe(
+                stats.sql_seconds, route=path, method=method
+            )
+
+
+def _statement_type(statement: str) -> str:
+    word = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return word if word in ("SELECT", "INSERT", "UPDATE", "DELETE") else "OTHER"
+
+
+def install_sql_hooks() -> None:
+    """掛在 Engine 類別上，所有 engine (primary / replica / async) 都會被統計"""
+    if event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # 記在這次執行的 context 上 (SQL 失敗時 after 不會被呼叫，不會留下殘值)
+    context._metrics_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._metrics_start
+    kind = _statement_type(statement)
+    sql_statements_total.inc(type=kind)
+    sql_statement_seconds.observe(elapsed, type=kind)
+
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.sql_seconds += elapsed
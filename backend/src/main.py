@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import (
@@ -6,12 +8,86 @@ from fastapi.middleware.cors import (
 
 load_dotenv()
 
+from .database import USE_ASYNC_DB, init_db
+from .instrumentation import MetricsMiddleware, install_sql_hooks
+from .metrics import router as metrics_router
+from .sql_profiler import (
+    SQL_PROFILE_ENABLED,
+    SqlProfilerMiddleware,
+    install_profiler_hooks,
+)
+from .sql_profiler import router as sql_profiler_router
+from .modules.dashboard.infrastructure.counters import install_counter_hooks
+from .modules.dashboard.presentation.router import router as dashboard_router
+from .modules.exchanges.presentation.async_router import (
+    router as exchange_async_router,
+)
+from .modules.exchanges.infrastructure.outbox import (
+    OUTBOX_BROADCAST_ENABLED,
+    OUTBOX_DISPATCH_ENABLED,
+    OutboxDispatcher,
+)
+from .modules.exchanges.infrastructure.read_model import (
+    install_projection_hooks,
+    subscribe_projection,
+)
+from .modules.exchanges.infrastructure.realtime import create_chat_broker
 from .modules.exchanges.presentation.router import router as exchange_router
 from .modules.iam.presentation.router import router as iam_router  # 引入 IAM 的 router
+from .modules.inventory.application.service import create_upload_executor
+from .modules.inventory.infrastructure.image_processing import (
+    ProcessPoolImageProcessor,
+)
+from .modules.inventory.infrastructure.item_cache import subscribe_invalidation
+from .modules.inventory.infrastructure.s3_uploader import S3ImageStorage
+from .modules.inventory.presentation.async_router import (
+    router as inventory_async_router,
+)
 from .modules.inventory.presentation.router import router as inventory_router
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_db()
+    # 應用程式層級共用的資源 (整個 Process 只建立一次)
+    app.state.image_storage = S3ImageStorage()
+    app.state.image_processor = ProcessPoolImageProcessor()
+    app.state.upload_executor = create_upload_executor()
+    app.state.chat_broker = create_chat_broker()
+    await app.state.chat_broker.start()
+    # 交換狀態變更的 Domain Event (outbox_events) 分送
+    # 分送 (整個系統一台處理) 與 broadcast (每個 Process 都處理，例如清掉本機快取) 可以分開關閉
+    app.state.outbox_dispatcher = OutboxDispatcher(
+        dispatch_enabled=OUTBOX_DISPATCH_ENABLED
+    )
+    subscribe_invalidation(app.state.outbox_dispatcher)
+    subscribe_projection(app.state.outbox_dispatcher)
+    if OUTBOX_DISPATCH_ENABLED or OUTBOX_BROADCAST_ENABLED:
+        await app.state.outbox_dispatcher.start()
+    yield
+    await app.state.outbox_dispatcher.stop()
+    await app.state.chat_broker.stop()
+    app.state.image_processor.shutdown()
+    app.state.upload_executor.shutdown(wait=False, cancel_futures=True)
+
+
 # 初始化 App
-app = FastAPI(title="AWS Finals API")
+app = FastAPI(title="AWS Finals API", lifespan=lifespan)
+
+# 請求延遲 / SQL 數量等 Metrics (GET /metrics)
+install_sql_hooks()
+app.add_middleware(MetricsMiddleware)
+
+# 交換的 Read Model (exchange_views) 跟著每次 commit 更新
+install_projection_hooks()
+
+# 首頁摘要的計數器 (user_counters) 跟著狀態變更在同一個 Transaction 更新
+install_counter_hooks()
+
+# 開發用：SQL_PROFILE=true 時在 X-SQL-Profile Header 回報每個請求的 SQL 數量與 N+1
+if SQL_PROFILE_ENABLED:
+    install_profiler_hooks()
+    app.add_middleware(SqlProfilerMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -25,13 +101,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],  # 分頁用的下一頁 cursor / 快取驗證
 )
 
 # --- 註冊路由 (Include Routers) ---
+# 啟用 async DB 時，先註冊 async 版的查詢 API，讓它優先於同步版被比對到
+if USE_ASYNC_DB:
+    app.include_router(inventory_async_router)
+    app.include_router(exchange_async_router)
+
 # 這行指令會把 IAM 模組裡定義的所有 API (login, me) 都掛載進來
 app.include_router(iam_router)
 app.include_router(inventory_router)
 app.include_router(exchange_router)
+app.include_router(dashboard_router)
+app.include_router(metrics_router)
+app.include_router(sql_profiler_router)
 
 
 @app.get("/")
@@ -0,0 +1,229 @@
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+# Process 內的簡易 Metrics (不依賴 prometheus_client)
+# 多個 uvicorn worker 時，每個 Process 各自統計
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# 預設的 Histogram 區間 (秒)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_INF_LABEL = 'le="+Inf"'
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _label_str(key: LabelKey) -> str:
+    return ",".join(f"{k}={v}" for k, v in key)
+
+
+def _prometheus_labels(key: LabelKey, extra: str = "") -> str:
+    parts = [f'{k}="{_escape(v)}"' for k, v in key]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    prometheus_type = "counter"
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {_label_str(k): v for k, v in self._values.items()}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.prometheus_type}"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_prometheus_labels(key)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    prometheus_type = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class CallbackGauge(Gauge):
+    """讀取時才呼叫 callback 取值 (例如快取的命中數)，callback 回傳 {label值: 數值}"""
+
+    def __init__(self, name: str, description: str, label: str, callback: Callable[[], Dict[str, float]]):
+        super().__init__(name, description)
+        self.label = label
+        self.callback = callback
+
+    def _collect(self) -> None:
+        values = self.callback()
+        with self._lock:
+            self._values = {_label_key({self.label: k}): v for k, v in values.items()}
+
+    def snapshot(self) -> Dict[str, float]:
+        self._collect()
+        return super().snapshot()
+
+    def render(self) -> List[str]:
+        self._collect()
+        return super().render()
+
+
+class Histogram:
+    def __init__(self, name: str, description: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        # 每組 label: [各區間的次數..., +Inf 的次數], 總和, 總次數
+        self._values: Dict[LabelKey, Tuple[list, float, int]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total, count = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0, 0)
+            counts[index] += 1
+            self._values[key] = (counts, total + value, count + 1)
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            result = {}
+            for key, (counts, total, count) in self._values.items():
+                result[_label_str(key)] = {
+                    "count": count,
+                    "sum": total,
+                    "p50": self._quantile(counts, count, 0.5),
+                    "p95": self._quantile(counts, count, 0.95),
+                    "p99": self._quantile(counts, count, 0.99),
+                }
+            return result
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    le = 'le="%s"' % bound
+                    lines.append(f"{self.name}_bucket{_prometheus_labels(key, le)} {cumulative}")
+                lines.append(f"{self.name}_bucket{_prometheus_labels(key, _INF_LABEL)} {count}")
+                lines.append(f"{self.name}_sum{_prometheus_labels(key)} {total}")
+                lines.append(f"{self.name}_count{_prometheus_labels(key)} {count}")
+        return lines
+
+    @contextmanager
+    def time(self, **labels):
+        """with histogram.time(op="upload"): ... 記錄區塊執行的秒數 (發生例外也會記錄)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _quantile(self, counts: list, count: int, q: float) -> Optional[float]:
+        """以區間上限估計分位數 (落在 +Inf 的就回傳 None)"""
+        if not count:
+            return None
+        rank = q * count
+        seen = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            seen += bucket_count
+            if seen >= rank:
+                return bound
+        return None
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, description: str = "") -> Counter:
+        return self._get_or_create(name, lambda: Counter(name, description))
+
+    def gauge(self, name: str, description: str = "") -> Gauge:
+        return self._get_or_create(name, lambda: Gauge(name, description))
+
+    def histogram(self, name: str, description: str = "", buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(name, lambda: Histogram(name, description, buckets))
+
+    def callback_gauge(self, name: str, description: str, label: str, callback: Callable[[], Dict[str, float]]) -> CallbackGauge:
+        return self._get_or_create(name, lambda: CallbackGauge(name, description, label, callback))
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            metrics = dict(self._metrics)
+        return {name: metric.snapshot() for name, metric in sorted(metrics.items())}
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (0.0.4)"""
+        with self._lock:
+            metrics = dict(self._metrics)
+        lines = []
+        for _, metric in sorted(metrics.items()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def _get_or_create(self, name: str, factory):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = factory()
+            return self._metrics[name]
+
+
+# 整個 Process 共用
+registry = MetricsRegistry()
+
+
+# --- 內部用的 Metrics API ---
+# 設定 METRICS_TOKEN 後，需要帶 X-Metrics-Token Header 才能讀取
+router = APIRouter(tags=["Internal"])
+
+
+def _check_token(x_metrics_token: Optional[str]) -> None:
+    token = os.getenv("METRICS_TOKEN")
+    if token and x_metrics_token != token:
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+@router.get("/internal/metrics")
+def read_metrics(x_metrics_token: Optional[str] = Header(default=None)):
+    # JSON 格式 (含分位數估計)，方便直接用瀏覽器 / curl 查看
+    _check_token(x_metrics_token)
+    return registry.snapshot()
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def read_prometheus_metrics(x_metrics_token: Optional[str] = Header(default=None)):
+    # 給 Prometheus scrape 用
+    _check_token(x_metrics_token)
+    return PlainTextResponse(registry.render_prometheus(), media_type="text/plain; version=0.0.4")
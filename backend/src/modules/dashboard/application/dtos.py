@@ -0,0 +1,20 @@
+from typing import Dict
+
+from pydantic import BaseModel
+
+
+class ExchangeCounts(BaseModel):
+    # 依交換狀態 (pending / accepted / ...) 的數量
+    requester: Dict[str, int]  # 我提出的交換
+    owner: Dict[str, int]  # 別人向我提出的交換
+
+
+class UnreadMessages(BaseModel):
+    total: int
+    by_exchange: Dict[str, int]  # 只列出有未讀訊息的交換
+
+
+class SummaryResponse(BaseModel):
+    exchanges: ExchangeCounts
+    items: Dict[str, int]  # 依物品狀態 (AVAILABLE / TRADING / ...) 的數量
+    unread_messages: UnreadMessages
@@ -0,0 +1,59 @@
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ...exchanges.domain.entity import ExchangeStatus
+from ...exchanges.infrastructure.models import ExchangeReadStateModel
+from ...inventory.domain.entity import ItemStatus
+from ..infrastructure.models import UserCounterModel
+from .dtos import ExchangeCounts, SummaryResponse, UnreadMessages
+
+
+class DashboardService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_summary(self, user_id: str) -> SummaryResponse:
+        """
+        首頁摘要：兩個主鍵 / 索引查詢，不需要 COUNT 交換、物品與訊息。
+        沒有出現過的狀態補 0，前端不用判斷 key 是否存在。
+        """
+        exchanges = {
+            role: {status.value: 0 for status in ExchangeStatus}
+            for role in ("requester", "owner")
+        }
+        items = {status.value: 0 for status in ItemStatus}
+
+        rows = self.db.execute(
+            select(UserCounterModel.name, UserCounterModel.value).where(
+                UserCounterModel.user_id == user_id
+            )
+        )
+        for name, value in rows:
+            kind, _, rest = name.partition(".")
+            if kind == "exchange":
+                role, _, status = rest.partition(".")
+                if role in exchanges:
+                    exchanges[role][status] = value
+            elif kind == "item":
+                items[rest] = value
+
+        by_exchange = {
+            exchange_id: count
+            for exchange_id, count in self.db.execute(
+                select(
+                    ExchangeReadStateModel.exchange_id,
+                    ExchangeReadStateModel.unread_count,
+                ).where(
+                    ExchangeReadStateModel.user_id == user_id,
+                    ExchangeReadStateModel.unread_count > 0,
+                )
+            )
+        }
+
+        return SummaryResponse(
+            exchanges=ExchangeCounts(**exchanges),
+            items=items,
+            unread_messages=UnreadMessages(
+                total=sum(by_exchange.values()), by_exchange=by_exchange
+            ),
+        )
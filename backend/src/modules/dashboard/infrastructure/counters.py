@@ -0,0 +1,322 @@
+import argparse
+import logging
+from collections import Counter
+from itertools import chain
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, event, func, inspect, select, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from ....metrics import registry
+from ....upsert import upsert
+from ...exchanges.domain.entity import ExchangeStatus
+from ...exchanges.domain.events import (
+    ExchangeAccepted,
+    ExchangeCancelled,
+    ExchangeCompleted,
+    ExchangeCreated,
+    ExchangeRejected,
+)
+from ...exchanges.infrastructure.models import (
+    ExchangeModel,
+    ExchangeReadStateModel,
+    MessageModel,
+)
+from ...exchanges.infrastructure.outbox import on_record
+from ...iam.infrastructure.models import UserModel
+from ...inventory.domain.entity import ItemStatus
+from ...inventory.infrastructure.models import ItemModel
+from .models import UserCounterModel
+
+logger = logging.getLogger(__name__)
+
+user_counter_drift = registry.counter(
+    "user_counter_drift_total", "對帳時修正的計數器數量 (kind=counter / unread)"
+)
+
+# 一次對帳幾個使用者
+RECONCILE_BATCH_SIZE = 500
+
+_PENDING_KEY = "user_counter_deltas"
+
+
+def _value(status) -> str:
+    return status.value if hasattr(status, "value") else str(status)
+
+
+def exchange_counter(role: str, status) -> str:
+    """role: requester / owner，例如 exchange.owner.pending"""
+    return f"exchange.{role}.{_value(status)}"
+
+
+def item_counter(status) -> str:
+    return f"item.{_value(status)}"
+
+
+def add_counter(db: Session, user_id: str, name: str, delta: int) -> None:
+    """先記在 Session 上，commit 前一次寫入 (同一個 Transaction)"""
+    deltas = db.info.setdefault(_PENDING_KEY, Counter())
+    deltas[(user_id, name)] += delta
+
+
+# --- 交換：跟著 Domain Event 更新 ---
+
+
+def _move_exchange(
+    db: Session, event, from_status: Optional[str], to_status: str
+) -> None:
+    for role, user_id in (
+        ("requester", event.requester_id),
+        ("owner", event.owner_id),
+    ):
+        if from_status:
+            add_counter(db, user_id, exchange_counter(role, from_status), -1)
+        add_counter(db, user_id, exchange_counter(role, to_status), 1)
+
+
+def _on_created(db: Session, event: ExchangeCreated) -> None:
+    _move_exchange(db, event, None, ExchangeStatus.PENDING.value)
+
+
+def _on_accepted(db: Session, event: ExchangeAccepted) -> None:
+    _move_exchange(
+        db, event, ExchangeStatus.PENDING.value, ExchangeStatus.ACCEPTED.value
+    )
+
+
+def _on_rejected(db: Session, event: ExchangeRejected) -> None:
+    _move_exchange(db, event, event.from_status, ExchangeStatus.REJECTED.value)
+
+
+def _on_cancelled(db: Session, event: ExchangeCancelled) -> None:
+    from_status = (
+        ExchangeStatus.ACCEPTED if event.was_accepted else ExchangeStatus.PENDING
+    )
+    _move_exchange(db, event, from_status.value, ExchangeStatus.CANCELLED.value)
+
+
+def _on_completed(db: Session, event: ExchangeCompleted) -> None:
+    _move_exchange(
+        db, event, ExchangeStatus.ACCEPTED.value, ExchangeStatus.COMPLETED.value
+    )
+
+
+# --- 物品：由 Session hook 看 status 的變更 ---
+
+
+def _before_flush(session: Session, flush_context, instances) -> None:
+    for obj in session.new:
+        if isinstance(obj, ItemModel):
+            status = obj.status or ItemStatus.AVAILABLE
+            add_counter(session, obj.owner_id, item_counter(status), 1)
+
+    for obj in session.dirty:
+        if not isinstance(obj, ItemModel):
+            continue
+        history = inspect(obj).attrs.status.history
+        if not history.has_changes():
+            continue
+        for old in history.deleted:
+            if old is not None:
+                add_counter(session, obj.owner_id, item_counter(old), -1)
+        for new in history.added:
+            if new is not None:
+                add_counter(session, obj.owner_id, item_counter(new), 1)
+
+    for obj in session.deleted:
+        if isinstance(obj, ItemModel):
+            add_counter(session, obj.owner_id, item_counter(obj.status), -1)
+
+
+def _has_unflushed_items(session: Session) -> bool:
+    return any(
+        isinstance(obj, ItemModel)
+        for obj in chain(session.new, session.dirty, session.deleted)
+    )
+
+
+def _before_commit(session: Session) -> None:
+    # 沒有記錄到計數器變化、也沒有還沒送出的物品變更的 Session 直接略過
+    if _PENDING_KEY not in session.info and not _has_unflushed_items(session):
+        return
+    # 先 flush，讓還沒送出的物品變更也算進來
+    session.flush()
+    deltas = session.info.pop(_PENDING_KEY, None)
+    if not deltas:
+        return
+    # 固定順序寫入，兩個 Transaction 同時更新同一批計數器時不會互相 deadlock
+    for (user_id, name), delta in sorted(deltas.items()):
+        if delta == 0:
+            continue
+        upsert(
+            session,
+            UserCounterModel,
+            {"user_id": user_id, "name": name, "value": delta},
+            {"value": UserCounterModel.value + delta},
+        )
+
+
+def _after_soft_rollback(session: Session, previous_transaction) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+def install_counter_hooks() -> None:
+    """掛在 Session 類別與 Outbox 上，所有寫入 (包含 Script / Worker) 都會維護 user_counters"""
+    if event.contains(Session, "before_commit", _before_commit):
+        return
+    on_record(ExchangeCreated, _on_created)
+    on_record(ExchangeAccepted, _on_accepted)
+    on_record(ExchangeRejected, _on_rejected)
+    on_record(ExchangeCancelled, _on_cancelled)
+    on_record(ExchangeCompleted, _on_completed)
+    event.listen(Session, "before_flush", _before_flush)
+    event.listen(Session, "before_commit", _before_commit)
+    event.listen(Session, "after_soft_rollback", _after_soft_rollback)
+
+
+# --- 對帳 ---
+
+
+def _expected_counters(db: Session, user_ids: List[str]) -> Counter:
+    expected: Counter = Counter()
+    for role, column in (
+        ("requester", ExchangeModel.requester_id),
+        ("owner", ExchangeModel.owner_id),
+    ):
+        rows = db.execute(
+            select(column, ExchangeModel.status, func.count())
+            .where(column.in_(user_ids))
+            .group_by(column, ExchangeModel.status)
+        )
+        for user_id, status, count in rows:
+            expected[(user_id, exchange_counter(role, status))] = count
+
+    rows = db.execute(
+        select(ItemModel.owner_id, ItemModel.status, func.count())
+        .where(ItemModel.owner_id.in_(user_ids))
+        .group_by(ItemModel.owner_id, ItemModel.status)
+    )
+    for user_id, status, count in rows:
+        expected[(user_id, item_counter(status))] = count
+    return expected
+
+
+def _reconcile_counters(db: Session, user_ids: List[str]) -> int:
+    expected = _expected_counters(db, user_ids)
+    actual: Dict[Tuple[str, str], int] = {
+        (row.user_id, row.name): row.value
+        for row in db.execute(
+            select(
+                UserCounterModel.user_id,
+                UserCounterModel.name,
+                UserCounterModel.value,
+            ).where(UserCounterModel.user_id.in_(user_ids))
+        )
+    }
+
+    fixed = 0
+    for key in sorted(set(expected) | set(actual)):
+        value = expected.get(key, 0)
+        if actual.get(key, 0) == value:
+            continue
+        logger.warning(f"Counter drift {key}: {actual.get(key, 0)} -> {value}")
+        upsert(
+            db,
+            UserCounterModel,
+            {"user_id": key[0], "name": key[1], "value": value},
+            {"value": value},
+        )
+        fixed += 1
+    return fixed
+
+
+def _reconcile_unread(db: Session, user_ids: List[str]) -> int:
+    # 未讀數 = 已讀位置之後、不是自己送出的訊息
+    state = ExchangeReadStateModel
+    rows = db.execute(
+        select(
+            state.exchange_id,
+            state.user_id,
+            state.unread_count,
+            func.count(MessageModel.id),
+        )
+        .outerjoin(
+            MessageModel,
+            and_(
+                MessageModel.exchange_id == state.exchange_id,
+                MessageModel.id > func.coalesce(state.last_read_message_id, 0),
+                MessageModel.sender_id != state.user_id,
+            ),
+        )
+        .where(state.user_id.in_(user_ids))
+        .group_by(state.exchange_id, state.user_id, state.unread_count)
+    )
+
+    fixed = 0
+    for exchange_id, user_id, stored, count in rows:
+        if stored == count:
+            continue
+        logger.warning(f"Unread drift ({user_id}, {exchange_id}): {stored} -> {count}")
+        db.execute(
+            update(state)
+            .where(state.exchange_id == exchange_id, state.user_id == user_id)
+            .values(unread_count=count)
+        )
+        fixed += 1
+    return fixed
+
+
+def reconcile_user_counters(
+    session_factory: sessionmaker, batch_size: int = RECONCILE_BATCH_SIZE
+) -> Dict[str, int]:
+    """
+    由來源資料表重算計數器與未讀數，修正不一致的值 (第一次部署後、之後定期執行)。
+    依使用者 id 分批，每批各自 commit，中途中斷可以直接重跑。
+    對帳期間剛好發生的狀態變更可能被蓋掉，下一次執行會再修正。
+    """
+    result = {"users": 0, "counters": 0, "unread": 0}
+    last_id = ""
+    while True:
+        db = session_factory()
+        try:
+            user_ids: List[str] = list(
+                db.scalars(
+                    select(UserModel.id)
+                    .where(UserModel.id > last_id)
+                    .order_by(UserModel.id)
+                    .limit(batch_size)
+                )
+            )
+            if not user_ids:
+                return result
+            counters = _reconcile_counters(db, user_ids)
+            unread = _reconcile_unread(db, user_ids)
+            db.commit()
+        finally:
+            db.close()
+
+        user_counter_drift.inc(counters, kind="counter")
+        user_counter_drift.inc(unread, kind="unread")
+        result["users"] += len(user_ids)
+        result["counters"] += counters
+        result["unread"] += unread
+        last_id = user_ids[-1]
+        logger.info(f"Reconciled {result['users']} users")
+
+
+if __name__ == "__main__":
+    # python -m src.modules.dashboard.infrastructure.counters [--batch-size 500]
+    from ....database import SessionLocal
+
+    parser = argparse.ArgumentParser(
+        description="Reconcile user_counters and unread message counts"
+    )
+    parser.add_argument("--batch-size", type=int, default=RECONCILE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    result = reconcile_user_counters(SessionLocal, args.batch_size)
+    logger.info(
+        f"Reconciled {result['users']} users: fixed {result['counters']} counters, "
+        f"{result['unread']} unread counts"
+    )
@@ -0,0 +1,19 @@
+from sqlalchemy import ForeignKey, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ...iam.infrastructure.models import Base
+
+
+class UserCounterModel(Base):
+    """
+    每個使用者的計數器 (首頁摘要用)，例如 exchange.owner.pending、item.AVAILABLE。
+    狀態變更時在同一個 Transaction 加減 (counters.py)，不需要每次 COUNT(*)。
+    """
+
+    __tablename__ = "user_counters"
+
+    user_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("users.id"), primary_key=True
+    )
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    value: Mapped[int] = mapped_column(Integer, default=0)
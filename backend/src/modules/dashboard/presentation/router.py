@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from ....database import get_routed_db
+from ...iam.dependencies import get_current_user
+from ...iam.domain.entity import User
+from ..application.dtos import SummaryResponse
+from ..application.service import DashboardService
+
+router = APIRouter(tags=["Dashboard"])
+
+
+def get_dashboard_service(db: Session = Depends(get_routed_db)) -> DashboardService:
+    return DashboardService(db)
+
+
+@router.get("/me/summary", response_model=SummaryResponse)
+def get_summary(
+    current_user: User = Depends(get_current_user),
+    service: DashboardService = Depends(get_dashboard_service),
+):
+    """我的交換 / 物品各狀態數量與未讀訊息數 (由 user_counters 計數器直接讀出)"""
+    return service.get_summary(current_user.id)
@@ -0,0 +1,46 @@
+from typing import AsyncIterator, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ....pagination import STREAM_BATCH_SIZE, Page, decode_cursor, to_page
+from .service import exchange_list_query
+
+
+class AsyncExchangeQueryService:
+    """
+    ExchangeService 查詢路徑的 async 版本 (搭配 AsyncSession / aiomysql)。
+    寫入 (狀態變更) 仍走同步的 ExchangeService。
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_exchanges(
+        self,
+        user_id: str,
+        role: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> Page[dict]:
+        after = decode_cursor(cursor) if cursor else None
+        stmt, to_row = exchange_list_query(user_id, role, after)
+
+        # 沒給 limit 時維持舊行為 (一次回傳全部)
+        if not limit:
+            rows = (await self.db.execute(stmt)).all()
+            return Page(items=[to_row(row) for row in rows])
+
+        # 多查一筆，用來判斷有沒有下一頁
+        rows = (await self.db.execute(stmt.limit(limit + 1))).all()
+        page = to_page(rows, limit, lambda row: (row.created_at, row.exchange_id))
+        page.items = [to_row(row) for row in page.items]
+        return page
+
+    async def iter_exchanges(self, user_id: str, role: str) -> AsyncIterator[dict]:
+        # stream 會啟用 Server-side cursor，分批從 DB 取資料
+        stmt, to_row = exchange_list_query(user_id, role)
+        result = await self.db.stream(
+            stmt.execution_options(yield_per=STREAM_BATCH_SIZE)
+        )
+        async for row in result:
+            yield to_row(row)
@@ -90,6 +90,11 @@ class MessageResponse(BaseModel):
         from_attributes = True
 
 
+class MarkReadResponse(BaseModel):
+    exchange_id: str
+    last_read_message_id: Optional[int] = None
+
+
 class UpdateLocationRequest(BaseModel):
     meetup_location_id: int
 
@@ -0,0 +1,7 @@
+from typing import Protocol
+
+
+class ChatPublisher(Protocol):
+    def publish_message(self, exchange_id: str, message: dict) -> None:
+        """把新訊息推送給正在看這筆交換的連線 (message 需可以轉成 JSON)"""
+        ...
@@ -1,199 +1,275 @@
 import uuid
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional
 
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
-
-from ...inventory.domain.entity import ItemStatus
+from sqlalchemy import and_, case, func, or_, select, update
+from sqlalchemy.orm import Session, aliased, joinedload
+
+from ....pagination import (
+    STREAM_BATCH_SIZE,
+    Page,
+    apply_keyset,
+    decode_cursor,
+    to_page,
+)
+from ....unit_of_work import UnitOfWork
+from ....upsert import upsert
+from ...iam.infrastructure.models import UserModel
+from ...inventory.domain.entity import Item, ItemStatus
 
 # 假設你需要存取 Items 來檢查擁有權或更新狀態
 from ...inventory.domain.repository import ItemRepository
+from ...inventory.infrastructure.models import ItemModel
 
 # 引入相關 Entity 與 Repository
 from ..domain.entity import Exchange, ExchangeStatus
+from ..domain.events import (
+    ExchangeAccepted,
+    ExchangeCancelled,
+    ExchangeCompleted,
+    ExchangeConfirmationChanged,
+    ExchangeCreated,
+    ExchangeLocationChanged,
+    ExchangeRejected,
+)
+from ..domain.locations import LOCATIONS
 from ..domain.repository import ExchangeRepository
 
 # 為了組裝回應，這裡我們可能需要直接存取 DB Model 或是使用各模組的 Repository
 # 為了簡化範例，這裡假設 Service 可以存取 DB Session 做關聯查詢 (更進階做法是透過 ReadModel)
-from ..infrastructure.models import ExchangeModel, MessageModel
+from ..infrastructure.models import (
+    ExchangeModel,
+    ExchangeReadStateModel,
+    ExchangeViewModel,
+    MessageModel,
+)
+from ..infrastructure.outbox import record_event
+from ..infrastructure.read_model import (
+    EXCHANGE_READ_MODEL_ENABLED,
+    build_exchange_document,
+    exchange_view_statement,
+    list_row,
+)
 from .dtos import (
     CreateExchangeRequest,
     ExchangeDetailResponse,
+    MessageResponse,
     UpdateExchangeStatusRequest,
 )
+from .interfaces import ChatPublisher
+
+
+def exchange_list_statement(user_id: str, role: str):
+    """
+    交換列表的查詢 (同步 / async 版共用)。
+    以單一查詢一次 Join 出 Partner / Target / Offered，直接投影成列表需要的欄位
+    (避免每筆交換再呼叫 _enrich_exchange_data 造成 N+1 查詢)
+    """
+    Partner = aliased(UserModel)
+    Target = aliased(ItemModel)
+    Offered = aliased(ItemModel)
+
+    if role == "requester":
+        # 我是申請者，Partner 就是物品主人 (owner)
+        user_column, partner_column = ExchangeModel.requester_id, ExchangeModel.owner_id
+    else:
+        # 我是物品主人，Partner 就是申請者 (requester)
+        user_column, partner_column = ExchangeModel.owner_id, ExchangeModel.requester_id
+
+    return (
+        select(
+            ExchangeModel.id.label("exchange_id"),
+            ExchangeModel.status,
+            ExchangeModel.created_at,
+            Partner.id.label("partner_id"),
+            Partner.name.label("partner_name"),
+            Partner.avatar_url.label("partner_avatar_url"),
+            Target.id.label("target_item_id"),
+            Target.title.label("target_title"),
+            Offered.id.label("offered_item_id"),
+            Offered.title.label("offered_title"),
+        )
+        .join(Partner, Partner.id == partner_column)
+        .join(Target, Target.id == ExchangeModel.target_item_id)
+        .outerjoin(Offered, Offered.id == ExchangeModel.offered_item_id)
+        .where(user_column == user_id)
+    )
+
+
+def exchange_list_query(user_id: str, role: str, after=None):
+    """
+    交換列表的查詢與每一列的轉換函式 (同步 / async 版共用)。
+    啟用 Read Model 時只讀 exchange_views 一張表；否則用上面的 Join 查詢。
+    """
+    if EXCHANGE_READ_MODEL_ENABLED:
+        stmt = apply_keyset(
+            exchange_view_statement(user_id, role),
+            ExchangeViewModel.created_at,
+            ExchangeViewModel.exchange_id,
+            after,
+        )
+        return stmt, lambda row: list_row(row.document, role)
 
-# 地點清單 (暫時寫死，也可以存資料庫)
-LOCATIONS = {
-    1: {"name": "男3舍", "address": "宿舍"},
-    2: {"name": "男4舍", "address": "宿舍"},
-    3: {"name": "男6、7舍", "address": "宿舍"},
-    4: {"name": "男8舍", "address": "宿舍"},
-    5: {"name": "男9A", "address": "宿舍"},
-    6: {"name": "男9B", "address": "宿舍"},
-    7: {"name": "男11舍", "address": "宿舍"},
-    8: {"name": "男12舍", "address": "宿舍"},
-    9: {"name": "男13舍", "address": "宿舍"},
-    10: {"name": "女1-4舍", "address": "宿舍"},
-    11: {"name": "女14舍", "address": "宿舍"},
-    12: {"name": "國際學舍", "address": "宿舍"},
-    13: {"name": "曦望居", "address": "宿舍"},
-    14: {"name": "中大會館", "address": "宿舍"},
-    15: {"name": "工一", "address": "系館"},
-    16: {"name": "工二", "address": "系館"},
-    17: {"name": "工三", "address": "系館"},
-    18: {"name": "工四", "address": "系館"},
-    19: {"name": "工五", "address": "系館"},
-    20: {"name": "文一", "address": "系館"},
-    21: {"name": "文二", "address": "系館"},
-    22: {"name": "科一", "address": "系館"},
-    23: {"name": "科二", "address": "系館"},
-    24: {"name": "科三", "address": "系館"},
-    25: {"name": "科四", "address": "系館"},
-    26: {"name": "科五", "address": "系館"},
-    27: {"name": "志希館", "address": "系館"},
-    28: {"name": "鴻經管", "address": "系館"},
-    29: {"name": "綜教館", "address": "系館"},
-    30: {"name": "管理二館", "address": "系館"},
-    31: {"name": "松果餐廳", "address": "餐廳"},
-    32: {"name": "松苑餐廳", "address": "餐廳"},
-    33: {"name": "iHouse", "address": "其他"},
-    34: {"name": "藍屋", "address": "其他"},
-    35: {"name": "行政大樓", "address": "其他"},
-    36: {"name": "大禮堂", "address": "其他"},
-    37: {"name": "大講堂", "address": "其他"},
-    38: {"name": "校內郵局", "address": "其他"},
-    39: {"name": "據德樓", "address": "其他"},
-    40: {"name": "遊藝館", "address": "其他"},
-    41: {"name": "中大湖", "address": "其他"},
-    42: {"name": "游泳池", "address": "其他"},
-    43: {"name": "國民運動中心", "address": "其他"},
-    44: {"name": "訊息討論", "address": "其他"},
-    45: {"name": "後門門口", "address": "後門"},
-    46: {"name": "7-11", "address": "後門"},
-    47: {"name": "全家", "address": "後門"},
-    48: {"name": "232巷（緣舍）", "address": "後門"},
-    49: {"name": "永安居", "address": "後門"},
-    50: {"name": "萊姆斯", "address": "後門"},
-    51: {"name": "麥可小姐", "address": "後門"},
-    52: {"name": "阿米玲", "address": "後門"},
-    53: {"name": "食間巷內", "address": "後門"},
-    54: {"name": "宵夜街口", "address": "宵夜街"},
-    55: {"name": "sidewalk 人行道", "address": "宵夜街"},
-    56: {"name": "宵夜街下面", "address": "宵夜街"},
-}
+    stmt = apply_keyset(
+        exchange_list_statement(user_id, role),
+        ExchangeModel.created_at,
+        ExchangeModel.id,
+        after,
+    )
+    return stmt, ExchangeService._to_list_row
 
 
 class ExchangeService:
     def __init__(
-        self, repo: ExchangeRepository, item_repo: ItemRepository, db: Session
+        self,
+        repo: ExchangeRepository,
+        item_repo: ItemRepository,
+        db: Session,
+        publisher: Optional[ChatPublisher] = None,
     ):
         self.repo = repo
         self.item_repo = item_repo
         self.db = db
+        # 即時推送新訊息 (WebSocket)，沒有設定就只存 DB
+        self.publisher = publisher
 
     def create_exchange(
         self, requester_id: str, target_item_id: str, dto: "CreateExchangeRequest"
     ) -> Exchange:
-        # 1. 檢查目標物品是否存在
-        target_item = self.item_repo.get_by_id(target_item_id)
-        if not target_item:
-            raise HTTPException(status_code=404, detail="Target item not found")
-
-        # 檢查目標物品狀態
-        if target_item.status != ItemStatus.AVAILABLE:
-            raise HTTPException(status_code=400, detail="Target item is not available")
-
-        if target_item.owner_id == requester_id:
-            raise HTTPException(status_code=400, detail="Cannot exchange with yourself")
-
-        # 2. 如果有提供交換物，檢查是否屬於該使用者
-        if dto.offered_item_id:
-            offered_item = self.item_repo.get_by_id(dto.offered_item_id)
-            if not offered_item or offered_item.owner_id != requester_id:
-                raise HTTPException(status_code=400, detail="Invalid offered item")
-
-            # 檢查提供物品狀態
-            if offered_item.status != ItemStatus.AVAILABLE:
+        # 可用性檢查要看 DB 的最新值：在 UnitOfWork 裡 get_by_id 不經過快取，
+        # 檢查、交換與事件也在同一個 Transaction 寫入
+        with UnitOfWork(self.db):
+            # 1. 檢查目標物品是否存在
+            target_item = self.item_repo.get_by_id(target_item_id)
+            if not target_item:
+                raise HTTPException(status_code=404, detail="Target item not found")
+
+            # 檢查目標物品狀態
+            if target_item.status != ItemStatus.AVAILABLE:
                 raise HTTPException(
-                    status_code=400, detail="Offered item is not available"
+                    status_code=400, detail="Target item is not available"
                 )
 
-        # 同一人 (requester) 對同一物 (target) 用同一交換物 (offered) 且還在 PENDING 狀態
-        duplicate_query = self.db.query(ExchangeModel).filter(
-            ExchangeModel.requester_id == requester_id,
-            ExchangeModel.target_item_id == target_item_id,
-            ExchangeModel.status == ExchangeStatus.PENDING,
-        )
+            if target_item.owner_id == requester_id:
+                raise HTTPException(
+                    status_code=400, detail="Cannot exchange with yourself"
+                )
 
-        # 分開處理 offered_item_id 為 None (純索取) 的狀況
-        if dto.offered_item_id:
-            duplicate_query = duplicate_query.filter(
-                ExchangeModel.offered_item_id == dto.offered_item_id
-            )
-        else:
-            duplicate_query = duplicate_query.filter(
-                ExchangeModel.offered_item_id == None
-            )
+            # 2. 如果有提供交換物，檢查是否屬於該使用者
+            if dto.offered_item_id:
+                offered_item = self.item_repo.get_by_id(dto.offered_item_id)
+                if not offered_item or offered_item.owner_id != requester_id:
+                    raise HTTPException(status_code=400, detail="Invalid offered item")
+
+                # 檢查提供物品狀態
+                if offered_item.status != ItemStatus.AVAILABLE:
+                    raise HTTPException(
+                        status_code=400, detail="Offered item is not available"
+                    )
 
-        if duplicate_query.first():
-            raise HTTPException(
-                status_code=400,
-                detail="您已送出過相同的交換請求 (You already have a pending request with this item).",
+            # 同一人 (requester) 對同一物 (target) 用同一交換物 (offered) 且還在 PENDING 狀態
+            duplicate_query = self.db.query(ExchangeModel).filter(
+                ExchangeModel.requester_id == requester_id,
+                ExchangeModel.target_item_id == target_item_id,
+                ExchangeModel.status == ExchangeStatus.PENDING,
             )
 
-        # 3. 建立交換請求
-        new_exchange = Exchange(
-            id=str(uuid.uuid4()),
-            requester_id=requester_id,
-            owner_id=target_item.owner_id,
-            target_item_id=target_item_id,
-            offered_item_id=dto.offered_item_id,
-            status=ExchangeStatus.PENDING,
-            message=dto.message,
-        )
-        return self.repo.save(new_exchange)
-
-    def get_exchanges(self, user_id: str, role: str):
-        # 1. 取得原始資料
-        exchanges = self.repo.find_by_user(user_id, role)
-
-        results = []
-        for e in exchanges:
-            # 為了效率，這裡建議一樣做個簡單的查詢或重用 _enrich 邏輯
-            # 這裡我們先用最簡單的方式：重用 _enrich 取得完整資料，再轉成前端要的格式
-            full_data = self._enrich_exchange_data(e.id)
-
-            # 2. 判斷誰是 Partner
-            if role == "requester":
-                # 我是申請者，Partner 就是物品主人 (owner)
-                partner_info = {
-                    "id": full_data["owner"]["user_id"],
-                    "name": full_data["owner"]["nickname"],  # 前端用 .name
-                    "avatar_url": full_data["owner"]["avatar_url"],
-                }
+            # 分開處理 offered_item_id 為 None (純索取) 的狀況
+            if dto.offered_item_id:
+                duplicate_query = duplicate_query.filter(
+                    ExchangeModel.offered_item_id == dto.offered_item_id
+                )
             else:
-                # 我是物品主人，Partner 就是申請者 (requester)
-                partner_info = {
-                    "id": full_data["requester"]["user_id"],
-                    "name": full_data["requester"]["nickname"],  # 前端用 .name
-                    "avatar_url": full_data["requester"]["avatar_url"],
-                }
-
-            # 3. 組裝成前端 ProfileView 預期的格式
-            results.append(
-                {
-                    "exchange_id": full_data["id"],  # 前端要 exchange_id
-                    "status": full_data["status"],
-                    "partner": partner_info,  # 前端要 partner
-                    "target_item": full_data["target_item"],
-                    "offered_item": full_data["offered_item"],
-                }
-            )
+                duplicate_query = duplicate_query.filter(
+                    ExchangeModel.offered_item_id == None
+                )
+
+            if duplicate_query.first():
+                raise HTTPException(
+                    status_code=400,
+                    detail="您已送出過相同的交換請求 (You already have a pending request with this item).",
+                )
 
-        return results
+            # 3. 建立交換請求 (created_at, id 是列表分頁的 Keyset，一定要是建立當下的時間)
+            now = datetime.now()
+            new_exchange = Exchange(
+                id=str(uuid.uuid4()),
+                requester_id=requester_id,
+                owner_id=target_item.owner_id,
+                target_item_id=target_item_id,
+                offered_item_id=dto.offered_item_id,
+                status=ExchangeStatus.PENDING,
+                message=dto.message,
+                created_at=now,
+                updated_at=now,
+            )
+            saved = self.repo.save(new_exchange)
+            record_event(
+                self.db,
+                ExchangeCreated(
+                    exchange_id=saved.id,
+                    requester_id=saved.requester_id,
+                    owner_id=saved.owner_id,
+                    target_item_id=saved.target_item_id,
+                    offered_item_id=saved.offered_item_id,
+                ),
+            )
+        return saved
+
+    def get_exchanges(
+        self,
+        user_id: str,
+        role: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> Page[dict]:
+        after = decode_cursor(cursor) if cursor else None
+        stmt, to_row = exchange_list_query(user_id, role, after)
+
+        # 沒給 limit 時維持舊行為 (一次回傳全部)
+        if not limit:
+            rows = self.db.execute(stmt).all()
+            return Page(items=[to_row(row) for row in rows])
+
+        # 多查一筆，用來判斷有沒有下一頁
+        rows = self.db.execute(stmt.limit(limit + 1)).all()
+        page = to_page(rows, limit, lambda row: (row.created_at, row.exchange_id))
+        page.items = [to_row(row) for row in page.items]
+        return page
+
+    def iter_exchanges(self, user_id: str, role: str) -> Iterator[dict]:
+        # yield_per 會啟用 Server-side cursor，分批從 DB 取資料
+        stmt, to_row = exchange_list_query(user_id, role)
+        stmt = stmt.execution_options(yield_per=STREAM_BATCH_SIZE)
+        for row in self.db.execute(stmt):
+            yield to_row(row)
+
+    @staticmethod
+    def _to_list_row(row) -> dict:
+        # 組裝成前端 ProfileView 預期的格式
+        return {
+            "exchange_id": row.exchange_id,  # 前端要 exchange_id
+            "status": row.status,
+            "partner": {  # 前端要 partner
+                "id": row.partner_id,
+                "name": row.partner_name,  # 前端用 .name
+                "avatar_url": row.partner_avatar_url,
+            },
+            "target_item": {"item_id": row.target_item_id, "title": row.target_title},
+            "offered_item": (
+                {"item_id": row.offered_item_id, "title": row.offered_title}
+                if row.offered_item_id
+                else None
+            ),
+        }
 
     def get_exchange_detail(self, exchange_id: str) -> "ExchangeDetailResponse":
+        # Read Model: 以主鍵讀一列就是完整的回應 (還沒投影過的才退回 Join 查詢)
+        if EXCHANGE_READ_MODEL_ENABLED:
+            view = self.db.get(ExchangeViewModel, exchange_id)
+            if view is not None:
+                return view.document
         return self._enrich_exchange_data(exchange_id)
 
     def update_status(
@@ -206,243 +282,295 @@ class ExchangeService:
         if exchange.owner_id != user_id:
             raise HTTPException(status_code=403, detail="Permission denied")
 
-        if dto.action == "accept":
-            # --- [Step 1] 先做所有檢查 (Check Phase) ---
-
-            # 1. 檢查我的物品 (Target)
-            target = self.item_repo.get_by_id(exchange.target_item_id)
-            if target.status != ItemStatus.AVAILABLE:
-                raise HTTPException(
-                    status_code=400, detail="Item is no longer available"
+        # 整個操作在同一個 Transaction 內完成 (只 commit 一次，失敗就全部 rollback)
+        with UnitOfWork(self.db):
+            if dto.action == "accept":
+                # --- [Step 0] 鎖住相關物品與這筆交換 ---
+                # 同時有兩個人接受同一個物品的請求時，後來的會在這裡等前一個 commit，
+                # 之後讀到的是 TRADING，就不會兩筆都成交
+                items = self._lock_items(
+                    exchange.target_item_id, exchange.offered_item_id
                 )
+                exchange = self.repo.get_by_id_for_update(exchange_id)
+                if exchange.status != ExchangeStatus.PENDING:
+                    raise HTTPException(
+                        status_code=400, detail="Exchange is no longer pending"
+                    )
+
+                # --- [Step 1] 先做所有檢查 (Check Phase) ---
 
-            # 2. 檢查對方的物品 (Offered) - 這裡只檢查，先不存檔
-            offered = None
-            if exchange.offered_item_id:
-                offered = self.item_repo.get_by_id(exchange.offered_item_id)
-                # 若找不到物品或狀態不對，直接報錯，這時還沒修改 target，所以很安全
+                # 1. 檢查我的物品 (Target)
+                target = items.get(exchange.target_item_id)
+                if not target or target.status != ItemStatus.AVAILABLE:
+                    raise HTTPException(
+                        status_code=400, detail="Item is no longer available"
+                    )
+
+                # 2. 檢查對方的物品 (Offered) - 這裡只檢查，先不存檔
+                offered = items.get(exchange.offered_item_id)
+                # 若找不到物品或狀態不對，直接報錯，整個 Transaction 會 rollback
                 if offered and offered.status != ItemStatus.AVAILABLE:
                     raise HTTPException(
                         status_code=400,
                         detail="對方提供的物品已不再可用 (Offered item is no longer available)",
                     )
 
-            # --- [Step 2] 檢查全部通過，才執行狀態更新 (Update Phase) ---
-
-            # 更新 Exchange
-            exchange.status = ExchangeStatus.ACCEPTED
+                # --- [Step 2] 檢查全部通過，才執行狀態更新 (Update Phase) ---
+
+                # 更新 Exchange
+                exchange.status = ExchangeStatus.ACCEPTED
+                # 先記錄成交，自動拒絕其他請求的事件排在它之後
+                record_event(
+                    self.db,
+                    ExchangeAccepted(
+                        exchange_id=exchange.id,
+                        requester_id=exchange.requester_id,
+                        owner_id=exchange.owner_id,
+                        target_item_id=exchange.target_item_id,
+                        offered_item_id=exchange.offered_item_id,
+                    ),
+                )
 
-            # 更新 Target Item
-            target.status = ItemStatus.TRADING
-            self.item_repo.save(target)
+                # 更新 Target Item
+                target.status = ItemStatus.TRADING
+                self.item_repo.save(target)
 
-            # 更新 Offered Item (如果有)
-            if offered:
-                offered.status = ItemStatus.TRADING
-                self.item_repo.save(offered)
-                self._reject_related_requests_for_offered_item(
-                    exchange.offered_item_id, exchange_id
-                )
+                # 更新 Offered Item (如果有)
+                if offered:
+                    offered.status = ItemStatus.TRADING
+                    self.item_repo.save(offered)
+                    self._reject_related_requests_for_offered_item(
+                        exchange.offered_item_id, exchange_id
+                    )
 
-            # 拒絕其他請求
-            self._reject_other_requests(exchange.target_item_id, exchange_id)
+                # 拒絕其他請求
+                self._reject_other_requests(exchange.target_item_id, exchange_id)
 
-        elif dto.action == "reject":
-            exchange.status = ExchangeStatus.REJECTED
+            elif dto.action == "reject":
+                # 與接受相同：上鎖後重新檢查，已成交 / 取消 / 拒絕的交換不可以再拒絕
+                exchange = self.repo.get_by_id_for_update(exchange_id)
+                if exchange.status != ExchangeStatus.PENDING:
+                    raise HTTPException(
+                        status_code=400, detail="Exchange is no longer pending"
+                    )
+                from_status = exchange.status
+                exchange.status = ExchangeStatus.REJECTED
+                record_event(
+                    self.db,
+                    ExchangeRejected(
+                        exchange_id=exchange.id,
+                        requester_id=exchange.requester_id,
+                        owner_id=exchange.owner_id,
+                        from_status=from_status.value,
+                    ),
+                )
 
-        exchange.updated_at = datetime.now()
-        self.repo.save(exchange)
+            exchange.updated_at = datetime.now()
+            self.repo.save(exchange)
         return self._enrich_exchange_data(exchange_id)
 
-    def _reject_other_requests(self, target_item_id: str, current_exchange_id: str):
+    def _lock_items(self, *item_ids: Optional[str]) -> Dict[str, Item]:
         """
-        找出所有 target_item_id 相同，且狀態為 PENDING 的其他交換請求，
-        將它們強制改為 REJECTED。
+        依 ID 排序後逐一 SELECT ... FOR UPDATE。
+        每個 Transaction 都用相同順序上鎖，才不會互相等待造成 deadlock。
+        (物品要比交換先鎖，因為拒絕其他請求時會 UPDATE 別人的交換)
+        """
+        items = {}
+        for item_id in sorted({i for i in item_ids if i}):
+            item = self.item_repo.get_by_id_for_update(item_id)
+            if item:
+                items[item_id] = item
+        return items
+
+    def _get_exchange_model_for_update(
+        self, user_id: str, exchange_id: str
+    ) -> ExchangeModel:
+        """
+        先找出交換涉及的物品並上鎖，再鎖住交換本身 (順序同 update_status)。
+        上鎖前先確認是交換的雙方 (不上鎖讀取)，不相干的請求不會佔住物品的 row lock。
         """
-        # 這裡直接使用 DB Session 進行批量更新比較快
-        # 邏輯：UPDATE exchanges SET status='rejected' WHERE target_item_id=... AND id != ... AND status='pending'
+        exchange = self.repo.get_by_id(exchange_id)
+        if not exchange:
+            raise HTTPException(status_code=404, detail="Exchange not found")
 
-        # 查詢
-        others = (
+        # 交換的雙方建立後不會再變，不需要等上鎖後再檢查
+        if user_id not in (exchange.requester_id, exchange.owner_id):
+            raise HTTPException(status_code=403, detail="Permission denied")
+
+        self._lock_items(exchange.target_item_id, exchange.offered_item_id)
+        return (
             self.db.query(ExchangeModel)
-            .filter(
+            .filter(ExchangeModel.id == exchange_id)
+            .with_for_update()
+            .populate_existing()
+            .one()
+        )
+
+    def _reject_other_requests(
+        self, target_item_id: str, current_exchange_id: str
+    ) -> List[str]:
+        """
+        找出所有 target_item_id 相同，且狀態為 PENDING 的其他交換請求，
+        將它們強制改為 REJECTED。回傳被拒絕的交換 ID。
+        """
+        return self._bulk_reject(
+            [
                 ExchangeModel.target_item_id == target_item_id,
                 ExchangeModel.id != current_exchange_id,
+            ],
+            " (系統自動備註: 因物品已與他人成交，系統自動取消此請求)",
+        )
+
+    def _bulk_reject(self, conditions: list, note: str) -> List[str]:
+        """
+        一次 UPDATE 拒絕所有符合條件的 PENDING 請求，並在 message 後面加上備註。
+        UPDATE exchanges SET status='REJECTED', message=CONCAT(message, :note), ...
+        WHERE id IN (...) AND status='PENDING'
+        (不把每一筆載入 Session 再逐筆修改，請求很多時 flush 會很慢)
+        """
+        # MySQL 的 UPDATE 沒有 RETURNING，所以先查出 ID (之後通知用)。
+        # 查詢時就上鎖 (依 ID 排序)，查到 UPDATE 之間別人改不了狀態，
+        # UPDATE 改到的剛好是這些列，事件與 read model 才不會多記被取消 / 已處理的請求
+        rows = self.db.execute(
+            select(ExchangeModel.id, ExchangeModel.requester_id, ExchangeModel.owner_id)
+            .where(*conditions, ExchangeModel.status == ExchangeStatus.PENDING)
+            .order_by(ExchangeModel.id)
+            .with_for_update()
+        ).all()
+        if not rows:
+            return []
+        ids = [row.id for row in rows]
+
+        result = self.db.execute(
+            update(ExchangeModel)
+            .where(
+                ExchangeModel.id.in_(ids),
                 ExchangeModel.status == ExchangeStatus.PENDING,
             )
-            .all()
+            .values(
+                status=ExchangeStatus.REJECTED,
+                message=case(
+                    (
+                        or_(
+                            ExchangeModel.message.is_(None), ExchangeModel.message == ""
+                        ),
+                        note.strip(),
+                    ),
+                    else_=ExchangeModel.message + note,
+                ),
+                updated_at=datetime.now(),
+            )
+            .execution_options(synchronize_session=False)
         )
-
-        # 更新
-        for other in others:
-            other.status = ExchangeStatus.REJECTED
-            note = " (系統自動備註: 因物品已與他人成交，系統自動取消此請求)"
-            if other.message:
-                other.message += note
-            else:
-                other.message = note.strip()
-
-            other.updated_at = datetime.now()
-            self.db.add(other)
+        if result.rowcount != len(ids):
+            # 上了鎖還是對不上 (不應該發生)：整個 Transaction rollback，不記下不正確的事件
+            raise RuntimeError(
+                f"Expected to reject {len(ids)} exchanges, updated {result.rowcount}"
+            )
+        for row in rows:
+            record_event(
+                self.db,
+                ExchangeRejected(
+                    exchange_id=row.id,
+                    requester_id=row.requester_id,
+                    owner_id=row.owner_id,
+                    auto=True,
+                ),
+            )
+        return ids
 
     def cancel_exchange(self, user_id: str, exchange_id: str):
-        exchange_model = (
-            self.db.query(ExchangeModel).filter(ExchangeModel.id == exchange_id).first()
-        )
-        if not exchange_model:
-            raise HTTPException(status_code=404, detail="Exchange not found")
+        with UnitOfWork(self.db):
+            exchange_model = self._get_exchange_model_for_update(user_id, exchange_id)
+
+            # 允許 PENDING 或 ACCEPTED 狀態取消
+            if exchange_model.status not in [
+                ExchangeStatus.PENDING,
+                ExchangeStatus.ACCEPTED,
+            ]:
+                raise HTTPException(
+                    status_code=400,
+                    detail="Cannot cancel completed or rejected exchanges",
+                )
 
-        if user_id not in [exchange_model.requester_id, exchange_model.owner_id]:
-            raise HTTPException(status_code=403, detail="Permission denied")
+            # 如果是 ACCEPTED (交易中) 狀態取消，需要還原物品狀態
+            was_accepted = exchange_model.status == ExchangeStatus.ACCEPTED
+            if was_accepted:
+                # 還原 target item
+                target = self.item_repo.get_by_id(exchange_model.target_item_id)
+                if target:
+                    target.status = ItemStatus.AVAILABLE
+                    self.item_repo.save(target)
 
-        # 允許 PENDING 或 ACCEPTED 狀態取消
-        if exchange_model.status not in [
-            ExchangeStatus.PENDING,
-            ExchangeStatus.ACCEPTED,
-        ]:
-            raise HTTPException(
-                status_code=400, detail="Cannot cancel completed or rejected exchanges"
+                # 還原 offered item (如果有)
+                if exchange_model.offered_item_id:
+                    offered = self.item_repo.get_by_id(exchange_model.offered_item_id)
+                    if offered:
+                        offered.status = ItemStatus.AVAILABLE
+                        self.item_repo.save(offered)
+
+            # 更新狀態
+            exchange_model.status = ExchangeStatus.CANCELLED
+            exchange_model.updated_at = datetime.now()
+            record_event(
+                self.db,
+                ExchangeCancelled(
+                    exchange_id=exchange_model.id,
+                    requester_id=exchange_model.requester_id,
+                    owner_id=exchange_model.owner_id,
+                    cancelled_by=user_id,
+                    was_accepted=was_accepted,
+                    target_item_id=exchange_model.target_item_id,
+                    offered_item_id=exchange_model.offered_item_id,
+                ),
             )
 
-        # 如果是 ACCEPTED (交易中) 狀態取消，需要還原物品狀態
-        if exchange_model.status == ExchangeStatus.ACCEPTED:
-            # 還原 target item
-            target = self.item_repo.get_by_id(exchange_model.target_item_id)
-            if target:
-                target.status = ItemStatus.AVAILABLE
-                self.item_repo.save(target)
-
-            # 還原 offered item (如果有)
-            if exchange_model.offered_item_id:
-                offered = self.item_repo.get_by_id(exchange_model.offered_item_id)
-                if offered:
-                    offered.status = ItemStatus.AVAILABLE
-                    self.item_repo.save(offered)
-
-        # 更新狀態
-        exchange_model.status = ExchangeStatus.CANCELLED
-        exchange_model.updated_at = datetime.now()
-        self.db.commit()
-
-        return self._enrich_exchange_data(exchange_id)
-
         return self._enrich_exchange_data(exchange_id)
 
     def _enrich_exchange_data(self, exchange_id: str):
         # 使用 SQLAlchemy Model 直接做 Join 查詢以取得 User 和 Item 資料
-        # 這樣比一個個用 Repository 查更有效率
+        # 這樣比一個個用 Repository 查更有效率 (joinedload 讓四個關聯在同一個查詢載入)
         model = (
-            self.db.query(ExchangeModel).filter(ExchangeModel.id == exchange_id).first()
+            self.db.query(ExchangeModel)
+            .options(
+                joinedload(ExchangeModel.requester),
+                joinedload(ExchangeModel.owner),
+                joinedload(ExchangeModel.target_item),
+                joinedload(ExchangeModel.offered_item),
+            )
+            .filter(ExchangeModel.id == exchange_id)
+            .first()
         )
         if not model:
             raise HTTPException(status_code=404, detail="Exchange not found")
 
-        # 組裝回應
-        deal_info = None
-        if (
-            model.status in [ExchangeStatus.ACCEPTED, ExchangeStatus.COMPLETED]
-            and model.meetup_location_id
-        ):
-            loc_data = LOCATIONS.get(model.meetup_location_id)
-            if loc_data:
-                loc_obj = {
-                    "id": model.meetup_location_id,
-                    "name": loc_data["name"],
-                    "address": loc_data["address"],  # <--- 這裡加入了 address
-                }
-            else:
-                loc_obj = {
-                    "id": model.meetup_location_id,
-                    "name": "Unknown",
-                    "address": "",
-                }
-            deal_info = {
-                "meetup_location": loc_obj,
-                "accepted_at": model.updated_at,
-            }
-
-        return {
-            "id": model.id,
-            "status": model.status,
-            "requester_confirmed": model.requester_confirmed,
-            "owner_confirmed": model.owner_confirmed,
-            "created_at": model.created_at,
-            "updated_at": model.updated_at,
-            "message": model.message,
-            "requester": {
-                "user_id": model.requester.id,
-                "nickname": model.requester.name,  # 對應 UserModel.name
-                "avatar_url": model.requester.avatar_url,
-            },
-            "owner": {
-                "user_id": model.owner.id,
-                "nickname": model.owner.name,
-                "avatar_url": model.owner.avatar_url,
-            },
-            "target_item": {
-                "item_id": model.target_item.id,
-                "title": model.target_item.title,
-                "cover_image": model.target_item.image_url,
-                "status": model.target_item.status,
-            },
-            "offered_item": (
-                {
-                    "item_id": model.offered_item.id,
-                    "title": model.offered_item.title,
-                    "cover_image": model.offered_item.image_url,
-                }
-                if model.offered_item
-                else None
-            ),
-            "deal_info": deal_info,
-        }
+        return build_exchange_document(model)
 
     def _reject_related_requests_for_offered_item(
         self, offered_item_id: str, current_exchange_id: str
-    ):
+    ) -> List[str]:
         """
         當提供的物品被交易後，將其他所有使用該物品作為 offered_item 的請求，
         以及所有以該物品為 target_item 的請求 (如果有的話) 全部拒絕。
         """
-        # 情況 1: 找出其他 "我拿這個物品去換別人東西" 的請求 (User Case)
-        # 條件: offered_item_id 相同 AND id != current AND status = PENDING
-        outgoing_conflicts = (
-            self.db.query(ExchangeModel)
-            .filter(
-                ExchangeModel.offered_item_id == offered_item_id,
-                ExchangeModel.id != current_exchange_id,
-                ExchangeModel.status == ExchangeStatus.PENDING,
-            )
-            .all()
-        )
-
-        # 情況 2: 找出 "別人想要換我這個物品" 的請求
-        # 條件: target_item_id 相同 AND status = PENDING
-        # (因為這個物品已經拿去換別人的東西了，所以別人不能再來換它)
-        incoming_conflicts = (
-            self.db.query(ExchangeModel)
-            .filter(
-                ExchangeModel.target_item_id == offered_item_id,
-                # 這裡不需要排除 current_exchange_id，因為 current 的 target 是對方的物品
-                ExchangeModel.status == ExchangeStatus.PENDING,
-            )
-            .all()
+        return self._bulk_reject(
+            [
+                or_(
+                    # 情況 1: 其他 "我拿這個物品去換別人東西" 的請求 (排除目前這筆)
+                    and_(
+                        ExchangeModel.offered_item_id == offered_item_id,
+                        ExchangeModel.id != current_exchange_id,
+                    ),
+                    # 情況 2: "別人想要換我這個物品" 的請求
+                    # (因為這個物品已經拿去換別人的東西了，所以別人不能再來換它)
+                    ExchangeModel.target_item_id == offered_item_id,
+                )
+            ],
+            " (系統自動備註: 因交換物品已用於其他交易，系統自動取消此請求)",
         )
 
-        all_conflicts = outgoing_conflicts + incoming_conflicts
-
-        for conflict in all_conflicts:
-            conflict.status = ExchangeStatus.REJECTED
-            note = " (系統自動備註: 因交換物品已用於其他交易，系統自動取消此請求)"
-            if conflict.message:
-                conflict.message += note
-            else:
-                conflict.message = note.strip()
-
-            conflict.updated_at = datetime.now()
-            self.db.add(conflict)
-
-    def get_locations(self):
+    @staticmethod
+    def get_locations():
         return [
             {"id": k, "name": v["name"], "address": v["address"]}
             for k, v in LOCATIONS.items()
@@ -457,17 +585,38 @@ class ExchangeService:
         if user_id not in [exchange.requester_id, exchange.owner_id]:
             raise HTTPException(status_code=403, detail="Not authorized")
 
-        # 建立訊息
-        new_msg = MessageModel(
-            exchange_id=exchange_id, sender_id=user_id, content=content
-        )
-        self.db.add(new_msg)
-        self.db.commit()
+        # 建立訊息，同一個 Transaction 更新雙方的未讀數
+        with UnitOfWork(self.db):
+            new_msg = MessageModel(
+                exchange_id=exchange_id, sender_id=user_id, content=content
+            )
+            self.db.add(new_msg)
+            self.db.flush()
+
+            recipient_id = (
+                exchange.owner_id
+                if user_id == exchange.requester_id
+                else exchange.requester_id
+            )
+            # 第一次追蹤時已讀位置設在這則之前，只有這則算未讀
+            upsert(
+                self.db,
+                ExchangeReadStateModel,
+                {
+                    "exchange_id": exchange_id,
+                    "user_id": recipient_id,
+                    "unread_count": 1,
+                    "last_read_message_id": new_msg.id - 1,
+                },
+                {"unread_count": ExchangeReadStateModel.unread_count + 1},
+            )
+            # 自己送出訊息代表已經看過前面的內容
+            self._mark_read(user_id, exchange_id, new_msg.id)
         self.db.refresh(new_msg)
 
         sender_name = new_msg.sender.name if new_msg.sender else "Unknown"
 
-        return {
+        message = {
             "id": new_msg.id,
             "sender_id": new_msg.sender_id,
             "sender_name": sender_name,
@@ -475,102 +624,233 @@ class ExchangeService:
             "created_at": new_msg.created_at,
         }
 
-    def get_messages(self, user_id: str, exchange_id: str):
+        # commit 之後才推送，收到推播的人一定查得到這則訊息
+        if self.publisher:
+            self.publisher.publish_message(
+                exchange_id, MessageResponse(**message).model_dump(mode="json")
+            )
+        return message
+
+    def get_messages(
+        self,
+        user_id: str,
+        exchange_id: str,
+        after_id: Optional[int] = None,
+        before_id: Optional[int] = None,
+        limit: Optional[int] = None,
+    ):
+        """
+        依時間由舊到新回傳訊息:
+        - after_id: 只回傳這則之後的新訊息 (輪詢時只拿增量)
+        - before_id: 回傳這則之前的訊息 (往上捲載入更早的訊息)
+        - limit: 沒有 after_id 時取「最新的」limit 則，有 after_id 時取最接近的 limit 則
+        """
         # 驗證權限
         exchange = self.repo.get_by_id(exchange_id)
         if not exchange or user_id not in [exchange.requester_id, exchange.owner_id]:
             raise HTTPException(status_code=403, detail="Not authorized")
 
-        # 查詢訊息 (依時間排序)
-        messages = (
-            self.db.query(MessageModel)
+        # sender_name 用一次 JOIN 取得 (不要每則訊息各自 lazy load sender)
+        query = (
+            self.db.query(
+                MessageModel.id,
+                MessageModel.sender_id,
+                UserModel.name.label("sender_name"),
+                MessageModel.content,
+                MessageModel.created_at,
+            )
+            .outerjoin(UserModel, UserModel.id == MessageModel.sender_id)
             .filter(MessageModel.exchange_id == exchange_id)
-            .order_by(MessageModel.created_at.asc())
-            .all()
         )
 
-        # 轉換格式 (包含 sender_name 方便前端顯示)
-        results = []
-        for msg in messages:
-            sender_name = msg.sender.name if msg.sender else "Unknown"
-            results.append(
-                {
-                    "id": msg.id,
-                    "sender_id": msg.sender_id,
-                    "sender_name": sender_name,
-                    "content": msg.content,
-                    "created_at": msg.created_at,
-                }
+        # 以 (created_at, id) 當游標，走 (exchange_id, created_at) 索引
+        if after_id is not None:
+            created_at, message_id = self._message_position(exchange_id, after_id)
+            query = query.filter(
+                or_(
+                    MessageModel.created_at > created_at,
+                    and_(
+                        MessageModel.created_at == created_at,
+                        MessageModel.id > message_id,
+                    ),
+                )
+            )
+        if before_id is not None:
+            created_at, message_id = self._message_position(exchange_id, before_id)
+            query = query.filter(
+                or_(
+                    MessageModel.created_at < created_at,
+                    and_(
+                        MessageModel.created_at == created_at,
+                        MessageModel.id < message_id,
+                    ),
+                )
             )
-        return results
 
-    # --- 雙方確認完成 ---
-    def confirm_exchange(self, user_id: str, exchange_id: str, action: str = "confirm"):
-        exchange_model = (
-            self.db.query(ExchangeModel).filter(ExchangeModel.id == exchange_id).first()
+        if limit is not None and after_id is None:
+            # 取最新的 limit 則 (倒序取出再反轉回由舊到新)
+            rows = (
+                query.order_by(MessageModel.created_at.desc(), MessageModel.id.desc())
+                .limit(limit)
+                .all()
+            )
+            rows.reverse()
+        else:
+            query = query.order_by(MessageModel.created_at.asc(), MessageModel.id.asc())
+            if limit is not None:
+                query = query.limit(limit)
+            rows = query.all()
+
+        # 轉換格式 (包含 sender_name 方便前端顯示)
+        return [
+            {
+                "id": row.id,
+                "sender_id": row.sender_id,
+                "sender_name": row.sender_name or "Unknown",
+                "content": row.content,
+                "created_at": row.created_at,
+            }
+            for row in rows
+        ]
+
+    def mark_messages_read(self, user_id: str, exchange_id: str) -> dict:
+        """把這個聊天室目前所有的訊息標為已讀"""
+        exchange = self.repo.get_by_id(exchange_id)
+        if not exchange or user_id not in [exchange.requester_id, exchange.owner_id]:
+            raise HTTPException(status_code=403, detail="Not authorized")
+
+        with UnitOfWork(self.db):
+            last_id = self.db.scalar(
+                select(func.max(MessageModel.id)).where(
+                    MessageModel.exchange_id == exchange_id
+                )
+            )
+            self._mark_read(user_id, exchange_id, last_id)
+        return {"exchange_id": exchange_id, "last_read_message_id": last_id}
+
+    def _mark_read(
+        self, user_id: str, exchange_id: str, last_id: Optional[int]
+    ) -> None:
+        upsert(
+            self.db,
+            ExchangeReadStateModel,
+            {
+                "exchange_id": exchange_id,
+                "user_id": user_id,
+                "unread_count": 0,
+                "last_read_message_id": last_id,
+            },
+            {"unread_count": 0, "last_read_message_id": last_id},
         )
-        if not exchange_model:
-            raise HTTPException(status_code=404, detail="Exchange not found")
 
-        if exchange_model.status != ExchangeStatus.ACCEPTED:
-            raise HTTPException(
-                status_code=400, detail="Exchange is not in trading status"
+    def _message_position(self, exchange_id: str, message_id: int):
+        """游標訊息的 (created_at, id)，不屬於這筆交換就視為無效的游標"""
+        row = (
+            self.db.query(MessageModel.created_at, MessageModel.id)
+            .filter(
+                MessageModel.id == message_id,
+                MessageModel.exchange_id == exchange_id,
             )
+            .first()
+        )
+        if row is None:
+            raise HTTPException(status_code=400, detail="Invalid message cursor")
+        return row.created_at, row.id
 
-        # 根據 action 決定是 確認(True) 還是 取消確認(False)
-        is_confirmed = True if action == "confirm" else False
+    # --- 雙方確認完成 ---
+    def confirm_exchange(self, user_id: str, exchange_id: str, action: str = "confirm"):
+        with UnitOfWork(self.db):
+            exchange_model = self._get_exchange_model_for_update(user_id, exchange_id)
 
-        if user_id == exchange_model.requester_id:
-            exchange_model.requester_confirmed = is_confirmed
-        elif user_id == exchange_model.owner_id:
-            exchange_model.owner_confirmed = is_confirmed
-        else:
-            raise HTTPException(status_code=403, detail="Not authorized")
+            if exchange_model.status != ExchangeStatus.ACCEPTED:
+                raise HTTPException(
+                    status_code=400, detail="Exchange is not in trading status"
+                )
 
-        # 只有在「確認」動作時才檢查是否雙方都完成
-        if action == "confirm":
-            if exchange_model.requester_confirmed and exchange_model.owner_confirmed:
-                exchange_model.status = ExchangeStatus.COMPLETED
+            # 根據 action 決定是 確認(True) 還是 取消確認(False)
+            is_confirmed = True if action == "confirm" else False
 
-                # (A) 更新對方的物品 (Target Item)
-                target_item = self.item_repo.get_by_id(exchange_model.target_item_id)
-                if target_item:
-                    target_item.status = ItemStatus.TRADED
-                    self.item_repo.save(target_item)
+            # 上鎖前已確認是交換的雙方之一
+            if user_id == exchange_model.requester_id:
+                exchange_model.requester_confirmed = is_confirmed
+            else:
+                exchange_model.owner_confirmed = is_confirmed
+
+            record_event(
+                self.db,
+                ExchangeConfirmationChanged(
+                    exchange_id=exchange_model.id,
+                    requester_id=exchange_model.requester_id,
+                    owner_id=exchange_model.owner_id,
+                    user_id=user_id,
+                    confirmed=is_confirmed,
+                ),
+            )
 
-                # (B) 更新我提供的物品 (Offered Item)
-                if exchange_model.offered_item_id:
-                    offered_item = self.item_repo.get_by_id(
-                        exchange_model.offered_item_id
+            # 只有在「確認」動作時才檢查是否雙方都完成
+            if action == "confirm":
+                if (
+                    exchange_model.requester_confirmed
+                    and exchange_model.owner_confirmed
+                ):
+                    exchange_model.status = ExchangeStatus.COMPLETED
+
+                    # (A) 更新對方的物品 (Target Item)
+                    target_item = self.item_repo.get_by_id(
+                        exchange_model.target_item_id
+                    )
+                    if target_item:
+                        target_item.status = ItemStatus.TRADED
+                        self.item_repo.save(target_item)
+
+                    # (B) 更新我提供的物品 (Offered Item)
+                    if exchange_model.offered_item_id:
+                        offered_item = self.item_repo.get_by_id(
+                            exchange_model.offered_item_id
+                        )
+                        if offered_item:
+                            offered_item.status = ItemStatus.TRADED
+                            self.item_repo.save(offered_item)
+
+                    record_event(
+                        self.db,
+                        ExchangeCompleted(
+                            exchange_id=exchange_model.id,
+                            requester_id=exchange_model.requester_id,
+                            owner_id=exchange_model.owner_id,
+                            target_item_id=exchange_model.target_item_id,
+                            offered_item_id=exchange_model.offered_item_id,
+                        ),
                     )
-                    if offered_item:
-                        offered_item.status = ItemStatus.TRADED
-                        self.item_repo.save(offered_item)
 
-        exchange_model.updated_at = datetime.now()
-        self.db.commit()
+            exchange_model.updated_at = datetime.now()
 
         return self._enrich_exchange_data(exchange_id)
 
     def update_location(self, user_id: str, exchange_id: str, location_id: int):
-        exchange = self.repo.get_by_id(exchange_id)
-        if not exchange:
-            raise HTTPException(status_code=404, detail="Exchange not found")
+        with UnitOfWork(self.db):
+            # 1. 權限檢查 (必須是 Requester 或 Owner) 後上鎖，
+            # 只改地點欄位，不會把舊的狀態 / 確認旗標寫回去蓋掉同時發生的修改
+            exchange_model = self._get_exchange_model_for_update(user_id, exchange_id)
 
-        # 1. 權限檢查：必須是 Requester 或 Owner
-        if user_id not in [exchange.requester_id, exchange.owner_id]:
-            raise HTTPException(status_code=403, detail="Permission denied")
+            # 2. 狀態檢查：必須是交易進行中 (ACCEPTED)
+            if exchange_model.status != ExchangeStatus.ACCEPTED:
+                raise HTTPException(
+                    status_code=400,
+                    detail="Cannot update location for this exchange status",
+                )
 
-        # 2. 狀態檢查：必須是交易進行中 (ACCEPTED)
-        if exchange.status != ExchangeStatus.ACCEPTED:
-            raise HTTPException(
-                status_code=400,
-                detail="Cannot update location for this exchange status",
+            # 3. 更新地點
+            exchange_model.meetup_location_id = location_id
+            exchange_model.updated_at = datetime.now()
+            record_event(
+                self.db,
+                ExchangeLocationChanged(
+                    exchange_id=exchange_model.id,
+                    requester_id=exchange_model.requester_id,
+                    owner_id=exchange_model.owner_id,
+                    location_id=location_id,
+                ),
             )
 
-        # 3. 更新地點
-        exchange.meetup_location_id = location_id
-        exchange.updated_at = datetime.now()
-        self.repo.save(exchange)
-
         return self._enrich_exchange_data(exchange_id)
@@ -0,0 +1,8 @@
+from fastapi import Request
+
+from .infrastructure.realtime import InProcessChatBroker
+
+
+def get_chat_publisher(request: Request) -> InProcessChatBroker:
+    # 聊天室即時推送，由 main.py 的 lifespan 建立與關閉 (整個應用程式共用)
+    return request.app.state.chat_broker
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 from typing import Optional
@@ -25,5 +25,6 @@ class Exchange:
     meetup_location_id: Optional[int] = None
     requester_confirmed: bool = False
     owner_confirmed: bool = False
-    created_at: datetime = datetime.now()
-    updated_at: datetime = datetime.now()
+    # default_factory: 每次建立時才取時間 (寫成 = datetime.now() 會固定成 import 的時間)
+    created_at: datetime = field(default_factory=datetime.now)
+    updated_at: datetime = field(default_factory=datetime.now)
@@ -0,0 +1,104 @@
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional, Type
+
+
+# --- Domain Events ---
+# 和狀態變更寫在同一個 Transaction 的 outbox_events 表，再由 OutboxDispatcher 依序分送
+@dataclass(frozen=True)
+class DomainEvent(ABC):
+    @property
+    def event_type(self) -> str:
+        return type(self).__name__
+
+    @property
+    @abstractmethod
+    def aggregate_id(self) -> str:
+        """outbox_events.aggregate_id (例如 exchange_id / user_id)"""
+
+    def to_payload(self) -> dict:
+        return asdict(self)
+
+
+@dataclass(frozen=True)
+class ExchangeEvent(DomainEvent):
+    exchange_id: str
+    requester_id: str
+    owner_id: str
+
+    @property
+    def aggregate_id(self) -> str:
+        return self.exchange_id
+
+
+@dataclass(frozen=True)
+class ExchangeCreated(ExchangeEvent):
+    target_item_id: str
+    offered_item_id: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class ExchangeAccepted(ExchangeEvent):
+    target_item_id: str
+    offered_item_id: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class ExchangeRejected(ExchangeEvent):
+    auto: bool = False  # True: 物品已和別人成交，由系統自動拒絕
+    from_status: str = "pending"  # 拒絕前的狀態
+
+
+@dataclass(frozen=True)
+class ExchangeCancelled(ExchangeEvent):
+    cancelled_by: str
+    was_accepted: bool = False  # 交易中取消 (物品已還原成上架中)
+    target_item_id: Optional[str] = None
+    offered_item_id: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class ExchangeConfirmationChanged(ExchangeEvent):
+    user_id: str
+    confirmed: bool
+
+
+@dataclass(frozen=True)
+class ExchangeCompleted(ExchangeEvent):
+    target_item_id: str
+    offered_item_id: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class ExchangeLocationChanged(ExchangeEvent):
+    location_id: int
+
+
+# 使用者的暱稱 / 頭像變了：交換的 Read Model 與物品快取 (owner_name) 要跟著更新
+# (可能牽涉很多筆交換，交給 OutboxDispatcher 處理，不在使用者登入的 Transaction 裡重算)
+@dataclass(frozen=True)
+class UserProfileChanged(DomainEvent):
+    user_id: str
+
+    @property
+    def aggregate_id(self) -> str:
+        return self.user_id
+
+
+EVENT_TYPES: Dict[str, Type[DomainEvent]] = {
+    cls.__name__: cls
+    for cls in (
+        ExchangeCreated,
+        ExchangeAccepted,
+        ExchangeRejected,
+        ExchangeCancelled,
+        ExchangeConfirmationChanged,
+        ExchangeCompleted,
+        ExchangeLocationChanged,
+        UserProfileChanged,
+    )
+}
+
+
+def event_from_payload(event_type: str, payload: dict) -> DomainEvent:
+    return EVENT_TYPES[event_type](**payload)
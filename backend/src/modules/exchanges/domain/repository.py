@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from datetime import datetime
+from typing import List, Optional, Tuple
 
 from .entity import Exchange, ExchangeStatus
 
@@ -14,6 +15,18 @@ class ExchangeRepository(ABC):
         pass
 
     @abstractmethod
-    def find_by_user(self, user_id: str, role: str) -> List[Exchange]:
+    def get_by_id_for_update(self, exchange_id: str) -> Optional[Exchange]:
+        # 取得並鎖住這筆交換 (SELECT ... FOR UPDATE)，直到 Transaction 結束
+        pass
+
+    @abstractmethod
+    def find_by_user(
+        self,
+        user_id: str,
+        role: str,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[datetime, str]] = None,
+    ) -> List[Exchange]:
         # role: 'requester' or 'owner'
+        # limit / after: Keyset 分頁 (依 created_at, id 倒序)
         pass
@@ -2,7 +2,7 @@ from datetime import datetime
 
 from sqlalchemy import Boolean, Column, DateTime
 from sqlalchemy import Enum as SAEnum
-from sqlalchemy import ForeignKey, Integer, String, Text
+from sqlalchemy import JSON, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from ...iam.infrastructure.models import Base, UserModel
@@ -12,6 +12,12 @@ from ..domain.entity import ExchangeStatus
 
 class ExchangeModel(Base):
     __tablename__ = "exchanges"
+    __table_args__ = (
+        # 重複請求檢查 / 拒絕其他請求 / 物品列表 join ACCEPTED 的交換
+        Index("ix_exchanges_target_item_id_status", "target_item_id", "status"),
+        # 拒絕「拿同一個物品去換」的其他請求
+        Index("ix_exchanges_offered_item_id_status", "offered_item_id", "status"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, index=True)
     requester_id: Mapped[str] = mapped_column(
@@ -52,6 +58,12 @@ class ExchangeModel(Base):
 
 class MessageModel(Base):
     __tablename__ = "exchange_messages"
+    __table_args__ = (
+        # 聊天室依時間排序 / after_id、before_id 增量查詢 (InnoDB 的次要索引尾端自帶 id)
+        Index(
+            "ix_exchange_messages_exchange_id_created_at", "exchange_id", "created_at"
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     exchange_id: Mapped[str] = mapped_column(
@@ -63,3 +75,87 @@ class MessageModel(Base):
 
     # 關聯 (Optional)
     sender = relationship("UserModel")
+
+
+class ExchangeReadStateModel(Base):
+    """
+    每個人在每個聊天室的已讀位置與未讀數 (送出訊息時在同一個 Transaction 更新)。
+    沒有這一列代表還沒有追蹤 (上線前的舊訊息不算未讀)。
+    """
+
+    __tablename__ = "exchange_read_states"
+    __table_args__ = (
+        # 首頁摘要：列出某人有未讀訊息的聊天室
+        Index("ix_exchange_read_states_user_id_unread", "user_id", "unread_count"),
+    )
+
+    exchange_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("exchanges.id"), primary_key=True
+    )
+    user_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("users.id"), primary_key=True
+    )
+    unread_count: Mapped[int] = mapped_column(Integer, default=0)
+    # 只算 id 比它大、且不是自己送出的訊息
+    last_read_message_id: Mapped[int] = mapped_column(Integer, nullable=True)
+
+
+class OutboxEventModel(Base):
+    """
+    Transactional Outbox: Domain Event 跟著狀態變更在同一個 Transaction 寫入，
+    commit 成功才會被分送，rollback 就一起消失。
+    """
+
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        # Dispatcher 依序撈出尚未分送的事件
+        Index("ix_outbox_events_dispatched_at_id", "dispatched_at", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    event_type: Mapped[str] = mapped_column(String(64))
+    aggregate_id: Mapped[str] = mapped_column(String(36), index=True)
+    payload: Mapped[dict] = mapped_column(JSON)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+
+    dispatched_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    last_error: Mapped[str] = mapped_column(Text, nullable=True)
+    # 處理中的租約 (哪一個 Dispatcher、到什麼時候)；Handler 失敗後則是下一次重試的時間
+    locked_by: Mapped[str] = mapped_column(String(36), nullable=True)
+    locked_until: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+
+
+class ExchangeViewModel(Base):
+    """
+    交換的 Read Model (CQRS Projection)：每筆交換一列，document 存好詳情 API 的完整回應
+    (雙方暱稱 / 頭像、物品標題 / 封面、面交資訊)，列表與詳情都只需要讀這張表。
+    由 read_model.py 的 Session hook 在同一個 Transaction 內維護。
+    """
+
+    __tablename__ = "exchange_views"
+    __table_args__ = (
+        # GET /exchanges?role=requester|owner 依 (created_at, id) 倒序分頁
+        Index(
+            "ix_exchange_views_requester_id_created_at",
+            "requester_id",
+            "created_at",
+            "exchange_id",
+        ),
+        Index(
+            "ix_exchange_views_owner_id_created_at",
+            "owner_id",
+            "created_at",
+            "exchange_id",
+        ),
+    )
+
+    exchange_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    requester_id: Mapped[str] = mapped_column(String(36))
+    owner_id: Mapped[str] = mapped_column(String(36))
+    status: Mapped[str] = mapped_column(SAEnum(ExchangeStatus))
+    created_at: Mapped[datetime] = mapped_column(DateTime)
+    document: Mapped[dict] = mapped_column(JSON)
+    projected_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.now, onupdate=datetime.now
+    )
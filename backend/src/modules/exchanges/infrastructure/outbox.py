@@ -0,0 +1,368 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Type, Union
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from ....database import SessionLocal
+from ....metrics import registry
+from ....unit_of_work import after_commit
+from ..domain.events import DomainEvent, event_from_payload
+from .models import OutboxEventModel
+
+logger = logging.getLogger(__name__)
+
+# 只想讓部分機器 / worker 負責分送時，其他的設成 false (事件照樣會寫入 outbox)
+OUTBOX_DISPATCH_ENABLED = os.getenv("OUTBOX_DISPATCH_ENABLED", "true").lower() == "true"
+# 每個 Process 都要收到的事件 (例如清掉本機的快取)，和上面的分送分開設定
+OUTBOX_BROADCAST_ENABLED = (
+    os.getenv("OUTBOX_BROADCAST_ENABLED", "true").lower() == "true"
+)
+
+outbox_dispatched = registry.counter(
+    "outbox_events_dispatched_total", "已分送的 Domain Event 數 (依 event_type)"
+)
+outbox_failures = registry.counter(
+    "outbox_dispatch_failures_total", "Handler 處理失敗的次數 (依 event_type)"
+)
+outbox_lag = registry.histogram(
+    "outbox_dispatch_lag_seconds", "事件寫入到分送完成的延遲"
+)
+
+EventHandler = Callable[[DomainEvent], None]
+TransactionHandler = Callable[[Session, DomainEvent], None]
+
+# 有新事件 commit 時通知 Dispatcher 立刻處理 (不用等下一次輪詢)
+_wakeup_listeners: List[Callable[[], None]] = []
+
+# 寫入事件時在同一個 Transaction 內同步執行的 Handler (例如計數器)
+# 丟出例外會讓整個 Transaction rollback，所以只適合做簡單的 DB 更新
+_transaction_handlers: Dict[str, List[TransactionHandler]] = defaultdict(list)
+
+
+def on_record(
+    event_type: Union[str, Type[DomainEvent]], handler: TransactionHandler
+) -> None:
+    name = event_type if isinstance(event_type, str) else event_type.__name__
+    if handler not in _transaction_handlers[name]:
+        _transaction_handlers[name].append(handler)
+
+
+def record_event(db: Session, event: DomainEvent) -> None:
+    """
+    把事件加進目前的 Session，跟著狀態變更一起 commit (要在 UnitOfWork 裡呼叫)。
+    """
+    db.add(
+        OutboxEventModel(
+            event_type=event.event_type,
+            aggregate_id=event.aggregate_id,
+            payload=event.to_payload(),
+        )
+    )
+    for handler in _transaction_handlers.get(event.event_type, ()):
+        handler(db, event)
+    after_commit(db, _notify_listeners)
+
+
+def _notify_listeners() -> None:
+    for listener in list(_wakeup_listeners):
+        listener()
+
+
+def _event_name(event_type: Union[str, Type[DomainEvent]]) -> str:
+    return event_type if isinstance(event_type, str) else event_type.__name__
+
+
+class OutboxDispatcher:
+    """
+    依 id 順序分批撈出尚未分送的事件，交給訂閱的 Handler 處理。
+    - At-least-once：Handler 成功後才標記 dispatched_at，所以 Handler 要能承受重複的事件
+    - Handler 失敗時停在那一筆 (保持順序)，等 retry_base * 2^(attempts-1) 秒 (最多 retry_max) 再重試；
+      超過 max_attempts 次就跳過並記錄錯誤
+    - 撈取時用 UPDATE 寫入租約 (locked_by / locked_until) 搶下這一批並馬上 commit，
+      多台機器同時跑也不會重複分送同一筆 (除非 Handler 執行超過 lease)；Handler 執行時不佔著 DB 的鎖
+    - subscribe 的 Handler 整個系統只有一台機器執行；每個 Process 都要執行的 (例如清掉本機快取)
+      用 subscribe_broadcast：每個 Process 依 id 追 outbox_events (不上鎖、不標記)，延遲約 poll_seconds
+    - Handler 在 threadpool 執行 (同步函式)，要推播到 event loop 請使用 thread-safe 的方法
+    """
+
+    # broadcast 追到的 id 有缺號時 (較早開始的 Transaction 還沒 commit)，在這段時間內持續補查
+    BROADCAST_GAP_SECONDS = 30.0
+    MAX_BROADCAST_GAPS = 1000
+
+    def __init__(
+        self,
+        session_factory: sessionmaker = SessionLocal,
+        batch_size: Optional[int] = None,
+        poll_seconds: Optional[float] = None,
+        max_attempts: int = 10,
+        retention: timedelta = timedelta(days=3),
+        retry_base: float = 1.0,
+        retry_max: float = 60.0,
+        lease: timedelta = timedelta(minutes=5),
+        dispatch_enabled: bool = True,
+        now: Callable[[], datetime] = datetime.now,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size or int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+        self.poll_seconds = poll_seconds or float(os.getenv("OUTBOX_POLL_SECONDS", "2"))
+        self.max_attempts = max_attempts
+        self.retention = retention
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.lease = lease
+        self.dispatch_enabled = dispatch_enabled
+        self.now = now
+
+        self._handlers: Dict[str, List[EventHandler]] = defaultdict(list)
+        self._broadcast_handlers: Dict[str, List[EventHandler]] = defaultdict(list)
+        self._broadcast_cursor: Optional[int] = None
+        self._broadcast_gaps: Dict[int, float] = {}  # 缺號的 id -> 發現的時間
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_purge = float("-inf")
+
+    def subscribe(
+        self, event_type: Union[str, Type[DomainEvent]], handler: EventHandler
+    ) -> None:
+        self._handlers[_event_name(event_type)].append(handler)
+
+    def subscribe_broadcast(
+        self, event_type: Union[str, Type[DomainEvent]], handler: EventHandler
+    ) -> None:
+        """每個 Process 都會執行 (best-effort：失敗只記錄，不重試)"""
+        self._broadcast_handlers[_event_name(event_type)].append(handler)
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        _wakeup_listeners.append(self.notify)
+        # 啟動前的事件不用再廣播 (本機的快取是空的)
+        await run_in_threadpool(self.reset_broadcast_cursor)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self.notify in _wakeup_listeners:
+            _wakeup_listeners.remove(self.notify)
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._loop = None
+
+    def notify(self) -> None:
+        """可以在任何執行緒呼叫 (after_commit 會在 threadpool 裡觸發)"""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _run(self) -> None:
+        while True:
+            dispatched = 0
+            try:
+                if self.dispatch_enabled:
+                    dispatched = await run_in_threadpool(self.dispatch_batch)
+                if self._broadcast_handlers:
+                    await run_in_threadpool(self.tail_broadcast)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Outbox dispatch failed, retrying later: {e}")
+
+            # 整批都滿了代表後面可能還有，直接處理下一批
+            if dispatched >= self.batch_size:
+                continue
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def dispatch_batch(self) -> int:
+        """處理一批事件，回傳這批處理 (或放棄) 的筆數"""
+        db = self.session_factory()
+        try:
+            rows = self._claim_batch(db)
+            if not rows:
+                return 0
+            processed = 0
+            for row in rows:
+                if not self._handle(row):
+                    break
+                processed += 1
+
+            # 失敗的那一筆保留重試時間 (_handle 寫入)，後面沒處理到的直接放回去
+            for row in rows[processed:]:
+                row.locked_by = None
+            for row in rows[processed + 1 :]:
+                row.locked_until = None
+            db.commit()
+            self._purge_dispatched(db)
+            return processed
+        finally:
+            db.close()
+
+    def _claim_batch(self, db: Session) -> List[OutboxEventModel]:
+        """
+        依 id 順序取得最前面一批尚未分送的事件並寫入租約 (馬上 commit，Handler 執行期間不佔著 DB 的鎖)。
+        最前面有其他 Dispatcher 的租約或正在等待重試時不處理，保持順序。
+        """
+        now = self.now()
+        candidates = db.execute(
+            select(OutboxEventModel.id, OutboxEventModel.locked_until)
+            .where(OutboxEventModel.dispatched_at.is_(None))
+            .order_by(OutboxEventModel.id)
+            .limit(self.batch_size)
+        ).all()
+        if not candidates or any(
+            locked_until is not None and locked_until > now
+            for _, locked_until in candidates
+        ):
+            db.rollback()
+            return []
+
+        ids = [event_id for event_id, _ in candidates]
+        token = uuid.uuid4().hex
+        claimed = db.execute(
+            update(OutboxEventModel)
+            .where(
+                OutboxEventModel.id.in_(ids),
+                OutboxEventModel.dispatched_at.is_(None),
+                or_(
+                    OutboxEventModel.locked_until.is_(None),
+                    OutboxEventModel.locked_until <= now,
+                ),
+            )
+            .values(locked_by=token, locked_until=now + self.lease)
+        )
+        # 其他 Dispatcher 同時搶到其中幾筆：這一輪放棄 (整批或不要，才不會打亂順序)
+        if claimed.rowcount != len(ids):
+            db.rollback()
+            return []
+        db.commit()
+        return (
+            db.query(OutboxEventModel)
+            .filter(OutboxEventModel.locked_by == token)
+            .order_by(OutboxEventModel.id)
+            .all()
+        )
+
+    def _handle(self, row: OutboxEventModel) -> bool:
+        """True: 這筆處理完畢 (成功或已放棄)；False: 先停下來，等重試時間到了再處理"""
+        handlers = self._handlers.get(row.event_type, [])
+        try:
+            if handlers:
+                event = event_from_payload(row.event_type, row.payload)
+                for handler in handlers:
+                    handler(event)
+        except Exception as e:
+            outbox_failures.inc(event_type=row.event_type)
+            row.attempts = (row.attempts or 0) + 1
+            row.last_error = str(e)
+            if row.attempts < self.max_attempts:
+                delay = min(self.retry_base * 2 ** (row.attempts - 1), self.retry_max)
+                # 重試時間寫在 DB，所有 Dispatcher 都會等到這個時間
+                row.locked_until = self.now() + timedelta(seconds=delay)
+                logger.warning(
+                    f"Outbox handler failed for {row.event_type} #{row.id} "
+                    f"(attempt {row.attempts}, retry in {delay:.0f}s): {e}"
+                )
+                return False
+            logger.error(
+                f"Giving up outbox event {row.event_type} #{row.id} "
+                f"after {row.attempts} attempts: {e}"
+            )
+
+        row.dispatched_at = datetime.now()
+        row.locked_by = None
+        row.locked_until = None
+        outbox_dispatched.inc(event_type=row.event_type)
+        outbox_lag.observe((row.dispatched_at - row.created_at).total_seconds())
+        return True
+
+    def reset_broadcast_cursor(self) -> None:
+        db = self.session_factory()
+        try:
+            self._broadcast_cursor = (
+                db.scalar(select(func.max(OutboxEventModel.id))) or 0
+            )
+        finally:
+            db.close()
+        self._broadcast_gaps.clear()
+
+    def tail_broadcast(self) -> int:
+        """
+        把 cursor 之後 (以及還在等待的缺號) 的事件交給 subscribe_broadcast 的 Handler，回傳處理的筆數。
+        不上鎖也不標記，每個 Process 各自記住看到哪裡。
+        """
+        if self._broadcast_cursor is None:
+            self.reset_broadcast_cursor()
+        now = time.monotonic()
+        self._broadcast_gaps = {
+            event_id: seen_at
+            for event_id, seen_at in self._broadcast_gaps.items()
+            if now - seen_at < self.BROADCAST_GAP_SECONDS
+        }
+
+        condition = OutboxEventModel.id > self._broadcast_cursor
+        if self._broadcast_gaps:
+            condition = or_(
+                condition, OutboxEventModel.id.in_(list(self._broadcast_gaps))
+            )
+        db = self.session_factory()
+        try:
+            rows = db.execute(
+                select(
+                    OutboxEventModel.id,
+                    OutboxEventModel.event_type,
+                    OutboxEventModel.payload,
+                )
+                .where(condition)
+                .order_by(OutboxEventModel.id)
+                .limit(self.batch_size)
+            ).all()
+        finally:
+            db.close()
+
+        for event_id, event_type, payload in rows:
+            self._broadcast_gaps.pop(event_id, None)
+            if event_id > self._broadcast_cursor:
+                for missing in range(self._broadcast_cursor + 1, event_id):
+                    self._broadcast_gaps[missing] = now
+                self._broadcast_cursor = event_id
+            for handler in self._broadcast_handlers.get(event_type, ()):
+                try:
+                    handler(event_from_payload(event_type, payload))
+                except Exception as e:
+                    logger.warning(
+                        f"Outbox broadcast handler failed for {event_type} #{event_id}: {e}"
+                    )
+        # 缺號太多 (例如大量 rollback) 時只留最新的
+        while len(self._broadcast_gaps) > self.MAX_BROADCAST_GAPS:
+            del self._broadcast_gaps[min(self._broadcast_gaps)]
+        return len(rows)
+
+    def _purge_dispatched(self, db: Session) -> None:
+        # 已分送的事件保留一段時間方便除錯，之後定期刪除 (最多每 10 分鐘一次)
+        if time.monotonic() - self._last_purge < 600:
+            return
+        self._last_purge = time.monotonic()
+        db.execute(
+            delete(OutboxEventModel).where(
+                OutboxEventModel.dispatched_at < datetime.now() - self.retention
+            )
+        )
+        db.commit()
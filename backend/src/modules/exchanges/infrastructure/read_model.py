@@ -0,0 +1,340 @@
+import argparse
+import logging
+import os
+from itertools import chain
+from typing import Iterable, List, Optional, Set
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event, inspect, or_, select
+from sqlalchemy.orm import Session, joinedload, sessionmaker
+
+from ...iam.infrastructure.models import UserModel
+from ...inventory.infrastructure.models import ItemModel
+from ..domain.entity import ExchangeStatus
+from ..domain.events import EVENT_TYPES, ExchangeEvent, UserProfileChanged
+from ..domain.locations import LOCATIONS
+from .models import ExchangeModel, ExchangeViewModel, OutboxEventModel
+from .outbox import record_event
+
+logger = logging.getLogger(__name__)
+
+# 列表 / 詳情改讀 exchange_views (false 時走原本的 Join 查詢；Projection 仍會持續維護)
+EXCHANGE_READ_MODEL_ENABLED = (
+    os.getenv("EXCHANGE_READ_MODEL_ENABLED", "true").lower() == "true"
+)
+
+# 一次重新投影幾筆交換
+PROJECTION_BATCH_SIZE = 500
+
+# 這些欄位變更時，相關交換的 document 要重算
+_ITEM_FIELDS = ("title", "image_url", "image_variants", "status")
+_USER_FIELDS = ("name", "avatar_url")
+
+_PENDING_KEY = "exchange_projection_pending"
+
+# 會影響交換 document 的 Model (其他 Model 的 commit 不需要處理)
+_WATCHED_MODELS = (ExchangeModel, OutboxEventModel, ItemModel, UserModel)
+_EXCHANGE_EVENT_TYPES = {
+    name for name, cls in EVENT_TYPES.items() if issubclass(cls, ExchangeEvent)
+}
+
+
+def cover_image(item: ItemModel) -> Optional[str]:
+    # 有縮圖就用卡片尺寸，沒有就退回原圖
+    variants = item.image_variants or {}
+    return variants.get("card") or item.image_url
+
+
+def build_exchange_document(model: ExchangeModel) -> dict:
+    """交換詳情 API 的回應 (需要先載入 requester / owner / target_item / offered_item)"""
+    deal_info = None
+    if (
+        model.status in [ExchangeStatus.ACCEPTED, ExchangeStatus.COMPLETED]
+        and model.meetup_location_id
+    ):
+        loc_data = LOCATIONS.get(model.meetup_location_id)
+        if loc_data:
+            loc_obj = {
+                "id": model.meetup_location_id,
+                "name": loc_data["name"],
+                "address": loc_data["address"],  # <--- 這裡加入了 address
+            }
+        else:
+            loc_obj = {
+                "id": model.meetup_location_id,
+                "name": "Unknown",
+                "address": "",
+            }
+        deal_info = {
+            "meetup_location": loc_obj,
+            "accepted_at": model.updated_at,
+        }
+
+    return {
+        "id": model.id,
+        "status": model.status,
+        "requester_confirmed": model.requester_confirmed,
+        "owner_confirmed": model.owner_confirmed,
+        "created_at": model.created_at,
+        "updated_at": model.updated_at,
+        "message": model.message,
+        "requester": {
+            "user_id": model.requester.id,
+            "nickname": model.requester.name,  # 對應 UserModel.name
+            "avatar_url": model.requester.avatar_url,
+        },
+        "owner": {
+            "user_id": model.owner.id,
+            "nickname": model.owner.name,
+            "avatar_url": model.owner.avatar_url,
+        },
+        "target_item": {
+            "item_id": model.target_item.id,
+            "title": model.target_item.title,
+            "cover_image": cover_image(model.target_item),
+            "status": model.target_item.status,
+        },
+        "offered_item": (
+            {
+                "item_id": model.offered_item.id,
+                "title": model.offered_item.title,
+                "cover_image": cover_image(model.offered_item),
+            }
+            if model.offered_item
+            else None
+        ),
+        "deal_info": deal_info,
+    }
+
+
+def list_row(document: dict, role: str) -> dict:
+    """由 document 組出列表的一列 (格式同 ExchangeService._to_list_row)"""
+    partner = document["owner"] if role == "requester" else document["requester"]
+    offered = document["offered_item"]
+    return {
+        "exchange_id": document["id"],
+        "status": document["status"],
+        "partner": {
+            "id": partner["user_id"],
+            "name": partner["nickname"],
+            "avatar_url": partner["avatar_url"],
+        },
+        "target_item": {
+            "item_id": document["target_item"]["item_id"],
+            "title": document["target_item"]["title"],
+        },
+        "offered_item": (
+            {"item_id": offered["item_id"], "title": offered["title"]}
+            if offered
+            else None
+        ),
+    }
+
+
+def exchange_view_statement(user_id: str, role: str):
+    """交換列表改讀 Read Model：只查一張表，走 (user, created_at, id) 索引"""
+    user_column = (
+        ExchangeViewModel.requester_id
+        if role == "requester"
+        else ExchangeViewModel.owner_id
+    )
+    return select(
+        ExchangeViewModel.exchange_id,
+        ExchangeViewModel.created_at,
+        ExchangeViewModel.document,
+    ).where(user_column == user_id)
+
+
+def project_exchanges(db: Session, exchange_ids: Iterable[str]) -> int:
+    """從來源資料表重算這些交換的 document，寫入 exchange_views (同一個 Transaction)"""
+    ids = sorted(set(exchange_ids))
+    for start in range(0, len(ids), PROJECTION_BATCH_SIZE):
+        chunk = ids[start : start + PROJECTION_BATCH_SIZE]
+        models = (
+            db.query(ExchangeModel)
+            .options(
+                joinedload(ExchangeModel.requester),
+                joinedload(ExchangeModel.owner),
+                joinedload(ExchangeModel.target_item),
+                joinedload(ExchangeModel.offered_item),
+            )
+            .filter(ExchangeModel.id.in_(chunk))
+            # 批次 UPDATE (例如自動拒絕) 不會更新 Session 裡的物件，這裡要重新讀
+            .populate_existing()
+            .all()
+        )
+        for model in models:
+            db.merge(
+                ExchangeViewModel(
+                    exchange_id=model.id,
+                    requester_id=model.requester_id,
+                    owner_id=model.owner_id,
+                    status=model.status,
+                    created_at=model.created_at,
+                    document=jsonable_encoder(build_exchange_document(model)),
+                )
+            )
+    return len(ids)
+
+
+# --- 跟著寫入自動維護 Projection ---
+
+
+def _has_changes(obj, fields) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[field].history.has_changes() for field in fields)
+
+
+def _before_flush(session: Session, flush_context, instances) -> None:
+    pending = None
+    for obj in list(session.new) + list(session.dirty):
+        kind = None
+        key = None
+        if isinstance(obj, ExchangeModel):
+            kind, key = "exchanges", obj.id
+        elif isinstance(obj, OutboxEventModel):
+            # 批次 UPDATE 不會出現在 dirty，但每一筆都有寫 Domain Event
+            if obj.event_type in _EXCHANGE_EVENT_TYPES:
+                kind, key = "exchanges", obj.aggregate_id
+        elif isinstance(obj, ItemModel) and obj in session.dirty:
+            if _has_changes(obj, _ITEM_FIELDS):
+                kind, key = "items", obj.id
+        elif isinstance(obj, UserModel) and obj in session.dirty:
+            if _has_changes(obj, _USER_FIELDS):
+                kind, key = "users", obj.id
+
+        if kind and key:
+            if pending is None:
+                pending = session.info.setdefault(
+                    _PENDING_KEY, {"exchanges": set(), "items": set(), "users": set()}
+                )
+            if kind == "users" and key not in pending["users"]:
+                # 使用者可能有很多筆交換，交給 OutboxDispatcher 在 Transaction 之後重算
+                record_event(session, UserProfileChanged(user_id=key))
+            pending[kind].add(key)
+
+
+def _has_unflushed_changes(session: Session) -> bool:
+    # 還沒 flush 的變更要到 commit 時的 flush 才會被 _before_flush 記錄
+    return any(
+        isinstance(obj, _WATCHED_MODELS) for obj in chain(session.new, session.dirty)
+    )
+
+
+def _before_commit(session: Session) -> None:
+    # 沒有記錄到相關變更的 Session (例如只動到其他模組的資料表) 直接略過
+    if _PENDING_KEY not in session.info and not _has_unflushed_changes(session):
+        return
+    # 先把還沒 flush 的變更送出 (同時收集受影響的 ID)
+    session.flush()
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+
+    exchange_ids: Set[str] = set(pending["exchanges"])
+    if pending["items"]:
+        exchange_ids.update(
+            session.scalars(
+                select(ExchangeModel.id).where(
+                    or_(
+                        ExchangeModel.target_item_id.in_(pending["items"]),
+                        ExchangeModel.offered_item_id.in_(pending["items"]),
+                    )
+                )
+            )
+        )
+    if exchange_ids:
+        project_exchanges(session, exchange_ids)
+        session.flush()
+        # flush Projection 時不會再收集到新的 ID，清掉避免留到下一個 Transaction
+        session.info.pop(_PENDING_KEY, None)
+
+
+def _after_soft_rollback(session: Session, previous_transaction) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _user_exchange_ids(db: Session, user_id: str) -> List[str]:
+    return list(
+        db.scalars(
+            select(ExchangeModel.id).where(
+                or_(
+                    ExchangeModel.requester_id == user_id,
+                    ExchangeModel.owner_id == user_id,
+                )
+            )
+        )
+    )
+
+
+def subscribe_projection(dispatcher) -> None:
+    """使用者改暱稱 / 頭像時，由 OutboxDispatcher 重算他所有交換的 document"""
+
+    def reproject_user(event: UserProfileChanged) -> None:
+        db = dispatcher.session_factory()
+        try:
+            project_exchanges(db, _user_exchange_ids(db, event.user_id))
+            db.commit()
+        finally:
+            db.close()
+
+    dispatcher.subscribe(UserProfileChanged, reproject_user)
+
+
+def install_projection_hooks() -> None:
+    """掛在 Session 類別上，所有寫入 (包含 Script / Worker) 都會維護 exchange_views"""
+    if event.contains(Session, "before_commit", _before_commit):
+        return
+    event.listen(Session, "before_flush", _before_flush)
+    event.listen(Session, "before_commit", _before_commit)
+    event.listen(Session, "after_soft_rollback", _after_soft_rollback)
+
+
+# --- 重建 ---
+
+
+def rebuild_exchange_views(
+    session_factory: sessionmaker, batch_size: int = PROJECTION_BATCH_SIZE
+) -> int:
+    """
+    依 id 順序分批從來源資料表重新產生全部的 exchange_views (第一次部署或資料修正後執行)
+    每批各自 commit，中途中斷可以直接重跑。
+    """
+    total = 0
+    last_id = ""
+    while True:
+        db = session_factory()
+        try:
+            ids: List[str] = list(
+                db.scalars(
+                    select(ExchangeModel.id)
+                    .where(ExchangeModel.id > last_id)
+                    .order_by(ExchangeModel.id)
+                    .limit(batch_size)
+                )
+            )
+            if not ids:
+                return total
+            project_exchanges(db, ids)
+            db.commit()
+        finally:
+            db.close()
+
+        total += len(ids)
+        last_id = ids[-1]
+        logger.info(f"Projected {total} exchanges")
+
+
+if __name__ == "__main__":
+    # python -m src.modules.exchanges.infrastructure.read_model [--batch-size 500]
+    from ....database import SessionLocal
+
+    parser = argparse.ArgumentParser(
+        description="Rebuild the exchange_views read model"
+    )
+    parser.add_argument("--batch-size", type=int, default=PROJECTION_BATCH_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    count = rebuild_exchange_views(SessionLocal, args.batch_size)
+    logger.info(f"Rebuilt exchange_views for {count} exchanges")
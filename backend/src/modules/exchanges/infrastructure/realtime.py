@@ -0,0 +1,150 @@
+import asyncio
+import json
+import logging
+import os
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Set
+
+from ....metrics import registry
+from ..application.interfaces import ChatPublisher
+
+logger = logging.getLogger(__name__)
+
+realtime_connections = registry.gauge("realtime_connections", "訂閱中的聊天室連線數")
+realtime_dropped = registry.counter(
+    "realtime_dropped_messages_total", "連線消化太慢而被丟掉的訊息數"
+)
+
+
+class InProcessChatBroker(ChatPublisher):
+    """
+    單一 Process 內的聊天室 pub/sub。
+    publish_message 可以在任何執行緒呼叫 (同步的 Service 跑在 threadpool)，
+    實際的分送一律排回 event loop 執行。
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+
+    async def stop(self) -> None:
+        self._loop = None
+
+    def publish_message(self, exchange_id: str, message: dict) -> None:
+        self._dispatch_threadsafe(exchange_id, message)
+
+    @asynccontextmanager
+    async def subscribe(self, exchange_id: str) -> AsyncIterator[asyncio.Queue]:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[exchange_id].add(queue)
+        realtime_connections.inc()
+        try:
+            yield queue
+        finally:
+            realtime_connections.dec()
+            subscribers = self._subscribers.get(exchange_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[exchange_id]
+
+    def _dispatch_threadsafe(self, exchange_id: str, message: dict) -> None:
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self._dispatch, exchange_id, message)
+
+    def _dispatch(self, exchange_id: str, message: dict) -> None:
+        for queue in list(self._subscribers.get(exchange_id, ())):
+            if queue.full():
+                # 連線太慢就丟掉最舊的一則 (前端重連時會用 GET /messages 補齊)
+                queue.get_nowait()
+                realtime_dropped.inc()
+            queue.put_nowait(message)
+
+
+class RedisChatBroker(InProcessChatBroker):
+    """
+    多台機器時透過 Redis Pub/Sub 同步：
+    publish 只送到 Redis，每台機器 (包含自己) 都從 Redis 收到後再分送給本機的連線。
+    client 可以注入 (測試時用 tests/test_realtime_chat.py 的 FakePubSubHub，只需要 publish / pubsub)。
+    """
+
+    CHANNEL_PREFIX = "exchange-chat:"
+    RECONNECT_SECONDS = 1.0
+
+    def __init__(self, redis_client, async_redis_client, queue_size: int = 100):
+        super().__init__(queue_size)
+        self.redis = redis_client
+        self.async_redis = async_redis_client
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        await super().start()
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        await super().stop()
+
+    def publish_message(self, exchange_id: str, message: dict) -> None:
+        try:
+            self.redis.publish(self.CHANNEL_PREFIX + exchange_id, json.dumps(message))
+        except Exception as e:
+            # Redis 掛掉時至少推給本機的連線
+            logger.warning(f"Failed to publish chat message to Redis: {e}")
+            self._dispatch_threadsafe(exchange_id, message)
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = self.async_redis.pubsub()
+            try:
+                await pubsub.psubscribe(self.CHANNEL_PREFIX + "*")
+                async for event in pubsub.listen():
+                    if event.get("type") != "pmessage":
+                        continue
+                    channel = event["channel"]
+                    if isinstance(channel, bytes):
+                        channel = channel.decode("utf-8")
+                    self._dispatch(
+                        channel[len(self.CHANNEL_PREFIX) :], json.loads(event["data"])
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Chat subscription to Redis lost, reconnecting: {e}")
+                await asyncio.sleep(self.RECONNECT_SECONDS)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+
+def create_chat_broker() -> InProcessChatBroker:
+    """有設定 REALTIME_REDIS_URL 就用 Redis (多台機器)，否則只在本機分送"""
+    redis_url = os.getenv("REALTIME_REDIS_URL")
+    if not redis_url:
+        return InProcessChatBroker()
+
+    try:
+        import redis
+        import redis.asyncio as redis_asyncio
+    except ImportError:
+        raise RuntimeError(
+            "REALTIME_REDIS_URL is set but the redis package is not installed"
+        )
+    return RedisChatBroker(
+        redis.Redis.from_url(redis_url), redis_asyncio.Redis.from_url(redis_url)
+    )
@@ -1,7 +1,10 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import List, Optional, Tuple
 
 from sqlalchemy.orm import Session
 
+from ....pagination import apply_keyset
+from ....unit_of_work import commit_or_flush
 from ..domain.entity import Exchange, ExchangeStatus
 from ..domain.repository import ExchangeRepository
 from .models import ExchangeModel
@@ -27,7 +30,7 @@ class SqlAlchemyExchangeRepository(ExchangeRepository):
             updated_at=exchange.updated_at,
         )
         self.db.merge(model)
-        self.db.commit()
+        commit_or_flush(self.db)
         return exchange
 
     def get_by_id(self, exchange_id: str) -> Optional[Exchange]:
@@ -36,16 +39,34 @@ class SqlAlchemyExchangeRepository(ExchangeRepository):
         )
         return self._to_entity(model) if model else None
 
-    def find_by_user(self, user_id: str, role: str) -> List[Exchange]:
+    def get_by_id_for_update(self, exchange_id: str) -> Optional[Exchange]:
+        model = (
+            self.db.query(ExchangeModel)
+            .filter(ExchangeModel.id == exchange_id)
+            .with_for_update()
+            .populate_existing()
+            .first()
+        )
+        return self._to_entity(model) if model else None
+
+    def find_by_user(
+        self,
+        user_id: str,
+        role: str,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[datetime, str]] = None,
+    ) -> List[Exchange]:
         query = self.db.query(ExchangeModel)
         if role == "requester":
             query = query.filter(ExchangeModel.requester_id == user_id)
         elif role == "owner":
             query = query.filter(ExchangeModel.owner_id == user_id)
 
-        # 依時間倒序
-        models = query.order_by(ExchangeModel.created_at.desc()).all()
-        return [self._to_entity(m) for m in models]
+        # 依時間倒序 (Keyset 分頁)
+        query = apply_keyset(query, ExchangeModel.created_at, ExchangeModel.id, after)
+        if limit:
+            query = query.limit(limit)
+        return [self._to_entity(m) for m in query.all()]
 
     def _to_entity(self, model: ExchangeModel) -> Exchange:
         return Exchange(
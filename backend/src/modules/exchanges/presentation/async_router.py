@@ -0,0 +1,58 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ....database import AsyncSessionLocal, get_async_db
+from ....pagination import MAX_PAGE_SIZE, ndjson_lines_async
+from ...iam.dependencies import get_current_user_async
+from ...iam.domain.entity import User
+from ..application.async_service import AsyncExchangeQueryService
+from ..application.dtos import ExchangeListResponse
+
+# async 版的查詢 API (DB_ASYNC_ENABLED=true 時才會註冊，並優先於同步版)
+router = APIRouter(tags=["Exchanges"])
+
+
+def get_async_exchange_service(
+    db: AsyncSession = Depends(get_async_db),
+) -> AsyncExchangeQueryService:
+    return AsyncExchangeQueryService(db)
+
+
+# 取得我的交換列表
+@router.get("/exchanges", response_model=List[ExchangeListResponse])
+async def get_my_exchanges(
+    response: Response,
+    role: str = Query(..., pattern="^(requester|owner)$"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    format: Optional[str] = Query(None, pattern="^ndjson$"),
+    current_user: User = Depends(get_current_user_async),
+    service: AsyncExchangeQueryService = Depends(get_async_exchange_service),
+):
+    if format == "ndjson":
+        return StreamingResponse(
+            _stream_exchanges(current_user.id, role),
+            media_type="application/x-ndjson",
+        )
+
+    try:
+        page = await service.get_exchanges(current_user.id, role, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page.items
+
+
+async def _stream_exchanges(user_id: str, role: str):
+    # 串流回應送出時 Request 的 AsyncSession 可能已經關閉，所以這裡自己開一個
+    async with AsyncSessionLocal() as db:
+        async for line in ndjson_lines_async(
+            AsyncExchangeQueryService(db).iter_exchanges(user_id, role),
+            lambda row: ExchangeListResponse.model_validate(row).model_dump_json(),
+        ):
+            yield line
@@ -1,19 +1,36 @@
+import asyncio
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from ....database import get_db
+from ....database import ReadSessionLocal, SessionLocal, get_routed_db
+from ....http_cache import CachedJSON
+from ....pagination import MAX_PAGE_SIZE, ndjson_lines
 
 # 依賴
-from ...iam.dependencies import get_current_user
+from ...iam.dependencies import authenticate_token, get_auth_service, get_current_user
 from ...iam.domain.entity import User
+from ...inventory.infrastructure.item_cache import CachedItemRepository, item_cache
 from ...inventory.infrastructure.repository import SqlAlchemyItemRepository
 from ..application.dtos import (
     ConfirmExchangeRequest,
     CreateExchangeRequest,
     ExchangeDetailResponse,
     ExchangeListResponse,
+    MarkReadResponse,
     MessageResponse,
     SendMessageRequest,
     UpdateExchangeStatusRequest,
@@ -21,17 +38,22 @@ from ..application.dtos import (
 )
 
 # 交換模組
+from ..application.interfaces import ChatPublisher
 from ..application.service import ExchangeService
+from ..dependencies import get_chat_publisher
 from ..infrastructure.repository import SqlAlchemyExchangeRepository
 
 router = APIRouter(tags=["Exchanges"])
 
 
 # Dependency Helper
-def get_exchange_service(db: Session = Depends(get_db)) -> ExchangeService:
+def get_exchange_service(
+    db: Session = Depends(get_routed_db),
+    publisher: ChatPublisher = Depends(get_chat_publisher),
+) -> ExchangeService:
     exchange_repo = SqlAlchemyExchangeRepository(db)
-    item_repo = SqlAlchemyItemRepository(db)
-    return ExchangeService(exchange_repo, item_repo, db)
+    item_repo = CachedItemRepository(SqlAlchemyItemRepository(db), item_cache)
+    return ExchangeService(exchange_repo, item_repo, db, publisher)
 
 
 # 1. 提出交換請求
@@ -48,11 +70,43 @@ def create_exchange(
 # 2. 取得我的交換列表
 @router.get("/exchanges", response_model=List[ExchangeListResponse])
 def get_my_exchanges(
-    role: str = Query(..., regex="^(requester|owner)$"),
+    response: Response,
+    role: str = Query(..., pattern="^(requester|owner)$"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    format: Optional[str] = Query(None, pattern="^ndjson$"),
     current_user: User = Depends(get_current_user),
     service: ExchangeService = Depends(get_exchange_service),
 ):
-    return service.get_exchanges(current_user.id, role)
+    # ?format=ndjson: 串流匯出全部資料 (每行一筆 JSON)
+    if format == "ndjson":
+        return StreamingResponse(
+            _stream_exchanges(current_user.id, role),
+            media_type="application/x-ndjson",
+        )
+
+    try:
+        page = service.get_exchanges(current_user.id, role, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # 下一頁的 cursor 放在 Header，Body 維持原本的 List 格式
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page.items
+
+
+def _stream_exchanges(user_id: str, role: str):
+    # 串流回應送出時 Request 的 DB Session 可能已經關閉，所以這裡自己開一個 (唯讀，可用 Replica)
+    db = ReadSessionLocal()
+    try:
+        service = get_exchange_service(db, publisher=None)
+        yield from ndjson_lines(
+            service.iter_exchanges(user_id, role),
+            lambda row: ExchangeListResponse.model_validate(row).model_dump_json(),
+        )
+    finally:
+        db.close()
 
 
 # 3. 取得單一交換詳情
@@ -93,10 +147,13 @@ def cancel_exchange(
     return service.cancel_exchange(current_user.id, exchange_id)
 
 
-# 系統資訊: 地點
+# 系統資訊: 地點 (啟動時產生一次，不需要 DB Session；支援 If-None-Match → 304)
+LOCATIONS_RESPONSE = CachedJSON(ExchangeService.get_locations())
+
+
 @router.get("/locations")
-def get_locations(service: ExchangeService = Depends(get_exchange_service)):
-    return service.get_locations()
+async def get_locations(request: Request):
+    return LOCATIONS_RESPONSE.respond(request, "/locations")
 
 
 @router.post("/exchanges/{exchange_id}/messages", response_model=MessageResponse)
@@ -112,10 +169,80 @@ def send_message(
 @router.get("/exchanges/{exchange_id}/messages", response_model=List[MessageResponse])
 def get_messages(
     exchange_id: str,
+    after_id: Optional[int] = Query(None, description="只回傳這則之後的新訊息"),
+    before_id: Optional[int] = Query(None, description="回傳這則之前的舊訊息"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
     current_user: User = Depends(get_current_user),
     service: ExchangeService = Depends(get_exchange_service),
 ):
-    return service.get_messages(current_user.id, exchange_id)
+    return service.get_messages(
+        current_user.id, exchange_id, after_id, before_id, limit
+    )
+
+
+@router.post("/exchanges/{exchange_id}/messages/read", response_model=MarkReadResponse)
+def mark_messages_read(
+    exchange_id: str,
+    current_user: User = Depends(get_current_user),
+    service: ExchangeService = Depends(get_exchange_service),
+):
+    return service.mark_messages_read(current_user.id, exchange_id)
+
+
+def _is_chat_member(token: str, exchange_id: str) -> bool:
+    # WebSocket 連線會維持很久，驗證用的 DB Session 用完就還回連線池
+    db = SessionLocal()
+    try:
+        user = authenticate_token(token, get_auth_service(db))
+        exchange = SqlAlchemyExchangeRepository(db).get_by_id(exchange_id)
+        return exchange is not None and user.id in [
+            exchange.requester_id,
+            exchange.owner_id,
+        ]
+    except HTTPException:
+        return False
+    finally:
+        db.close()
+
+
+@router.websocket("/exchanges/{exchange_id}/ws")
+async def chat_websocket(websocket: WebSocket, exchange_id: str, token: str = ""):
+    """
+    聊天室即時訊息：連線後每則新訊息會以 JSON (格式同 MessageResponse) 推送過來。
+    瀏覽器的 WebSocket 無法帶 Authorization Header，所以 Token 放在 ?token=。
+    斷線重連後請用 GET /exchanges/{exchange_id}/messages 補齊漏掉的訊息。
+    """
+    if not token or not await run_in_threadpool(_is_chat_member, token, exchange_id):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    broker = websocket.app.state.chat_broker
+    await websocket.accept()
+    async with broker.subscribe(exchange_id) as queue:
+        # 用戶端不需要傳東西過來，這裡只是為了偵測斷線
+        receiver = asyncio.create_task(_wait_for_disconnect(websocket))
+        try:
+            while not receiver.done():
+                getter = asyncio.create_task(queue.get())
+                done, _ = await asyncio.wait(
+                    {getter, receiver}, return_when=asyncio.FIRST_COMPLETED
+                )
+                if getter not in done:
+                    getter.cancel()
+                    break
+                await websocket.send_json(getter.result())
+        except WebSocketDisconnect:
+            pass
+        finally:
+            receiver.cancel()
+
+
+async def _wait_for_disconnect(websocket: WebSocket) -> None:
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
 
 
 @router.post("/exchanges/{exchange_id}/confirm")
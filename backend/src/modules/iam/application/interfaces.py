@@ -7,6 +7,7 @@ class IdentityData:
     email: str
     name: str
     avatar_url: Optional[str]
+    expires_at: Optional[float] = None  # Token 的 exp (Unix time)，給快取判斷何時失效
     # sub: str  # 如果想用 Cognito ID 當主鍵，可以加這個欄位
 
 # --- 定義身分驗證器的合約 (Protocol) ---
@@ -15,4 +16,9 @@ class IdentityProvider(Protocol):
     def verify_token(self, token: str) -> IdentityData:
         ...
     def exchange_code_for_token(self, code: str) -> str:
+        ...
+
+# --- 已驗證 Token 的快取 (使用者資料變動時需要通知它失效) ---
+class UserCache(Protocol):
+    def invalidate_user(self, email: str) -> None:
         ...
\ No newline at end of file
@@ -8,13 +8,14 @@ from ..domain.repository import UserRepository
 
 # 引入 Application 層的定義 (上面那兩個檔案)
 from .dtos import GoogleLoginRequest, UserProfileResponse
-from .interfaces import IdentityProvider
+from .interfaces import IdentityProvider, UserCache
 
 class AuthService:
-    def __init__(self, user_repo: UserRepository, identity_provider: IdentityProvider):
+    def __init__(self, user_repo: UserRepository, identity_provider: IdentityProvider, user_cache: Optional[UserCache] = None):
         # 依賴注入：Service 不需要知道 DB 是 SQL 還是 Mongo，也不用知道是用 Cognito 還是 Firebase
         self.user_repo = user_repo
         self.identity_provider = identity_provider
+        self.user_cache = user_cache
 
     def login(self, request: GoogleLoginRequest) -> UserProfileResponse:
         # 1. 新增這一步：先拿 Code 換 Token
@@ -36,6 +37,9 @@ class AuthService:
             user.name = identity_data.name
             user.avatar_url = identity_data.avatar_url
             self.user_repo.save(user)
+            # 使用者資料更新了，讓舊 Token 快取的 User 失效
+            if self.user_cache:
+                self.user_cache.invalidate_user(user.email)
         else:
             # 3. 如果不存在，自動註冊 (Create)
             new_user = User(
@@ -1,21 +1,25 @@
 import os
 from fastapi import Depends, HTTPException, Security
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 # 引入剛剛分出去的 get_db
-from ...database import get_db 
+from ...database import get_async_db, get_db
 
 # 引入 IAM 內部的類別
 from .infrastructure.repository import SqlAlchemyUserRepository
+from .infrastructure.async_repository import AsyncSqlAlchemyUserRepository
 from .infrastructure.cognito import CognitoIdentityProvider
+from .infrastructure.token_cache import verified_token_cache
 from .application.service import AuthService
 from .domain.entity import User
 
 # 定義 HTTPBearer
 security = HTTPBearer()
 
-def get_auth_service(db: Session = Depends(get_db)) -> AuthService:
+def get_identity_provider() -> CognitoIdentityProvider:
     region = os.getenv("AWS_COGNITO_REGION", "")
     user_pool_id = os.getenv("COGNITO_USER_POOL_ID", "")
     app_client_id = os.getenv("COGNITO_APP_CLIENT_ID", "")
@@ -23,9 +27,7 @@ def get_auth_service(db: Session = Depends(get_db)) -> AuthService:
     redirect_uri = os.getenv("COGNITO_REDIRECT_URI", "")
     client_secret = os.getenv("COGNITO_CLIENT_SECRET", "") 
 
-    user_repo = SqlAlchemyUserRepository(db)
-    
-    identity_provider = CognitoIdentityProvider(
+    return CognitoIdentityProvider(
         region, 
         user_pool_id, 
         app_client_id, 
@@ -33,23 +35,66 @@ def get_auth_service(db: Session = Depends(get_db)) -> AuthService:
         redirect_uri,
         client_secret
     )
-    
-    return AuthService(user_repo, identity_provider)
+
+def get_auth_service(db: Session = Depends(get_db)) -> AuthService:
+    user_repo = SqlAlchemyUserRepository(db)
+    identity_provider = get_identity_provider()
+    return AuthService(user_repo, identity_provider, verified_token_cache)
 
 def get_current_user(
     token: HTTPAuthorizationCredentials = Security(security),
     service: AuthService = Depends(get_auth_service)
 ) -> User:
+    return authenticate_token(token.credentials, service)
+
+def authenticate_token(id_token: str, service: AuthService) -> User:
+    # 不透過 Header 驗證時使用 (例如 WebSocket 只能把 Token 放在 Query String)
     try:
-        id_token = token.credentials
+        # 同一張 Token 驗證過就直接用快取 (到 Token 的 exp 為止)
+        cached_user = verified_token_cache.get(id_token)
+        if cached_user:
+            return cached_user
+
         identity_data = service.identity_provider.verify_token(id_token)
         user = service.user_repo.get_by_email(identity_data.email)
         
         if not user:
             raise HTTPException(status_code=401, detail="User not found")
-            
+
+        verified_token_cache.put(id_token, user, identity_data.expires_at)
         return user
         
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=401, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# --- async 版 (給 async router 使用) ---
+async def get_current_user_async(
+    token: HTTPAuthorizationCredentials = Security(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    try:
+        id_token = token.credentials
+
+        cached_user = verified_token_cache.get(id_token)
+        if cached_user:
+            return cached_user
+
+        # RSA 驗證 (以及可能的 JWKS 下載) 是阻塞的，丟到 threadpool 執行
+        identity_data = await run_in_threadpool(get_identity_provider().verify_token, id_token)
+        user = await AsyncSqlAlchemyUserRepository(db).get_by_email(identity_data.email)
+
+        if not user:
+            raise HTTPException(status_code=401, detail="User not found")
+
+        verified_token_cache.put(id_token, user, identity_data.expires_at)
+        return user
+
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=401, detail=str(e))
     except Exception as e:
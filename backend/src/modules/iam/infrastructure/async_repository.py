@@ -0,0 +1,39 @@
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..domain.entity import User
+from .models import UserModel
+from .repository import SqlAlchemyUserRepository
+
+class AsyncSqlAlchemyUserRepository:
+    """
+    SqlAlchemyUserRepository 的 async 版本 (搭配 AsyncSession / aiomysql)。
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def save(self, user: User) -> User:
+        user_model = UserModel(
+            id=user.id,
+            email=user.email,
+            name=user.name,
+            password_hash=user.password_hash,
+            avatar_url=user.avatar_url,
+            is_active=user.is_active,
+            is_admin=user.is_admin
+        )
+        await self.db.merge(user_model)
+        await self.db.commit()
+        return user
+
+    async def get_by_email(self, email: str) -> Optional[User]:
+        user_model = await self.db.scalar(select(UserModel).where(UserModel.email == email))
+        return self._to_entity(user_model) if user_model else None
+
+    async def get_by_id(self, user_id: str) -> Optional[User]:
+        user_model = await self.db.get(UserModel, user_id)
+        return self._to_entity(user_model) if user_model else None
+
+    # 與同步版共用 Mapper
+    _to_entity = SqlAlchemyUserRepository._to_entity
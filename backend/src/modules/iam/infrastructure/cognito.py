@@ -1,11 +1,107 @@
+import os
 import requests
+import threading
 import time
+from typing import Any, Callable, Dict, List
 from jose import jwk, jwt
 from jose.utils import base64url_decode
 from ..application.interfaces import IdentityProvider, IdentityData
+from ....instrumentation import external_call_seconds
 import logging
 logger = logging.getLogger(__name__)
 
+# --- JWKS 公鑰快取 (整個 Process 共用) ---
+class JwksKeyStore:
+    """
+    以 kid 為 key，快取「已經 construct 好」的公鑰物件。
+    - 超過 TTL 才重新下載；下載期間其他執行緒繼續使用舊的公鑰，不用等 (只有一個執行緒去下載)
+    - 遇到沒看過的 kid (Cognito 輪替金鑰) 會立刻重新下載一次，同時間的其他請求等它結果 (single-flight)
+    - 下載失敗時繼續使用舊的公鑰；JWKS 裡個別格式錯誤的 key 直接略過
+    """
+
+    def __init__(self, url: str, ttl: float, min_refresh_interval: float = 10.0, timeout: float = 5.0, clock: Callable[[], float] = time.monotonic):
+        self.url = url
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval  # 避免亂填 kid 的 Token 一直觸發下載
+        self.timeout = timeout
+        self.clock = clock
+
+        self._keys: Dict[str, Any] = {}
+        self._fetched_at = float("-inf")
+        self._last_attempt = float("-inf")
+        self._generation = 0  # 每嘗試下載一次就 +1，讓等待中的執行緒知道不用再下載
+        self._lock = threading.Lock()
+
+    def get_key(self, kid: str):
+        generation = self._generation
+        key = self._keys.get(kid)
+        if key is None:
+            # 沒看過的 kid：一定要等下載結果
+            self._refresh(generation)
+            key = self._keys.get(kid)
+        elif self._is_expired():
+            # 過期但有舊的公鑰：搶到鎖的執行緒去下載，其他執行緒直接用舊的
+            if self._refresh(generation, blocking=False):
+                key = self._keys.get(kid)
+
+        if key is None:
+            raise ValueError('Public key not found in JWKS')
+        return key
+
+    def _is_expired(self) -> bool:
+        return self.clock() - self._fetched_at > self.ttl
+
+    def _refresh(self, seen_generation: int, blocking: bool = True) -> bool:
+        """回傳這次是否真的執行了下載 (沒搶到鎖、或別人剛下載過都回傳 False)"""
+        if not self._lock.acquire(blocking=blocking):
+            return False
+        try:
+            # 等鎖的期間已經有別的執行緒下載過了
+            if self._generation != seen_generation:
+                return False
+            if self.clock() - self._last_attempt < self.min_refresh_interval:
+                return False
+
+            self._last_attempt = self.clock()
+            try:
+                with external_call_seconds.time(service="cognito", operation="jwks"):
+                    response = requests.get(self.url, timeout=self.timeout)
+                response.raise_for_status()
+                keys = self._construct_keys(response.json()['keys'])
+            except Exception as e:
+                logger.warning(f"Failed to refresh JWKS from {self.url}, keep using cached keys: {e}")
+            else:
+                # 整個 dict 一次替換，讀取端不需要上鎖
+                self._keys = keys
+                self._fetched_at = self.clock()
+            finally:
+                self._generation += 1
+            return True
+        finally:
+            self._lock.release()
+
+    def _construct_keys(self, raw_keys: List[Dict[str, Any]]) -> Dict[str, Any]:
+        keys = {}
+        for raw in raw_keys:
+            try:
+                keys[raw['kid']] = jwk.construct(raw)
+            except Exception as e:
+                logger.warning(f"Skipping malformed key in JWKS from {self.url}: {e}")
+        if raw_keys and not keys:
+            raise ValueError("JWKS has no usable keys")
+        return keys
+
+
+_jwks_stores: Dict[str, JwksKeyStore] = {}
+_jwks_stores_lock = threading.Lock()
+
+def get_jwks_store(url: str) -> JwksKeyStore:
+    with _jwks_stores_lock:
+        if url not in _jwks_stores:
+            ttl = float(os.getenv("COGNITO_JWKS_TTL_SECONDS", "3600"))
+            _jwks_stores[url] = JwksKeyStore(url, ttl)
+        return _jwks_stores[url]
+
 class CognitoIdentityProvider(IdentityProvider):
     def __init__(self, region: str, user_pool_id: str, app_client_id: str, domain: str, redirect_uri: str, client_secret: str):
         self.region = region
@@ -16,14 +112,7 @@ class CognitoIdentityProvider(IdentityProvider):
         self.client_secret = client_secret  # <--- 新增這行：把密碼存起來
         
         self.jwks_url = f"https://cognito-idp.{region}.amazonaws.com/{user_pool_id}/.well-known/jwks.json"
-        self._keys = None
-
-    def _get_keys(self):
-        """下載並快取 AWS 的公鑰"""
-        if not self._keys:
-            response = requests.get(self.jwks_url)
-            self._keys = response.json()['keys']
-        return self._keys
+        self._jwks = get_jwks_store(self.jwks_url)  # 跨 Request 共用的公鑰快取
 
     def verify_token(self, token: str) -> IdentityData:
         # 1. 取得 Token Header (未驗證前先看 Header)
@@ -32,23 +121,11 @@ class CognitoIdentityProvider(IdentityProvider):
         except Exception:
             raise ValueError("Invalid token header")
 
-        # 2. 找對應的公鑰 (Key ID matching)
+        # 2. 找對應的公鑰 (Key ID matching)，快取裡已經是建構好的公鑰物件
         kid = headers.get('kid')
-        keys = self._get_keys()
-        key_index = -1
-        
-        for i in range(len(keys)):
-            if kid == keys[i]['kid']:
-                key_index = i
-                break
-        
-        if key_index == -1:
-            raise ValueError('Public key not found in JWKS')
-
-        # 3. 建構公鑰物件
-        public_key = jwk.construct(keys[key_index])
+        public_key = self._jwks.get_key(kid)
 
-        # 4. 驗證簽章、過期時間、Audience
+        # 3. 驗證簽章、過期時間、Audience
         # 這一步如果失敗，python-jose 會直接噴 error
         message, encoded_signature = str(token).rsplit('.', 1)
         decoded_signature = base64url_decode(encoded_signature.encode('utf-8'))
@@ -70,11 +147,12 @@ class CognitoIdentityProvider(IdentityProvider):
         if not email:
             raise ValueError("Token is missing 'email' claim")
         
-        # 5. 轉換成統一的 IdentityData 格式
+        # 4. 轉換成統一的 IdentityData 格式
         return IdentityData(
             email=email,
             name=claims.get('name', 'Unknown User'), # Cognito 不一定有 name
             avatar_url=claims.get('picture'),        # Cognito 的圖片欄位通常叫 picture
+            expires_at=claims['exp'],
             # sub=claims.get('sub')                  # 如果你需要 Cognito ID
         )
     
@@ -94,7 +172,8 @@ class CognitoIdentityProvider(IdentityProvider):
             data['client_secret'] = self.client_secret 
 
         # 發送 POST 請求
-        response = requests.post(token_url, data=data, headers={'Content-Type': 'application/x-www-form-urlencoded'})
+        with external_call_seconds.time(service="cognito", operation="token"):
+            response = requests.post(token_url, data=data, headers={'Content-Type': 'application/x-www-form-urlencoded'})
         
         if response.status_code != 200:
             # 印出詳細錯誤訊息方便除錯
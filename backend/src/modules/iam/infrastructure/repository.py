@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from ..domain.entity import User
 from ..domain.repository import UserRepository
 from .models import UserModel
+from ....unit_of_work import commit_or_flush
 
 class SqlAlchemyUserRepository(UserRepository):
     def __init__(self, db: Session):
@@ -23,7 +24,7 @@ class SqlAlchemyUserRepository(UserRepository):
         # 2. 使用 merge (如果 ID 存在就更新，不存在就新增)
         # 這比 add() 更安全，適合 "Save" 的語意
         merged_model = self.db.merge(user_model)
-        self.db.commit()
+        commit_or_flush(self.db)
         # 如果需要回傳最新狀態，建議從 merged_model 轉回 Entity
         # return self._to_entity(merged_model) 
         return user
@@ -0,0 +1,96 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Dict, Optional, Set, Tuple
+from ..domain.entity import User
+from ....metrics import registry
+
+class VerifiedTokenCache:
+    """
+    已驗證過的 ID Token -> User 的 LRU 快取。
+    SPA 每個 Request 都會帶同一張 Token，命中快取時就不用再做 RSA 驗證與查 DB。
+    - Key 是 Token 的 SHA-256 (不把原始 Token 放在記憶體裡)
+    - Token 的 exp 一到就失效
+    - 使用者資料被更新時 (例如重新登入) 用 invalidate_user 清掉
+    快取只在這個 Process 裡：invalidate_user 不會通知其他 Process / 機器，
+    它們會繼續使用快取裡的舊 User 直到 Token 的 exp。
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+        self._entries: "OrderedDict[str, Tuple[User, float]]" = OrderedDict()
+        self._keys_by_email: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _hash(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str) -> Optional[User]:
+        key = self._hash(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            user, expires_at = entry
+            if time.time() >= expires_at:
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # 回傳複本，避免呼叫端改到快取裡的物件
+        return replace(user)
+
+    def put(self, token: str, user: User, expires_at: Optional[float]) -> None:
+        # 沒有 exp 的 Token 不快取
+        if not expires_at or time.time() >= expires_at:
+            return
+
+        key = self._hash(token)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (replace(user), expires_at)
+            self._keys_by_email.setdefault(user.email, set()).add(key)
+
+            while len(self._entries) > self.max_size:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+
+    def invalidate_user(self, email: str) -> None:
+        # 只清這個 Process 的快取 (其他 Process 要等到 Token 的 exp)
+        with self._lock:
+            for key in list(self._keys_by_email.get(email, ())):
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_email.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        email = entry[0].email
+        keys = self._keys_by_email.get(email)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_email[email]
+
+# 整個 Process 共用
+verified_token_cache = VerifiedTokenCache(int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000")))
+registry.callback_gauge("auth_token_cache", "ID Token 快取 (size / hits / misses)", "stat", verified_token_cache.stats)
@@ -0,0 +1,39 @@
+from typing import AsyncIterator, List, Optional
+from ..domain.entity import Item, ItemCategory
+from ..infrastructure.async_repository import AsyncSqlAlchemyItemRepository
+from ....pagination import Page, decode_cursor, to_page
+
+class AsyncItemQueryService:
+    """
+    ItemService 查詢路徑的 async 版本 (刊登物品仍走同步的 ItemService)。
+    repo 可以用 AsyncCachedItemRepository 包起來 (get_item 先查快取)。
+    """
+
+    def __init__(self, repo: AsyncSqlAlchemyItemRepository):
+        self.repo = repo
+
+    async def get_item(self, item_id: str) -> Optional[Item]:
+        return await self.repo.get_by_id(item_id)
+
+    async def get_user_items(self, owner_id: str) -> List[Item]:
+        return await self.repo.get_by_owner_id(owner_id)
+
+    def iter_items(self, keyword: Optional[str], category: Optional[ItemCategory]) -> AsyncIterator[Item]:
+        return self.repo.iter_search(keyword, category)
+
+    async def search_items(
+        self,
+        keyword: Optional[str] = None,
+        category: Optional[ItemCategory] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Page[Item]:
+        after = decode_cursor(cursor) if cursor else None
+
+        # 沒給 limit 時維持舊行為 (一次回傳全部)
+        if not limit:
+            return Page(items=await self.repo.search(keyword, category, after=after))
+
+        # 多查一筆，用來判斷有沒有下一頁
+        items = await self.repo.search(keyword, category, limit=limit + 1, after=after)
+        return to_page(items, limit, lambda item: (item.created_at, item.id))
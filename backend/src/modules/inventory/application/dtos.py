@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
 from ..domain.entity import ItemCategory, ItemStatus
 
 class ExchangePartnerResponse(BaseModel):
@@ -20,8 +20,40 @@ class ItemResponse(BaseModel):
     category: ItemCategory
     status: ItemStatus
     image_url: Optional[str]
+    image_variants: Optional[Dict[str, str]] = None  # {"thumb": url, "card": url, "full": url}
     created_at: datetime
     active_exchange: Optional[ActiveExchangeResponse] = Field(None, alias="activeExchange")
     
     class Config:
-        populate_by_name = True # 允許使用 field name 賦值
\ No newline at end of file
+        populate_by_name = True # 允許使用 field name 賦值
+
+# --- 批次刊登 (POST /items/batch) ---
+class BatchItemInput(BaseModel):
+    title: str
+    description: str
+    category: ItemCategory
+
+class BatchItemResult(BaseModel):
+    index: int                          # 對應 items 陣列的位置
+    success: bool
+    item: Optional[ItemResponse] = None
+    error: Optional[str] = None
+
+class BatchCreateResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[BatchItemResult]
+
+
+# --- 前端直接上傳到 S3 (POST /items/uploads) ---
+class CreateUploadRequest(BaseModel):
+    filename: str                       # 只是原始檔名，S3 的副檔名由 content_type 決定
+    content_type: str
+    size: Optional[int] = None          # 選填，先在這裡擋掉太大的檔案
+
+class PresignedUploadResponse(BaseModel):
+    image_key: str                      # 上傳完成後給 POST /items 使用
+    upload_url: str
+    fields: Dict[str, str]              # 要和檔案一起 POST 到 upload_url 的欄位
+    max_bytes: int
+    expires_in: int                     # 秒
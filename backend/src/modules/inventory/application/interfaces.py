@@ -1,6 +1,56 @@
-from typing import Protocol
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, List, Optional, Protocol, Union
+
+@dataclass
+class PresignedUpload:
+    key: str                  # 上傳完成後交給 POST /items 的 image_key
+    url: str
+    fields: Dict[str, str]    # 要和檔案一起放進 multipart form 的欄位
+
+@dataclass
+class StoredImage:
+    key: str
+    size: int
+    content_type: str
 
 class ImageStorageService(Protocol):
     def upload_image(self, file_content: bytes, filename: str, content_type: str) -> str:
         """上傳圖片並回傳 URL"""
+        ...
+
+    def upload_stream(self, file_obj: BinaryIO, filename: str, content_type: str) -> str:
+        """從檔案物件分段讀取並上傳 (不會把整個檔案讀進記憶體)，回傳 URL"""
+        ...
+
+    def create_presigned_upload(self, owner_id: str, content_type: str, max_bytes: int, expires_in: int) -> PresignedUpload:
+        """產生讓前端直接上傳到儲存空間的簽章 (限制大小與 Content-Type，副檔名由 Content-Type 決定)"""
+        ...
+
+    def is_upload_of(self, owner_id: str, key: str) -> bool:
+        """key 是否為這個使用者透過 create_presigned_upload 上傳的檔案"""
+        ...
+
+    def head_image(self, key: str) -> Optional[StoredImage]:
+        """查詢已上傳檔案的大小與格式，不存在時回傳 None"""
+        ...
+
+    def url_for(self, key: str) -> str:
+        ...
+
+    def item_key_of(self, url: str) -> Optional[str]:
+        """upload_image / upload_stream 回傳的 URL 對應的 key，不是由它們上傳的回傳 None"""
+        ...
+
+    def delete_images(self, keys: List[str]) -> None:
+        ...
+
+@dataclass
+class ImageVariant:
+    content: bytes
+    content_type: str
+    ext: str
+
+class ImageProcessingService(Protocol):
+    def generate_variants(self, source: Union[bytes, str]) -> Dict[str, ImageVariant]:
+        """由圖片內容或檔案路徑產生各尺寸的圖片 (thumb / card / full)，回傳 {名稱: 圖片}"""
         ...
\ No newline at end of file
@@ -1,17 +1,57 @@
+import os
+import shutil
+import tempfile
 import uuid
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
 from ..domain.entity import Item, ItemStatus, ItemCategory
 from ..domain.repository import ItemRepository
-from .interfaces import ImageStorageService
-from typing import Optional
+from .interfaces import ImageProcessingService, ImageStorageService, PresignedUpload
+from ....pagination import Page, decode_cursor, to_page
+from typing import BinaryIO, Dict, List, Optional, Tuple
+import logging
+logger = logging.getLogger(__name__)
+
+# 前端直接上傳用的簽章有效時間 (秒)
+UPLOAD_URL_EXPIRES_SECONDS = int(os.getenv("UPLOAD_URL_EXPIRES_SECONDS", "600"))
+
+# 整個 Process 同時上傳的圖片數 (所有批次刊登共用，不要超過 S3 client 的連線池大小)
+BATCH_UPLOAD_WORKERS = int(os.getenv("ITEM_BATCH_UPLOAD_WORKERS", "8"))
+
+# 原圖複製到暫存檔 (給縮圖的子 Process 讀) 時每次讀取的大小
+_COPY_CHUNK_SIZE = 1024 * 1024
+
+def create_upload_executor() -> ThreadPoolExecutor:
+    # 由 main.py 的 lifespan 建立與關閉 (不要每個請求都建立，同時多個批次時執行緒數才有上限)
+    return ThreadPoolExecutor(max_workers=BATCH_UPLOAD_WORKERS, thread_name_prefix="item-upload")
+
+@dataclass
+class ItemDraft:
+    """批次刊登的其中一筆 (已通過欄位與圖片格式檢查)"""
+    title: str
+    description: str
+    category: ItemCategory
+    file_obj: BinaryIO
+    filename: str
+    content_type: str
+
+@dataclass
+class BatchItemOutcome:
+    item: Optional[Item] = None   # 成功時是新建立的物品
+    error: Optional[str] = None   # 失敗原因
+
 class ItemService:
-    def __init__(self, repo: ItemRepository, storage: ImageStorageService):
+    def __init__(self, repo: ItemRepository, storage: ImageStorageService, image_processor: Optional[ImageProcessingService] = None, upload_executor: Optional[Executor] = None):
         self.repo = repo
         self.storage = storage
+        self.image_processor = image_processor
+        # 共用的上傳執行緒池；沒有時 (例如測試直接建立 Service) 依序上傳
+        self.upload_executor = upload_executor
 
-    def create_item(self, owner_id: str, title: str, description: str, category: ItemCategory, file_content: bytes, filename: str, content_type: str) -> Item:
-        # 1. 上傳圖片
-        image_url = self.storage.upload_image(file_content, filename, content_type)
+    def create_item(self, owner_id: str, title: str, description: str, category: ItemCategory, file_obj: BinaryIO, filename: str, content_type: str) -> Item:
+        # 1. 上傳圖片與縮圖
+        image_url, image_variants = self._upload_images(file_obj, filename, content_type)
         
         # 2. 建立 Item 物件
         new_item = Item(
@@ -22,14 +62,176 @@ class ItemService:
             category=category,
             status=ItemStatus.AVAILABLE,
             image_url=image_url,
+            image_variants=image_variants,
             created_at=datetime.now()
         )
         
         # 3. 存入 DB
+        try:
+            return self.repo.save(new_item)
+        except Exception:
+            self._delete_uploaded([new_item])
+            raise
+
+    def create_upload(self, owner_id: str, content_type: str, max_bytes: int) -> PresignedUpload:
+        # 第一步：前端拿簽章直接把圖片上傳到 S3，不經過 API Server
+        return self.storage.create_presigned_upload(owner_id, content_type, max_bytes, UPLOAD_URL_EXPIRES_SECONDS)
+
+    def create_item_from_upload(self, owner_id: str, title: str, description: str, category: ItemCategory, image_key: str, allowed_types, max_bytes: int) -> Item:
+        """
+        第二步：用已上傳的 image_key 刊登。只用 HEAD 確認檔案存在、大小與格式，不下載內容。
+        (縮圖需要讀圖片內容，這個流程不產生，前端會退回使用原圖)
+        同一個 image_key 已經用在其他物品時丟出 ImageAlreadyUsedError (image_url 有唯一索引)
+        """
+        if not self.storage.is_upload_of(owner_id, image_key):
+            raise ValueError("Invalid image_key")
+        stored = self.storage.head_image(image_key)
+        if stored is None:
+            raise ValueError("Uploaded image not found")
+        if stored.content_type not in allowed_types:
+            raise ValueError("Only JPEG or PNG or heic or webp images are allowed.")
+        if stored.size > max_bytes:
+            raise ValueError(f"Image must be smaller than {max_bytes} bytes.")
+
+        new_item = Item(
+            id=str(uuid.uuid4()),
+            owner_id=owner_id,
+            title=title,
+            description=description,
+            category=category,
+            status=ItemStatus.AVAILABLE,
+            image_url=self.storage.url_for(image_key),
+            created_at=datetime.now()
+        )
         return self.repo.save(new_item)
 
+    def create_items(self, owner_id: str, drafts: List[ItemDraft]) -> List[BatchItemOutcome]:
+        """
+        批次刊登 (依 drafts 的順序回傳每一筆的結果)：
+        - 圖片用共用的 upload_executor 同時上傳，某一張失敗只影響那一筆
+        - 上傳成功的物品在同一個 Transaction 一次寫入；寫入失敗則這些物品都算失敗
+        """
+        outcomes = [BatchItemOutcome() for _ in drafts]
+        if not drafts:
+            return outcomes
+
+        # 每一筆的縮圖在同一個 worker 裡依序上傳 (不能再往同一個 Pool 送工作，Pool 滿了會互相等待)
+        upload = lambda draft: self._upload_images(draft.file_obj, draft.filename, draft.content_type, parallel_variants=False)  # noqa: E731
+        futures = [self._submit(upload, draft) for draft in drafts]
+        for outcome, draft, future in zip(outcomes, drafts, futures):
+            try:
+                image_url, image_variants = future.result()
+            except ValueError as e:
+                # 例如圖片超過大小上限
+                outcome.error = str(e)
+                continue
+            except Exception as e:
+                logger.warning(f"Failed to upload image {draft.filename}: {e}")
+                outcome.error = "Failed to upload image"
+                continue
+
+            outcome.item = Item(
+                id=str(uuid.uuid4()),
+                owner_id=owner_id,
+                title=draft.title,
+                description=draft.description,
+                category=draft.category,
+                status=ItemStatus.AVAILABLE,
+                image_url=image_url,
+                image_variants=image_variants,
+                created_at=datetime.now()
+            )
+
+        items = [outcome.item for outcome in outcomes if outcome.item]
+        if items:
+            try:
+                self.repo.save_all(items)
+            except Exception as e:
+                logger.error(f"Failed to save {len(items)} items: {e}")
+                self._delete_uploaded(items)
+                for outcome in outcomes:
+                    if outcome.item:
+                        outcome.item = None
+                        outcome.error = "Failed to save item"
+        return outcomes
+
+    def _delete_uploaded(self, items: List[Item]) -> None:
+        """寫入 DB 失敗時刪掉這些物品剛上傳的原圖與縮圖 (沒有物品會引用它們)"""
+        urls = [url for item in items for url in [item.image_url, *(item.image_variants or {}).values()]]
+        keys = [key for key in map(self.storage.item_key_of, urls) if key]
+        if not keys:
+            return
+        try:
+            self.storage.delete_images(keys)
+        except Exception as e:
+            logger.warning(f"Failed to delete {len(keys)} orphaned images: {e}")
+
+    def _submit(self, fn, *args) -> Future:
+        if self.upload_executor is not None:
+            return self.upload_executor.submit(fn, *args)
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def _upload_images(self, file_obj: BinaryIO, filename: str, content_type: str, parallel_variants: bool = True) -> Tuple[str, Optional[Dict[str, str]]]:
+        if not self.image_processor:
+            # 上傳原圖 (從檔案物件分段串流上傳)
+            return self.storage.upload_stream(file_obj, filename, content_type), None
+
+        # 原圖先分段寫到暫存檔：上傳原圖從檔案串流，縮圖的子 Process 直接讀檔
+        # (不把整個檔案讀進 API Worker 的記憶體再 pickle 過去；upload_fileobj 結束後也會關閉檔案物件，不能再讀一次)
+        tmp = tempfile.NamedTemporaryFile(prefix="item-image-", delete=False)
+        try:
+            with tmp:
+                shutil.copyfileobj(file_obj, tmp, _COPY_CHUNK_SIZE)
+            with open(tmp.name, "rb") as original:
+                image_url = self.storage.upload_stream(original, filename, content_type)
+
+            # 產生縮圖 (thumb / card / full) 並上傳
+            return image_url, self._upload_variants(tmp.name, parallel_variants)
+        finally:
+            os.unlink(tmp.name)
+
+    def _upload_variants(self, image_path: str, parallel: bool = True) -> Optional[Dict[str, str]]:
+        try:
+            variants = self.image_processor.generate_variants(image_path)
+        except Exception as e:
+            # 縮圖失敗 (例如格式無法解碼) 不影響刊登，前端會退回使用原圖
+            logger.warning(f"Failed to generate image variants: {e}")
+            return None
+        if not variants:
+            return None
+
+        uploads = {
+            name: (self.storage.upload_image, variant.content, f"{name}.{variant.ext}", variant.content_type)
+            for name, variant in variants.items()
+        }
+        if not parallel:
+            # 批次刊登時已經在 upload_executor 的 worker 裡，依序上傳
+            return {name: fn(*args) for name, (fn, *args) in uploads.items()}
+        # 各尺寸同時上傳
+        futures = {name: self._submit(fn, *args) for name, (fn, *args) in uploads.items()}
+        return {name: future.result() for name, future in futures.items()}
+
     def get_user_items(self, owner_id: str):
         return self.repo.get_by_owner_id(owner_id)
     
-    def search_items(self, keyword: Optional[str] = None, category: Optional[ItemCategory] = None):
-        return self.repo.search(keyword, category)
\ No newline at end of file
+    def search_items(
+        self,
+        keyword: Optional[str] = None,
+        category: Optional[ItemCategory] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Page[Item]:
+        after = decode_cursor(cursor) if cursor else None
+
+        # 沒給 limit 時維持舊行為 (一次回傳全部)
+        if not limit:
+            return Page(items=self.repo.search(keyword, category, after=after))
+
+        # 多查一筆，用來判斷有沒有下一頁
+        items = self.repo.search(keyword, category, limit=limit + 1, after=after)
+        return to_page(items, limit, lambda item: (item.created_at, item.id))
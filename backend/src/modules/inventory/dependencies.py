@@ -1,11 +1,31 @@
-from fastapi import Depends
+from concurrent.futures import Executor
+from fastapi import Depends, Request
 from sqlalchemy.orm import Session
-from ...database import get_db
+from ...database import get_routed_db
 from .infrastructure.repository import SqlAlchemyItemRepository
+from .infrastructure.item_cache import CachedItemRepository, item_cache
 from .infrastructure.s3_uploader import S3ImageStorage
+from .infrastructure.image_processing import ProcessPoolImageProcessor
 from .application.service import ItemService
 
-def get_item_service(db: Session = Depends(get_db)) -> ItemService:
-    repo = SqlAlchemyItemRepository(db)
-    storage = S3ImageStorage()
-    return ItemService(repo, storage)
\ No newline at end of file
+def get_image_storage(request: Request) -> S3ImageStorage:
+    # 由 main.py 的 lifespan 建立，整個應用程式共用 (不要每個 Request 都建立 boto3 client)
+    return request.app.state.image_storage
+
+def get_image_processor(request: Request) -> ProcessPoolImageProcessor:
+    # 縮圖用的 Process Pool，同樣由 lifespan 建立與關閉
+    return request.app.state.image_processor
+
+def get_upload_executor(request: Request) -> Executor:
+    # 上傳圖片用的執行緒池，整個應用程式共用 (同時多個批次刊登時執行緒數才有上限)
+    return request.app.state.upload_executor
+
+def get_item_service(
+    db: Session = Depends(get_routed_db),
+    storage: S3ImageStorage = Depends(get_image_storage),
+    image_processor: ProcessPoolImageProcessor = Depends(get_image_processor),
+    upload_executor: Executor = Depends(get_upload_executor)
+) -> ItemService:
+    # get_by_id 先查快取 (物品詳情、交換時的檢查都會用到)
+    repo = CachedItemRepository(SqlAlchemyItemRepository(db), item_cache)
+    return ItemService(repo, storage, image_processor, upload_executor)
\ No newline at end of file
@@ -1,7 +1,7 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import Dict, Optional
 
 
 class ItemStatus(str, Enum):
@@ -37,6 +37,8 @@ class Item:
     category: ItemCategory
     status: ItemStatus
     image_url: Optional[str] = None
-    created_at: datetime = datetime.now()
+    created_at: datetime = field(default_factory=datetime.now)
+    image_variants: Optional[Dict[str, str]] = None  # 縮圖網址 {"thumb": ..., "card": ..., "full": ...}
     owner_name: Optional[str] = None
+    updated_at: Optional[datetime] = None
     active_exchange: Optional[ActiveExchange] = None
\ No newline at end of file
@@ -1,20 +1,47 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
 from .entity import Item, ItemCategory
 
+class ImageAlreadyUsedError(ValueError):
+    """image_url 已經用在其他物品 (同一張上傳的圖片不能刊登兩次)"""
+    pass
+
 class ItemRepository(ABC):
     @abstractmethod
     def save(self, item: Item) -> Item:
         pass
 
+    @abstractmethod
+    def save_all(self, items: List[Item]) -> List[Item]:
+        # 一次新增多筆 (同一個 Transaction)
+        pass
+
     @abstractmethod
     def get_by_id(self, item_id: str) -> Optional[Item]:
         pass
 
+    @abstractmethod
+    def get_by_id_for_update(self, item_id: str) -> Optional[Item]:
+        # 取得並鎖住這筆物品 (SELECT ... FOR UPDATE)，直到 Transaction 結束
+        pass
+
     @abstractmethod
     def get_by_owner_id(self, owner_id: str) -> List[Item]:
         pass
     
     @abstractmethod
-    def search(self, keyword: Optional[str], category: Optional[ItemCategory]) -> List[Item]:
+    def search(
+        self,
+        keyword: Optional[str],
+        category: Optional[ItemCategory],
+        limit: Optional[int] = None,
+        after: Optional[Tuple[datetime, str]] = None
+    ) -> List[Item]:
+        # limit / after: Keyset 分頁 (依 created_at, id 倒序)
+        pass
+
+    @abstractmethod
+    def iter_search(self, keyword: Optional[str], category: Optional[ItemCategory]) -> Iterator[Item]:
+        # 串流版本：一筆一筆產生，不會把整個結果載入記憶體
         pass
\ No newline at end of file
@@ -0,0 +1,114 @@
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from ..domain.entity import Item, ItemCategory, ItemStatus
+from .models import ItemModel
+from .repository import SqlAlchemyItemRepository
+from .search import ItemSearchBackend, get_search_backend
+from ...iam.infrastructure.models import UserModel
+from ...exchanges.infrastructure.models import ExchangeModel
+from ...exchanges.domain.entity import ExchangeStatus
+from ....pagination import STREAM_BATCH_SIZE, apply_keyset
+
+class AsyncSqlAlchemyItemRepository:
+    """
+    SqlAlchemyItemRepository 的 async 版本 (只有查詢，寫入仍走同步版)。
+    """
+
+    def __init__(self, db: AsyncSession, search_backend: Optional[ItemSearchBackend] = None):
+        self.db = db
+        self.search_backend = search_backend or get_search_backend()
+
+    async def get_by_id(self, item_id: str) -> Optional[Item]:
+        stmt = select(ItemModel, UserModel.name)\
+            .outerjoin(UserModel, ItemModel.owner_id == UserModel.id)\
+            .where(ItemModel.id == item_id)
+        result = (await self.db.execute(stmt)).first()
+        return self._to_entity(result[0], result[1]) if result else None
+
+    async def get_by_owner_id(self, owner_id: str) -> List[Item]:
+        Requester = aliased(UserModel)
+        stmt = select(
+            ItemModel,
+            UserModel.name,
+            Requester.name,
+            ExchangeModel.id,
+            ExchangeModel.status
+        )\
+            .outerjoin(UserModel, ItemModel.owner_id == UserModel.id)\
+            .outerjoin(
+                ExchangeModel,
+                (ExchangeModel.target_item_id == ItemModel.id) &
+                (ExchangeModel.status == ExchangeStatus.ACCEPTED)
+            )\
+            .outerjoin(Requester, ExchangeModel.requester_id == Requester.id)\
+            .where(ItemModel.owner_id == owner_id)\
+            .order_by(ItemModel.created_at.desc())
+
+        results = (await self.db.execute(stmt)).all()
+        return [
+            self._to_entity(
+                row[0],
+                owner_name=row[1],
+                partner_name=row[2],
+                exchange_id=row[3],
+                exchange_status=row[4]
+            )
+            for row in results
+        ]
+
+    async def search(
+        self,
+        keyword: Optional[str],
+        category: Optional[ItemCategory],
+        limit: Optional[int] = None,
+        after: Optional[Tuple[datetime, str]] = None
+    ) -> List[Item]:
+        stmt = self._search_stmt(category)
+
+        if keyword:
+            # 搜尋後端是同步 API (倒排索引可能需要查 DB 補資料)，透過 run_sync 執行
+            stmt = await self.db.run_sync(
+                lambda session: self.search_backend.filter(stmt, keyword, session, category, after, limit)
+            )
+            if not limit and not after:
+                stmt = self.search_backend.order_by_relevance(stmt, keyword, category)
+
+        stmt = apply_keyset(stmt, ItemModel.created_at, ItemModel.id, after)
+        if limit:
+            stmt = stmt.limit(limit)
+
+        results = (await self.db.execute(stmt)).all()
+        return [self._to_entity(row[0], row[1]) for row in results]
+
+    async def iter_search(self, keyword: Optional[str], category: Optional[ItemCategory]) -> AsyncIterator[Item]:
+        if keyword:
+            # 有關鍵字時用 Keyset 一頁一頁查 (與同步版相同)
+            after = None
+            while True:
+                items = await self.search(keyword, category, limit=STREAM_BATCH_SIZE, after=after)
+                for item in items:
+                    yield item
+                if len(items) < STREAM_BATCH_SIZE:
+                    return
+                after = (items[-1].created_at, items[-1].id)
+
+        stmt = apply_keyset(self._search_stmt(category), ItemModel.created_at, ItemModel.id, None)
+
+        # stream 會啟用 Server-side cursor，分批從 DB 取資料
+        result = await self.db.stream(stmt.execution_options(yield_per=STREAM_BATCH_SIZE))
+        async for row in result:
+            yield self._to_entity(row[0], row[1])
+
+    def _search_stmt(self, category: Optional[ItemCategory]):
+        stmt = select(ItemModel, UserModel.name)\
+            .outerjoin(UserModel, ItemModel.owner_id == UserModel.id)\
+            .where(ItemModel.status == ItemStatus.AVAILABLE)
+        if category:
+            stmt = stmt.where(ItemModel.category == category)
+        return stmt
+
+    # 與同步版共用 Mapper
+    _to_entity = SqlAlchemyItemRepository._to_entity
@@ -0,0 +1,100 @@
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Dict, Optional, Union
+
+from ..application.interfaces import ImageProcessingService, ImageVariant
+
+# Pillow 是選用套件：沒安裝時不產生縮圖，只保留原圖
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover
+    Image = None
+
+# iPhone 的 HEIC 需要 pillow-heif 才能解碼
+try:
+    from pillow_heif import register_heif_opener
+    register_heif_opener()
+except ImportError:  # pragma: no cover
+    pass
+
+logger = logging.getLogger(__name__)
+
+# 各尺寸的最長邊 (px)
+VARIANT_SIZES = {
+    "thumb": 200,   # 搜尋列表 / 交換列表的小圖
+    "card": 600,    # 物品卡片
+    "full": 1600,   # 詳情頁大圖
+}
+
+# 輸出格式 (WEBP 或 JPEG)
+_FORMATS = {
+    "WEBP": ("image/webp", "webp"),
+    "JPEG": ("image/jpeg", "jpg"),
+}
+
+
+def render_variants(source: Union[bytes, str], output_format: str = "WEBP", quality: int = 80) -> Dict[str, ImageVariant]:
+    """
+    解碼圖片 -> 依 EXIF 轉正 -> 產生各尺寸的圖片。
+    重新編碼時不帶入 EXIF，所以 GPS 等資訊會被移除。
+    source 可以是圖片內容或檔案路徑；大檔案傳路徑，原圖不用 pickle 傳到子 Process。
+    (在子 Process 中執行，只能使用可以 pickle 的參數與回傳值)
+    """
+    content_type, ext = _FORMATS[output_format]
+
+    with Image.open(source if isinstance(source, str) else io.BytesIO(source)) as original:
+        image = ImageOps.exif_transpose(original)
+        image = image.convert("RGBA" if output_format == "WEBP" and "A" in image.getbands() else "RGB")
+
+        variants = {}
+        for name, size in VARIANT_SIZES.items():
+            resized = image.copy()
+            resized.thumbnail((size, size), Image.LANCZOS)  # 只縮不放
+
+            buffer = io.BytesIO()
+            resized.save(buffer, format=output_format, quality=quality, optimize=True)
+            variants[name] = ImageVariant(content=buffer.getvalue(), content_type=content_type, ext=ext)
+        return variants
+
+
+class ProcessPoolImageProcessor(ImageProcessingService):
+    """
+    在 Process Pool 中產生縮圖，影像處理吃 CPU，不能佔住 API Worker。
+    Pool 等到第一次需要時才建立 (整個應用程式共用一個，在 lifespan 結束時關閉)。
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, timeout: float = 30.0):
+        self.max_workers = max_workers or int(os.getenv("IMAGE_PROCESS_WORKERS", "2"))
+        self.output_format = os.getenv("IMAGE_VARIANT_FORMAT", "WEBP").upper()
+        self.timeout = timeout
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return Image is not None
+
+    def generate_variants(self, source: Union[bytes, str]) -> Dict[str, ImageVariant]:
+        if not self.available:
+            return {}
+        future = self._get_executor().submit(render_variants, source, self.output_format)
+        return future.result(timeout=self.timeout)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # 用 spawn 而不是 fork：API Process 裡有很多執行緒，fork 可能會 deadlock
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=get_context("spawn"))
+        return self._executor
@@ -0,0 +1,361 @@
+import copy
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+
+from ....database import is_read_replica
+from ....metrics import registry
+from ....unit_of_work import after_commit, in_unit_of_work
+from ..domain.entity import ActiveExchange, ExchangePartner, Item, ItemCategory, ItemStatus
+from ..domain.repository import ItemRepository
+from .models import ItemModel
+
+logger = logging.getLogger(__name__)
+
+item_cache_requests = registry.counter(
+    "item_cache_requests_total", "物品快取查詢次數 (tier=local / shared, result=hit / miss / error)"
+)
+item_cache_lookup_seconds = registry.histogram(
+    "item_cache_lookup_seconds", "get_by_id 的時間 (result=hit / miss / bypass)"
+)
+
+
+def _item_to_json(item: Item) -> str:
+    data = asdict(item)
+    data["created_at"] = item.created_at.isoformat() if item.created_at else None
+    data["updated_at"] = item.updated_at.isoformat() if item.updated_at else None
+    return json.dumps(data, ensure_ascii=False)
+
+
+def _item_from_json(raw) -> Item:
+    data = json.loads(raw)
+    active = data.pop("active_exchange", None)
+    return Item(
+        **{
+            **data,
+            "category": ItemCategory(data["category"]),
+            "status": ItemStatus(data["status"]),
+            "created_at": datetime.fromisoformat(data["created_at"]) if data["created_at"] else None,
+            "updated_at": datetime.fromisoformat(data["updated_at"]) if data["updated_at"] else None,
+        },
+        active_exchange=(
+            ActiveExchange(
+                exchange_id=active["exchange_id"],
+                status=active["status"],
+                partner=ExchangePartner(**active["partner"]),
+            )
+            if active
+            else None
+        ),
+    )
+
+
+class ItemCache:
+    """
+    物品詳情 (get_by_id 的結果) 的兩層快取：
+    - local: 每個 Process 各自的 LRU，有 TTL；其他機器的修改靠 outbox 的 broadcast 清掉 (約 OUTBOX_POLL_SECONDS)，
+      broadcast 沒收到 (例如 OUTBOX_BROADCAST_ENABLED=false) 時最多延遲 TTL 秒
+    - shared: 選用，Redis 相容的 client (get / set)，多台機器共用，修改時寫入 tombstone
+    存進去與拿出來的都是複本，呼叫端修改 Item 不會影響快取內容。
+
+    回填 (查 DB 後 put) 與修改 (invalidate) 可能同時發生：先用 generation() 記下查 DB 前的版本，
+    put 時如果這段期間被 invalidate 過就不寫入，避免把舊資料放回去。
+    shared tier 的 tombstone 在 TOMBSTONE_TTL 內擋住所有回填 (SET NX)，其他機器也不會寫回舊資料。
+    """
+
+    KEY_PREFIX = "item:"
+    TOMBSTONE = "-"
+    # 要比一次 DB 查詢久很多
+    TOMBSTONE_TTL = 10
+
+    def __init__(self, max_size: int = 5000, ttl: float = 30.0, shared_client=None, shared_ttl: int = 300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.shared = shared_client
+        self.shared_ttl = shared_ttl
+        self.hits = 0
+        self.misses = 0
+
+        self._entries: "OrderedDict[str, Tuple[Item, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # 最近被 invalidate 的 id -> 當時的版本；超過上限時丟掉最舊的，並記下丟掉的最大版本
+        self._sequence = 0
+        self._invalidated: "OrderedDict[str, int]" = OrderedDict()
+        self._forgotten = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def get(self, item_id: str) -> Optional[Item]:
+        with self._lock:
+            generation = self._sequence
+            entry = self._entries.get(item_id)
+            if entry is not None and time.monotonic() < entry[1]:
+                self._entries.move_to_end(item_id)
+                self.hits += 1
+                item_cache_requests.inc(tier="local", result="hit")
+                return copy.deepcopy(entry[0])
+            if entry is not None:
+                del self._entries[item_id]
+        item_cache_requests.inc(tier="local", result="miss")
+
+        item = self._get_shared(item_id)
+        if item is not None:
+            self.hits += 1
+            self._put_local(item, generation)
+            return item
+
+        self.misses += 1
+        return None
+
+    def generation(self) -> int:
+        """查 DB 之前先取得，回填時交給 put"""
+        with self._lock:
+            return self._sequence
+
+    def put(self, item: Item, generation: Optional[int] = None) -> None:
+        """generation: 回填時傳入查 DB 前的 generation()，之後被 invalidate 過就不寫入"""
+        if not self._put_local(item, generation):
+            item_cache_requests.inc(tier="local", result="stale_fill")
+            return
+        if self.shared is not None:
+            try:
+                # 回填不可以蓋掉 tombstone (或其他人剛寫入的值)
+                stored = self.shared.set(
+                    self.KEY_PREFIX + item.id, _item_to_json(item), ex=self.shared_ttl, nx=generation is not None
+                )
+                if generation is not None and not stored:
+                    item_cache_requests.inc(tier="shared", result="stale_fill")
+            except Exception as e:
+                item_cache_requests.inc(tier="shared", result="error")
+                logger.warning(f"Failed to write item {item.id} to shared cache: {e}")
+
+    def invalidate(self, *item_ids: Optional[str]) -> None:
+        ids = [i for i in item_ids if i]
+        if not ids:
+            return
+        self.invalidate_local(*ids)
+        if self.shared is not None:
+            try:
+                for item_id in ids:
+                    self.shared.set(self.KEY_PREFIX + item_id, self.TOMBSTONE, ex=self.TOMBSTONE_TTL)
+            except Exception as e:
+                item_cache_requests.inc(tier="shared", result="error")
+                logger.warning(f"Failed to invalidate items {ids} in shared cache: {e}")
+
+    def invalidate_local(self, *item_ids: Optional[str]) -> None:
+        """只清這個 Process 的 local tier (其他 Process 收到 outbox 的 broadcast 時各自呼叫)"""
+        ids = [i for i in item_ids if i]
+        if not ids:
+            return
+        with self._lock:
+            self._sequence += 1
+            for item_id in ids:
+                self._entries.pop(item_id, None)
+                self._invalidated.pop(item_id, None)
+                self._invalidated[item_id] = self._sequence
+            while len(self._invalidated) > max(self.max_size, 1000):
+                _, sequence = self._invalidated.popitem(last=False)
+                self._forgotten = max(self._forgotten, sequence)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def _invalidated_since(self, item_id: str, generation: int) -> bool:
+        # 已經不在紀錄裡的 id，最後一次 invalidate 不會晚於 _forgotten
+        return self._invalidated.get(item_id, self._forgotten) > generation
+
+    def _put_local(self, item: Item, generation: Optional[int] = None) -> bool:
+        with self._lock:
+            if generation is not None and self._invalidated_since(item.id, generation):
+                return False
+            self._entries.pop(item.id, None)
+            self._entries[item.id] = (copy.deepcopy(item), time.monotonic() + self.ttl)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return True
+
+    def _get_shared(self, item_id: str) -> Optional[Item]:
+        if self.shared is None:
+            return None
+        try:
+            raw = self.shared.get(self.KEY_PREFIX + item_id)
+        except Exception as e:
+            # Redis 掛掉時直接查 DB
+            item_cache_requests.inc(tier="shared", result="error")
+            logger.warning(f"Failed to read item {item_id} from shared cache: {e}")
+            return None
+        if isinstance(raw, bytes):
+            raw = raw.decode("utf-8")
+        if not raw or raw == self.TOMBSTONE:
+            item_cache_requests.inc(tier="shared", result="miss")
+            return None
+        item_cache_requests.inc(tier="shared", result="hit")
+        return _item_from_json(raw)
+
+
+class CachedItemRepository(ItemRepository):
+    """
+    包住真正的 ItemRepository，只快取 get_by_id (其他方法直接轉交)。
+    - 在 UnitOfWork (Transaction) 裡不讀也不寫快取，避免把還沒 commit 的狀態放進去；
+      要拿來做判斷的讀取 (例如交換前檢查物品狀態) 也要在 UnitOfWork 裡讀
+    - save / save_all 時馬上清掉，commit 之後再清一次 (避免 commit 前被其他請求用舊資料填回去)
+    - Replica 的 Session 只讀快取、不回填 (Replica 可能還沒跟上剛才的修改)
+    """
+
+    def __init__(self, inner: ItemRepository, cache: "ItemCache"):
+        self.inner = inner
+        self.cache = cache
+        self.db = getattr(inner, "db", None)
+
+    def save(self, item: Item) -> Item:
+        saved = self.inner.save(item)
+        self._invalidate_after_commit(item.id)
+        return saved
+
+    def save_all(self, items: List[Item]) -> List[Item]:
+        saved = self.inner.save_all(items)
+        # 與 save 相同 (目前只用在新增；之後用來更新時也不會留下舊資料)
+        self._invalidate_after_commit(*[item.id for item in items])
+        return saved
+
+    def get_by_id(self, item_id: str) -> Optional[Item]:
+        start = time.perf_counter()
+        if not self.cache.enabled or (self.db is not None and in_unit_of_work(self.db)):
+            item = self.inner.get_by_id(item_id)
+            item_cache_lookup_seconds.observe(time.perf_counter() - start, result="bypass")
+            return item
+
+        item = self.cache.get(item_id)
+        if item is not None:
+            item_cache_lookup_seconds.observe(time.perf_counter() - start, result="hit")
+            return item
+
+        generation = self.cache.generation()
+        item = self.inner.get_by_id(item_id)
+        if item is not None and not (self.db is not None and is_read_replica(self.db)):
+            self.cache.put(item, generation)
+        item_cache_lookup_seconds.observe(time.perf_counter() - start, result="miss")
+        return item
+
+    def get_by_id_for_update(self, item_id: str) -> Optional[Item]:
+        # 上鎖的讀取一定要看 DB 的最新值
+        return self.inner.get_by_id_for_update(item_id)
+
+    def get_by_owner_id(self, owner_id: str) -> List[Item]:
+        return self.inner.get_by_owner_id(owner_id)
+
+    def search(self, keyword, category, limit=None, after=None) -> List[Item]:
+        return self.inner.search(keyword, category, limit, after)
+
+    def iter_search(self, keyword, category) -> Iterator[Item]:
+        return self.inner.iter_search(keyword, category)
+
+    def _invalidate_after_commit(self, *item_ids: str) -> None:
+        self.cache.invalidate(*item_ids)
+        if self.db is not None:
+            after_commit(self.db, lambda: self.cache.invalidate(*item_ids))
+
+    def __getattr__(self, name):
+        # 其他不在介面上的屬性 (例如 search_backend) 直接轉給原本的 Repository
+        return getattr(self.inner, name)
+
+
+class AsyncCachedItemRepository:
+    """
+    CachedItemRepository 的 async 版本 (包住 AsyncSqlAlchemyItemRepository)，與同步版共用同一個 ItemCache。
+    async 路徑只有查詢，修改後的清除由同步版的 save 與 outbox 事件負責。
+    shared tier 的 client 是同步的，有設定時放到 threadpool 執行，避免卡住 event loop。
+    """
+
+    def __init__(self, inner, cache: ItemCache):
+        self.inner = inner
+        self.cache = cache
+
+    async def get_by_id(self, item_id: str) -> Optional[Item]:
+        start = time.perf_counter()
+        if not self.cache.enabled:
+            item = await self.inner.get_by_id(item_id)
+            item_cache_lookup_seconds.observe(time.perf_counter() - start, result="bypass")
+            return item
+
+        item = await self._call_cache(self.cache.get, item_id)
+        if item is not None:
+            item_cache_lookup_seconds.observe(time.perf_counter() - start, result="hit")
+            return item
+
+        generation = self.cache.generation()
+        item = await self.inner.get_by_id(item_id)
+        if item is not None:
+            await self._call_cache(self.cache.put, item, generation)
+        item_cache_lookup_seconds.observe(time.perf_counter() - start, result="miss")
+        return item
+
+    async def _call_cache(self, method, *args):
+        if self.cache.shared is None:
+            return method(*args)
+        return await run_in_threadpool(method, *args)
+
+    def __getattr__(self, name):
+        # get_by_owner_id / search / iter_search 直接轉給原本的 Repository
+        return getattr(self.inner, name)
+
+
+def subscribe_invalidation(dispatcher) -> None:
+    """
+    交換狀態變更會改到物品狀態 (TRADING / TRADED / AVAILABLE)，收到事件時清掉相關物品。
+    刊登者改暱稱時，快取裡的 owner_name (物品詳情的 ETag 也用到) 要一起清掉。
+    - subscribe: 只有一台機器處理 (失敗會重試)，清 shared tier 並寫入 tombstone
+    - subscribe_broadcast: 每個 Process 都會處理，清自己的 local tier
+    """
+    from ...exchanges.domain.events import ExchangeAccepted, ExchangeCancelled, ExchangeCompleted, UserProfileChanged
+
+    def item_ids_of(event) -> List[Optional[str]]:
+        if isinstance(event, UserProfileChanged):
+            db = dispatcher.session_factory()
+            try:
+                return list(db.scalars(select(ItemModel.id).where(ItemModel.owner_id == event.user_id)))
+            finally:
+                db.close()
+        return [event.target_item_id, event.offered_item_id]
+
+    for event_type in (ExchangeAccepted, ExchangeCancelled, ExchangeCompleted, UserProfileChanged):
+        dispatcher.subscribe(event_type, lambda event: item_cache.invalidate(*item_ids_of(event)))
+        dispatcher.subscribe_broadcast(event_type, lambda event: item_cache.invalidate_local(*item_ids_of(event)))
+
+
+def create_item_cache() -> ItemCache:
+    """ITEM_CACHE_SIZE=0 可以關閉；有設定 ITEM_CACHE_REDIS_URL 才啟用 shared tier"""
+    shared_client = None
+    redis_url = os.getenv("ITEM_CACHE_REDIS_URL")
+    if redis_url:
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("ITEM_CACHE_REDIS_URL is set but the redis package is not installed")
+        shared_client = redis.Redis.from_url(redis_url, socket_timeout=0.5)
+
+    return ItemCache(
+        max_size=int(os.getenv("ITEM_CACHE_SIZE", "5000")),
+        ttl=float(os.getenv("ITEM_CACHE_TTL_SECONDS", "30")),
+        shared_client=shared_client,
+    )
+
+
+# 整個 Process 共用
+item_cache = create_item_cache()
+registry.callback_gauge("item_cache", "物品快取 (size / hits / misses)", "stat", item_cache.stats)
@@ -1,11 +1,18 @@
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, Enum as SAEnum
+from sqlalchemy import DDL, JSON, Column, Index, String, DateTime, Enum as SAEnum, event
 from sqlalchemy.orm import Mapped, mapped_column
 from ...iam.infrastructure.models import Base  # 重用同一個 Base
 from ..domain.entity import ItemStatus, ItemCategory
 
 class ItemModel(Base):
     __tablename__ = "items"
+    __table_args__ = (
+        # 搜尋: status = AVAILABLE (+ category) 再依 created_at 排序 / 分頁
+        Index("ix_items_status_category_created_at", "status", "category", "created_at"),
+        # 同一張圖片 (例如直接上傳的 image_key) 只能用在一個物品上
+        # MySQL 的 utf8mb4 索引長度有上限，只取前 255 字 (S3 網址遠短於此)
+        Index("uq_items_image_url", "image_url", unique=True, mysql_length=255),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, index=True)
     owner_id: Mapped[str] = mapped_column(String(36), index=True) # 誰刊登的
@@ -17,4 +24,16 @@ class ItemModel(Base):
     status: Mapped[str] = mapped_column(SAEnum(ItemStatus), default=ItemStatus.AVAILABLE)
     
     image_url: Mapped[str] = mapped_column(String(1024), nullable=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
\ No newline at end of file
+    image_variants: Mapped[dict] = mapped_column(JSON, nullable=True)  # 各尺寸縮圖網址
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+    # 每次修改都會更新，物品詳情的 ETag 由它產生
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+# MySQL 專用: 標題 + 描述的全文索引 (ngram parser 支援中文)，給 MySqlFullTextSearchBackend 使用
+event.listen(
+    ItemModel.__table__,
+    "after_create",
+    DDL(
+        "ALTER TABLE items ADD FULLTEXT INDEX ft_items_title_description (title, description) WITH PARSER ngram"
+    ).execute_if(dialect="mysql")
+)
\ No newline at end of file
@@ -1,18 +1,54 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session, aliased
 from ..domain.entity import Item, ItemCategory, ItemStatus, ActiveExchange, ExchangePartner
-from ..domain.repository import ItemRepository
+from ..domain.repository import ImageAlreadyUsedError, ItemRepository
 from .models import ItemModel
+from .search import ItemSearchBackend, get_search_backend
 from ...iam.infrastructure.models import UserModel
 from ...exchanges.infrastructure.models import ExchangeModel
 from ...exchanges.domain.entity import ExchangeStatus
+from ....pagination import STREAM_BATCH_SIZE, apply_keyset, to_db_precision
+from ....unit_of_work import after_commit, commit_or_flush, in_unit_of_work
 
 class SqlAlchemyItemRepository(ItemRepository):
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, search_backend: Optional[ItemSearchBackend] = None):
         self.db = db
+        # 關鍵字搜尋的實作 (LIKE / MySQL FULLTEXT / 倒排索引)，預設依環境變數決定
+        self.search_backend = search_backend or get_search_backend()
 
     def save(self, item: Item) -> Item:
-        item_model = ItemModel(
+        # 使用 merge 支援新增與更新
+        self.db.merge(self._to_model(item))
+        try:
+            commit_or_flush(self.db)
+        except IntegrityError as e:
+            # 在 UnitOfWork 裡由外層 rollback
+            if not in_unit_of_work(self.db):
+                self.db.rollback()
+            if "image_url" in str(e.orig):
+                raise ImageAlreadyUsedError("This image is already used by another item") from e
+            raise
+        # 同步更新搜尋索引 (只有倒排索引後端需要)，要等 commit 成功後才更新
+        after_commit(self.db, lambda: self.search_backend.index(item))
+        return item
+
+    def save_all(self, items: List[Item]) -> List[Item]:
+        # 只用在新增：不用 merge (每筆先 SELECT)，flush 時 SQLAlchemy 會合併成一個多列 INSERT
+        self.db.add_all([self._to_model(item) for item in items])
+        commit_or_flush(self.db)
+
+        def index_all():
+            for item in items:
+                self.search_backend.index(item)
+
+        after_commit(self.db, index_all)
+        return items
+
+    @staticmethod
+    def _to_model(item: Item) -> ItemModel:
+        return ItemModel(
             id=item.id,
             owner_id=item.owner_id,
             title=item.title,
@@ -20,12 +56,9 @@ class SqlAlchemyItemRepository(ItemRepository):
             category=item.category,
             status=item.status,
             image_url=item.image_url,
-            created_at=item.created_at
+            image_variants=item.image_variants,
+            created_at=to_db_precision(item.created_at)
         )
-        # 使用 merge 支援新增與更新
-        self.db.merge(item_model)
-        self.db.commit()
-        return item
 
     def get_by_id(self, item_id: str) -> Optional[Item]:
         # 修改：加入 Join UserModel 並選取 UserModel.name
@@ -37,6 +70,18 @@ class SqlAlchemyItemRepository(ItemRepository):
         # result 會是 (ItemModel, owner_name) 的 Tuple
         return self._to_entity(result[0], result[1]) if result else None
     
+    def get_by_id_for_update(self, item_id: str) -> Optional[Item]:
+        # SELECT ... FOR UPDATE: 鎖住這筆物品直到 Transaction 結束 (只鎖 items，不鎖 join 的 users)
+        # populate_existing: Session 裡已經有舊的資料也要用 DB 的最新值覆蓋
+        result = self.db.query(ItemModel, UserModel.name)\
+            .outerjoin(UserModel, ItemModel.owner_id == UserModel.id)\
+            .filter(ItemModel.id == item_id)\
+            .with_for_update(of=ItemModel)\
+            .populate_existing()\
+            .first()
+
+        return self._to_entity(result[0], result[1]) if result else None
+
     def get_by_owner_id(self, owner_id: str) -> List[Item]:
         Requester = aliased(UserModel)
 
@@ -71,7 +116,51 @@ class SqlAlchemyItemRepository(ItemRepository):
             for row in results
         ]
     
-    def search(self, keyword: Optional[str], category: Optional[ItemCategory]) -> List[Item]:
+    def search(
+        self,
+        keyword: Optional[str],
+        category: Optional[ItemCategory],
+        limit: Optional[int] = None,
+        after: Optional[Tuple[datetime, str]] = None
+    ) -> List[Item]:
+        query = self._search_query(keyword, category, limit, after)
+
+        # 沒有分頁時，關鍵字搜尋依相關度排序；分頁時固定依時間排序 (Keyset 需要穩定的順序)
+        if keyword and not limit and not after:
+            query = self.search_backend.order_by_relevance(query, keyword, category)
+
+        query = apply_keyset(query, ItemModel.created_at, ItemModel.id, after)
+        if limit:
+            query = query.limit(limit)
+
+        results = query.all()
+        # results 是 List[(ItemModel, owner_name)]
+        return [self._to_entity(row[0], row[1]) for row in results]
+
+    def iter_search(self, keyword: Optional[str], category: Optional[ItemCategory]) -> Iterator[Item]:
+        if keyword:
+            # 有關鍵字時用 Keyset 一頁一頁查 (搜尋後端每次只需要給一頁的 id，不會產生超長的 IN)
+            after = None
+            while True:
+                items = self.search(keyword, category, limit=STREAM_BATCH_SIZE, after=after)
+                yield from items
+                if len(items) < STREAM_BATCH_SIZE:
+                    return
+                after = (items[-1].created_at, items[-1].id)
+
+        # yield_per 會啟用 Server-side cursor，分批從 DB 取資料
+        query = apply_keyset(self._search_query(keyword, category), ItemModel.created_at, ItemModel.id, None)\
+            .yield_per(STREAM_BATCH_SIZE)
+        for row in query:
+            yield self._to_entity(row[0], row[1])
+
+    def _search_query(
+        self,
+        keyword: Optional[str],
+        category: Optional[ItemCategory],
+        limit: Optional[int] = None,
+        after: Optional[Tuple[datetime, str]] = None
+    ):
         # 修改：查詢時同時選取 ItemModel 和 UserModel.name
         query = self.db.query(ItemModel, UserModel.name)\
             .outerjoin(UserModel, ItemModel.owner_id == UserModel.id)\
@@ -81,11 +170,9 @@ class SqlAlchemyItemRepository(ItemRepository):
             query = query.filter(ItemModel.category == category)
         
         if keyword:
-            query = query.filter(ItemModel.title.ilike(f"%{keyword}%"))
-            
-        results = query.all()
-        # results 是 List[(ItemModel, owner_name)]
-        return [self._to_entity(row[0], row[1]) for row in results]
+            query = self.search_backend.filter(query, keyword, self.db, category, after, limit)
+
+        return query
 
     def _to_entity(
         self, 
@@ -116,6 +203,8 @@ class SqlAlchemyItemRepository(ItemRepository):
             category=ItemCategory(model.category),
             status=ItemStatus(model.status),
             image_url=model.image_url,
+            image_variants=model.image_variants,
             created_at=model.created_at,
+            updated_at=model.updated_at,
             active_exchange=active_exchange_obj
         )
\ No newline at end of file
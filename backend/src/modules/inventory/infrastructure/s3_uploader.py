@@ -1,49 +1,193 @@
+import logging
 import os
+import threading
+from datetime import datetime, timedelta, timezone
 import boto3
-from ..application.interfaces import ImageStorageService
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from boto3.s3.transfer import TransferConfig
+from typing import BinaryIO, Iterator, List, Optional
+from ..application.interfaces import ImageStorageService, PresignedUpload, StoredImage
+from .upload_limits import ALLOWED_IMAGE_TYPES
+from ....instrumentation import external_call_seconds
 import uuid
 
+logger = logging.getLogger(__name__)
+
+# 前端直接上傳到 S3 的檔案放在 uploads/{user_id}/ 底下 (還沒掛到物品上的會被定期清掉)
+UPLOAD_PREFIX = "uploads/"
+# API Server 上傳的原圖與縮圖
+ITEM_PREFIX = "items/"
+
+# 超過 8MB 改用 Multipart Upload，每段 8MB
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=4,
+)
+
 class S3ImageStorage(ImageStorageService):
+    """
+    整個應用程式共用一個 (在 main.py 的 lifespan 建立)。
+    boto3 client 等到第一次真正上傳時才建立，所以單純查詢的 API 不會付出建立 client 的成本。
+    """
+
     def __init__(self):
         self.bucket_name = os.getenv("S3_BUCKET_NAME")
-        if not self.bucket_name:
-             raise ValueError("S3_BUCKET_NAME environment variable is not set")
         self.region = os.getenv("AWS_S3_REGION", "us-east-1")
-        
+        self.max_pool_connections = int(os.getenv("S3_MAX_POOL_CONNECTIONS", "20"))
+
+        self._s3_client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def s3_client(self):
+        if self._s3_client is None:
+            with self._client_lock:
+                if self._s3_client is None:
+                    self._s3_client = self._create_client()
+        return self._s3_client
+
+    def _create_client(self):
+        if not self.bucket_name:
+             # 設定錯誤，不是請求內容的問題 (ValueError 會被 API 當成 400)
+             raise RuntimeError("S3_BUCKET_NAME environment variable is not set")
+
+        # 連線池大小要能應付 threadpool 同時上傳的數量，並重用 TCP 連線
+        config = Config(
+            max_pool_connections=self.max_pool_connections,
+            retries={'max_attempts': 3, 'mode': 'standard'},
+            tcp_keepalive=True,
+            # Presigned POST 要用 SigV4 (新的 Region 不接受 SigV2)
+            signature_version='s3v4'
+        )
+
         # 取得環境變數中的金鑰 (本機開發用)
         aws_access_key = os.getenv("AWS_ACCESS_KEY_ID")
         aws_secret_key = os.getenv("AWS_SECRET_ACCESS_KEY")
 
         if aws_access_key and aws_secret_key:
             # 情況 A: 本機開發 (有 .env 金鑰)
-            print("Using AWS Access Keys from .env")
-            self.s3_client = boto3.client(
+            logger.info("Using AWS Access Keys from .env")
+            return boto3.client(
                 's3',
                 aws_access_key_id=aws_access_key,
                 aws_secret_access_key=aws_secret_key,
-                region_name=self.region
+                region_name=self.region,
+                config=config
             )
         else:
             # 情況 B: EC2 環境 (使用 IAM Role)
             # 當不傳入 key id/secret 時，boto3 會自動去抓 EC2 的 Instance Metadata
-            print("Using IAM Role (Instance Profile)")
-            self.s3_client = boto3.client(
+            logger.info("Using IAM Role (Instance Profile)")
+            return boto3.client(
                 's3',
-                region_name=self.region
+                region_name=self.region,
+                config=config
             )
 
     def upload_image(self, file_content: bytes, filename: str, content_type: str) -> str:
+        unique_filename = self._generate_key(filename)
+
+        # 上傳
+        with external_call_seconds.time(service="s3", operation="put_object"):
+            self.s3_client.put_object(
+                Bucket=self.bucket_name,
+                Key=unique_filename,
+                Body=file_content,
+                ContentType=content_type
+            )
+        
+        # 回傳網址
+        return self._url_for(unique_filename)
+
+    def upload_stream(self, file_obj: BinaryIO, filename: str, content_type: str) -> str:
+        unique_filename = self._generate_key(filename)
+
+        # upload_fileobj 會分段讀取 file_obj，大檔自動改用 Multipart Upload
+        with external_call_seconds.time(service="s3", operation="upload_fileobj"):
+            self.s3_client.upload_fileobj(
+                file_obj,
+                self.bucket_name,
+                unique_filename,
+                ExtraArgs={'ContentType': content_type},
+                Config=TRANSFER_CONFIG
+            )
+
+        return self._url_for(unique_filename)
+
+    def _generate_key(self, filename: str) -> str:
         # 產生唯一檔名
         ext = filename.split('.')[-1] if '.' in filename else "jpg"
-        unique_filename = f"items/{uuid.uuid4()}.{ext}"
+        return f"{ITEM_PREFIX}{uuid.uuid4()}.{ext}"
 
-        # 上傳
-        self.s3_client.put_object(
+    def _url_for(self, key: str) -> str:
+        return f"https://{self.bucket_name}.s3.{self.region}.amazonaws.com/{key}"
+
+    # --- 前端直接上傳 (Presigned POST) ---
+
+    def create_presigned_upload(self, owner_id: str, content_type: str, max_bytes: int, expires_in: int) -> PresignedUpload:
+        """
+        產生 Presigned POST (只在本機簽章，不會呼叫 S3)。
+        用 POST 而不是 PUT：POST 的 Policy 可以限制檔案大小 (content-length-range) 與 Content-Type。
+        副檔名由 content_type 決定 (前端不能指定 .html 之類的副檔名)。
+        """
+        ext = ALLOWED_IMAGE_TYPES.get(content_type)
+        if ext is None:
+            raise ValueError(f"Unsupported content type: {content_type}")
+        key = f"{UPLOAD_PREFIX}{owner_id}/{uuid.uuid4()}.{ext}"
+        post = self.s3_client.generate_presigned_post(
             Bucket=self.bucket_name,
-            Key=unique_filename,
-            Body=file_content,
-            ContentType=content_type
+            Key=key,
+            Fields={"Content-Type": content_type},
+            Conditions=[
+                {"Content-Type": content_type},
+                ["content-length-range", 1, max_bytes],
+            ],
+            ExpiresIn=expires_in,
         )
-        
-        # 回傳網址
-        return f"https://{self.bucket_name}.s3.{self.region}.amazonaws.com/{unique_filename}"
\ No newline at end of file
+        return PresignedUpload(key=key, url=post["url"], fields=post["fields"])
+
+    def is_upload_of(self, owner_id: str, key: str) -> bool:
+        # 只能使用自己上傳的檔案
+        return key.startswith(f"{UPLOAD_PREFIX}{owner_id}/") and ".." not in key
+
+    def head_image(self, key: str) -> Optional[StoredImage]:
+        """只讀 metadata (HEAD)，不下載內容；不存在時回傳 None"""
+        try:
+            with external_call_seconds.time(service="s3", operation="head_object"):
+                head = self.s3_client.head_object(Bucket=self.bucket_name, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return StoredImage(key=key, size=head["ContentLength"], content_type=head.get("ContentType", ""))
+
+    def url_for(self, key: str) -> str:
+        return self._url_for(key)
+
+    def item_key_of(self, url: str) -> Optional[str]:
+        # 只認得這個 bucket 裡 items/ 底下的 URL (前端直接上傳的 uploads/ 由 sweeper 處理)
+        base = self._url_for("")
+        if not url or not url.startswith(base + ITEM_PREFIX):
+            return None
+        return url[len(base):]
+
+    def iter_uploads(self, older_than: timedelta) -> Iterator[str]:
+        """列出 uploads/ 底下超過 older_than 的檔案 (一次 1000 筆分頁)"""
+        cutoff = datetime.now(timezone.utc) - older_than
+        paginator = self.s3_client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=UPLOAD_PREFIX):
+            for obj in page.get("Contents", []):
+                if obj["LastModified"] < cutoff:
+                    yield obj["Key"]
+
+    def delete_images(self, keys: List[str]) -> None:
+        # delete_objects 一次最多 1000 個
+        for start in range(0, len(keys), 1000):
+            chunk = keys[start:start + 1000]
+            with external_call_seconds.time(service="s3", operation="delete_objects"):
+                self.s3_client.delete_objects(
+                    Bucket=self.bucket_name,
+                    Delete={"Objects": [{"Key": key} for key in chunk], "Quiet": True},
+                )
@@ -0,0 +1,312 @@
+import heapq
+import math
+import os
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import case, false, or_
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.orm import Session
+
+from ....pagination import to_db_precision
+from ..domain.entity import Item, ItemCategory, ItemStatus
+from .models import ItemModel
+
+# 搜尋後端 (可用環境變數 ITEM_SEARCH_BACKEND 切換)
+# - like:     ILIKE '%keyword%' (預設，任何資料庫都能用，但無法使用索引)
+# - fulltext: MySQL FULLTEXT (ngram parser)，需要 ft_items_title_description 索引
+# - memory:   Process 內的倒排索引 (CJK unigram/bigram + BM25)
+#
+# category / after / limit 是 Repository 之後會加在 SQL 上的條件 (分類、Keyset 分頁)，
+# 用 SQL 比對的後端可以忽略；自己維護索引的後端要先在索引內套用，才不會只拿到部分結果。
+
+
+class ItemSearchBackend(ABC):
+    @abstractmethod
+    def filter(
+        self,
+        query,
+        keyword: str,
+        db: Session,
+        category: Optional[ItemCategory] = None,
+        after: Optional[Tuple[datetime, str]] = None,
+        limit: Optional[int] = None,
+    ):
+        """只留下符合 keyword 的物品"""
+        pass
+
+    def order_by_relevance(self, query, keyword: str, category: Optional[ItemCategory] = None):
+        """依相關度排序 (不支援的後端就維持原順序)"""
+        return query
+
+    def index(self, item: Item) -> None:
+        """物品新增/更新時呼叫 (需要自己維護索引的後端才要實作)"""
+        pass
+
+
+class LikeSearchBackend(ItemSearchBackend):
+    def filter(self, query, keyword: str, db: Session, category=None, after=None, limit=None):
+        pattern = f"%{keyword}%"
+        return query.filter(or_(ItemModel.title.ilike(pattern), ItemModel.description.ilike(pattern)))
+
+
+class MySqlFullTextSearchBackend(ItemSearchBackend):
+    """
+    MATCH (title, description) AGAINST (... IN BOOLEAN MODE)
+    ngram parser 會把中文切成 2 字一組，所以「計算機」也搜得到。
+    """
+
+    def filter(self, query, keyword: str, db: Session, category=None, after=None, limit=None):
+        return query.filter(self._match(keyword))
+
+    def order_by_relevance(self, query, keyword: str, category=None):
+        return query.order_by(self._match(keyword).desc())
+
+    def _match(self, keyword: str):
+        # 每個詞都必須出現 (+)，詞內用雙引號當成片語比對
+        words = [w.replace('"', "") for w in keyword.split()]
+        against = " ".join(f'+"{w}"' for w in words if w)
+        return match(ItemModel.title, ItemModel.description, against=against).in_boolean_mode()
+
+
+# --- 倒排索引 ---
+
+_CJK = r"㐀-䶿一-鿿豈-﫿぀-ヿ가-힯"
+_TOKEN_PATTERN = re.compile(rf"[{_CJK}]+|[^\W_{_CJK}]+", re.UNICODE)
+_CJK_PATTERN = re.compile(rf"[{_CJK}]")
+
+
+def tokenize(text: Optional[str], for_query: bool = False) -> List[str]:
+    """
+    英數字: 以單字為單位 (轉小寫)
+    中日韓: 建索引時 unigram + bigram，例如「計算機」-> 「計」「算」「機」「計算」「算機」，
+           所以只打一個字 (例如「書」) 也搜得到。
+           查詢時兩個字以上只用 bigram (posting list 短很多)，只有一個字才用 unigram。
+    """
+    tokens: List[str] = []
+    for run in _TOKEN_PATTERN.findall((text or "").lower()):
+        if not _CJK_PATTERN.match(run):
+            tokens.append(run)
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            if not for_query:
+                tokens.extend(run)
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+class InvertedIndex:
+    """
+    執行緒安全的 BM25 倒排索引。
+    標題的權重比描述高 (TITLE_BOOST)。
+    每份文件可以附帶 attrs (例如狀態、分類)，搜尋時用 where 在排名前先過濾。
+    """
+
+    K1 = 1.2
+    B = 0.75
+    TITLE_BOOST = 2
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._doc_terms: Dict[str, Counter] = {}
+        self._doc_length: Dict[str, int] = {}
+        self._doc_attrs: Dict[str, object] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def add(self, doc_id: str, title: Optional[str], description: Optional[str], attrs: object = None) -> None:
+        terms = Counter(tokenize(title) * self.TITLE_BOOST + tokenize(description))
+        with self._lock:
+            self._remove(doc_id)
+            self._doc_terms[doc_id] = terms
+            self._doc_attrs[doc_id] = attrs
+            self._doc_length[doc_id] = sum(terms.values())
+            self._total_length += self._doc_length[doc_id]
+            for term, tf in terms.items():
+                self._postings[term][doc_id] = tf
+
+    def _remove(self, doc_id: str) -> None:
+        old_terms = self._doc_terms.pop(doc_id, None)
+        if not old_terms:
+            return
+        self._total_length -= self._doc_length.pop(doc_id)
+        self._doc_attrs.pop(doc_id, None)
+        for term in old_terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+
+    def search(
+        self,
+        keyword: str,
+        limit: Optional[int] = None,
+        where: Optional[Callable[[str, object], bool]] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        回傳 [(doc_id, score)]，只保留包含所有查詢詞、且 where(doc_id, attrs) 為真的文件，分數高的在前面。
+        where 在截斷 (limit) 之前套用，所以過濾掉的文件不會佔用名額。
+        """
+        with self._lock:
+            postings, candidates = self._candidates(keyword, where)
+            if not candidates:
+                return []
+
+            n_docs = len(self._doc_terms)
+            avg_length = self._total_length / n_docs if n_docs else 0
+            scores: Dict[str, float] = {}
+            for term_postings in postings:
+                idf = math.log(1 + (n_docs - len(term_postings) + 0.5) / (len(term_postings) + 0.5))
+                for doc_id in candidates:
+                    tf = term_postings[doc_id]
+                    norm = tf + self.K1 * (1 - self.B + self.B * self._doc_length[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.K1 + 1) / norm
+
+        if limit is not None:
+            return heapq.nlargest(limit, scores.items(), key=lambda kv: kv[1])
+        return sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+
+    def top(
+        self,
+        keyword: str,
+        limit: int,
+        key: Callable[[str, object], object],
+        where: Optional[Callable[[str, object], bool]] = None,
+    ) -> List[str]:
+        """不算相關度，直接依 key(doc_id, attrs) 由大到小取前 limit 份文件 (分頁用)"""
+        with self._lock:
+            _, candidates = self._candidates(keyword, where)
+            return heapq.nlargest(limit, candidates, key=lambda doc_id: key(doc_id, self._doc_attrs[doc_id]))
+
+    def _candidates(self, keyword: str, where) -> Tuple[List[Dict[str, int]], set]:
+        """包含所有查詢詞的文件 (呼叫端要持有 _lock)"""
+        query_terms = set(tokenize(keyword, for_query=True))
+        postings = [self._postings.get(term, {}) for term in query_terms]
+        if not postings or not all(postings):
+            return [], set()
+
+        # 從最短的 posting list 開始取交集
+        postings.sort(key=len)
+        candidates = set(postings[0]).intersection(*postings[1:])
+        if where is not None:
+            candidates = {doc_id for doc_id in candidates if where(doc_id, self._doc_attrs[doc_id])}
+        return postings, candidates
+
+
+class _ItemAttrs(NamedTuple):
+    status: str
+    category: str
+    created_at: datetime
+
+
+def _value(enum_or_str) -> str:
+    return enum_or_str.value if hasattr(enum_or_str, "value") else str(enum_or_str)
+
+
+class InvertedIndexSearchBackend(ItemSearchBackend):
+    """
+    第一次搜尋時從 DB 載入全部物品建立索引，之後由 save() 增量更新。
+    多台機器時，其他機器新增 / 修改的物品會在 REFRESH_SECONDS 內被補進來。
+    索引內也記錄狀態、分類與 created_at：上架中 / 分類 / Keyset 分頁都先在索引內處理，
+    SQL 只查這一頁的 id，命中再多也不會截斷掉符合條件的物品。
+    """
+
+    REFRESH_SECONDS = 30
+
+    def __init__(self):
+        self._index = InvertedIndex()
+        self._lock = threading.Lock()
+        self._watermark = None  # 已載入的最新 updated_at
+        self._synced_at = 0.0
+
+    def filter(self, query, keyword: str, db: Session, category=None, after=None, limit=None):
+        self._sync(db)
+        where = self._where(category, after)
+        if limit:
+            # 分頁固定依 (created_at DESC, id DESC) 排序，在索引內先挑出這一頁 (不需要算相關度)
+            ids = self._index.top(keyword, limit, lambda doc_id, attrs: (attrs.created_at, doc_id), where)
+        else:
+            ids = [doc_id for doc_id, _ in self._index.search(keyword, where=where)]
+        if not ids:
+            return query.filter(false())
+        return query.filter(ItemModel.id.in_(ids))
+
+    def order_by_relevance(self, query, keyword: str, category=None):
+        ranked = self._index.search(keyword, where=self._where(category, None))
+        if not ranked:
+            return query
+        return query.order_by(case({doc_id: rank for rank, (doc_id, _) in enumerate(ranked)}, value=ItemModel.id))
+
+    def index(self, item: Item) -> None:
+        # 與 Repository 寫入 DB 的值相同精度 (Keyset 游標是從 DB 讀回來的值)
+        created_at = to_db_precision(item.created_at)
+        self._add(item.id, item.title, item.description, item.status, item.category, created_at)
+
+    def _add(self, doc_id, title, description, status, category, created_at) -> None:
+        self._index.add(doc_id, title, description, _ItemAttrs(_value(status), _value(category), created_at))
+
+    @staticmethod
+    def _where(category, after) -> Callable[[str, _ItemAttrs], bool]:
+        # 與 Repository 的 SQL 條件相同：上架中、分類、(created_at, id) < after
+        available = ItemStatus.AVAILABLE.value
+        category = _value(category) if category else None
+
+        def where(doc_id: str, attrs: _ItemAttrs) -> bool:
+            if attrs is None or attrs.status != available:
+                return False
+            if category and attrs.category != category:
+                return False
+            return not after or (attrs.created_at, doc_id) < after
+
+        return where
+
+    def _sync(self, db: Session) -> None:
+        if time.monotonic() - self._synced_at < self.REFRESH_SECONDS:
+            return
+        with self._lock:
+            if time.monotonic() - self._synced_at < self.REFRESH_SECONDS:
+                return
+            # 用 updated_at 當水位，其他機器改了狀態 / 標題也會同步進來
+            query = db.query(
+                ItemModel.id, ItemModel.title, ItemModel.description, ItemModel.status,
+                ItemModel.category, ItemModel.created_at, ItemModel.updated_at
+            )
+            if self._watermark is not None:
+                query = query.filter(ItemModel.updated_at >= self._watermark)
+            for row in query.yield_per(1000):
+                self._add(row.id, row.title, row.description, row.status, row.category, row.created_at)
+                if row.updated_at is not None and (self._watermark is None or row.updated_at > self._watermark):
+                    self._watermark = row.updated_at
+            self._synced_at = time.monotonic()
+
+
+_SEARCH_BACKENDS = {
+    "like": LikeSearchBackend,
+    "fulltext": MySqlFullTextSearchBackend,
+    "memory": InvertedIndexSearchBackend,
+}
+_search_backend: Optional[ItemSearchBackend] = None
+_search_backend_lock = threading.Lock()
+
+
+def get_search_backend() -> ItemSearchBackend:
+    """整個 Process 共用同一個搜尋後端 (倒排索引才不會每個 Request 重建)"""
+    global _search_backend
+    if _search_backend is None:
+        with _search_backend_lock:
+            if _search_backend is None:
+                name = os.getenv("ITEM_SEARCH_BACKEND", "like").lower()
+                if name not in _SEARCH_BACKENDS:
+                    raise ValueError(f"Unknown ITEM_SEARCH_BACKEND: {name}")
+                _search_backend = _SEARCH_BACKENDS[name]()
+    return _search_backend
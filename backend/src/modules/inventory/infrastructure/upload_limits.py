@@ -0,0 +1,46 @@
+import os
+from typing import BinaryIO
+
+# 單張圖片大小上限 (預設 10MB)
+MAX_IMAGE_BYTES = int(os.getenv("MAX_IMAGE_BYTES", str(10 * 1024 * 1024)))
+
+# 允許上傳的圖片格式 -> 存到 S3 時的副檔名 (副檔名由 Content-Type 決定，不採用前端給的檔名)
+ALLOWED_IMAGE_TYPES = {
+    "image/jpeg": "jpg",
+    "image/png": "png",
+    "image/jpg": "jpg",
+    "image/heic": "heic",
+    "image/webp": "webp",
+}
+
+class ImageTooLargeError(ValueError):
+    pass
+
+class SizeLimitedReader:
+    """
+    包住檔案物件，讀取時檢查目前位置，超過上限就丟出 ImageTooLargeError。
+    讓上傳中途就能中斷，不需要先把整個檔案讀進記憶體檢查。
+    """
+
+    def __init__(self, file_obj: BinaryIO, max_bytes: int = MAX_IMAGE_BYTES):
+        self._file = file_obj
+        self.max_bytes = max_bytes
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self._file.read(size)
+        if self._file.tell() > self.max_bytes:
+            raise ImageTooLargeError(f"Image exceeds {self.max_bytes} bytes")
+        return chunk
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def seekable(self) -> bool:
+        return self._file.seekable()
+
+    def close(self) -> None:
+        # 底層檔案 (UploadFile) 由 FastAPI 負責關閉，這裡不處理
+        pass
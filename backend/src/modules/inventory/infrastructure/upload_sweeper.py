@@ -0,0 +1,90 @@
+import argparse
+import logging
+import os
+from datetime import timedelta
+from typing import List
+
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+
+from ....metrics import registry
+from ..application.service import UPLOAD_URL_EXPIRES_SECONDS
+from .models import ItemModel
+from .s3_uploader import S3ImageStorage
+
+logger = logging.getLogger(__name__)
+
+orphan_uploads_deleted = registry.counter(
+    "orphan_uploads_deleted_total", "已刪除的孤兒上傳檔 (直接上傳到 S3 但沒有刊登成物品)"
+)
+
+# 上傳後超過這段時間還沒掛到物品上就視為孤兒 (要比簽章有效時間長很多)
+ORPHAN_UPLOAD_TTL = timedelta(hours=float(os.getenv("ORPHAN_UPLOAD_TTL_HOURS", "24")))
+
+# 不論 older_than 設多少，都不刪簽章有效時間 + 寬限期內的檔案
+# (前端可能剛上傳完、正在呼叫 POST /items，HEAD 檢查與 commit 之間不能被刪掉)
+UPLOAD_GRACE_PERIOD = timedelta(minutes=float(os.getenv("ORPHAN_UPLOAD_GRACE_MINUTES", "60")))
+MIN_ORPHAN_AGE = timedelta(seconds=UPLOAD_URL_EXPIRES_SECONDS) + UPLOAD_GRACE_PERIOD
+
+# 一批檢查 / 刪除幾個檔案 (delete_objects 一次最多 1000 個)
+SWEEP_BATCH_SIZE = 1000
+
+
+def _sweep_batch(storage: S3ImageStorage, session_factory: sessionmaker, keys: List[str]) -> int:
+    urls = {storage.url_for(key): key for key in keys}
+    db = session_factory()
+    try:
+        # 物品的 image_url 有用到的就保留
+        used = set(db.scalars(select(ItemModel.image_url).where(ItemModel.image_url.in_(list(urls)))))
+    finally:
+        db.close()
+
+    orphans = [key for url, key in urls.items() if url not in used]
+    if orphans:
+        storage.delete_images(orphans)
+        orphan_uploads_deleted.inc(len(orphans))
+    return len(orphans)
+
+
+def sweep_orphan_uploads(
+    storage: S3ImageStorage,
+    session_factory: sessionmaker,
+    older_than: timedelta = ORPHAN_UPLOAD_TTL,
+    batch_size: int = SWEEP_BATCH_SIZE,
+) -> int:
+    """
+    刪除 uploads/ 底下超過 older_than、且沒有任何物品使用的檔案，回傳刪除的數量。
+    依 S3 列表分批處理，每批一次 IN 查詢 + 一次 delete_objects；中途中斷可以直接重跑。
+    older_than 小於 MIN_ORPHAN_AGE 時改用 MIN_ORPHAN_AGE。
+    """
+    if older_than < MIN_ORPHAN_AGE:
+        logger.warning(f"older_than {older_than} is shorter than the upload window, using {MIN_ORPHAN_AGE}")
+        older_than = MIN_ORPHAN_AGE
+
+    deleted = 0
+    batch: List[str] = []
+    for key in storage.iter_uploads(older_than):
+        batch.append(key)
+        if len(batch) >= batch_size:
+            deleted += _sweep_batch(storage, session_factory, batch)
+            batch = []
+    if batch:
+        deleted += _sweep_batch(storage, session_factory, batch)
+
+    logger.info(f"Deleted {deleted} orphan uploads")
+    return deleted
+
+
+if __name__ == "__main__":
+    # python -m src.modules.inventory.infrastructure.upload_sweeper [--older-than-hours 24]
+    from ....database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Delete direct uploads that were never attached to an item")
+    parser.add_argument("--older-than-hours", type=float, default=ORPHAN_UPLOAD_TTL.total_seconds() / 3600)
+    parser.add_argument("--batch-size", type=int, default=SWEEP_BATCH_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    sweep_orphan_uploads(
+        S3ImageStorage(), SessionLocal, timedelta(hours=args.older_than_hours), min(args.batch_size, 1000)
+    )
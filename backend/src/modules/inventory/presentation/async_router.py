@@ -0,0 +1,87 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ....database import AsyncSessionLocal, get_async_db
+from ....pagination import MAX_PAGE_SIZE, ndjson_lines_async
+
+from ...iam.dependencies import get_current_user_async
+from ...iam.domain.entity import User
+
+from ..application.async_service import AsyncItemQueryService
+from ..application.dtos import ItemResponse
+from ..domain.entity import ItemCategory
+from ..infrastructure.async_repository import AsyncSqlAlchemyItemRepository
+from ..infrastructure.item_cache import AsyncCachedItemRepository, item_cache
+from .router import get_categories, item_etag
+from ....http_cache import conditional_response
+
+# async 版的查詢 API (DB_ASYNC_ENABLED=true 時才會註冊，並優先於同步版)
+# 刊登物品 (POST /items/) 仍由同步版 router 處理
+router = APIRouter(
+    prefix="/items",
+    tags=["Items"]
+)
+
+def get_async_item_service(db: AsyncSession = Depends(get_async_db)) -> AsyncItemQueryService:
+    # 與同步版共用同一個 item_cache (GET /items/{id} 先查快取)
+    return AsyncItemQueryService(AsyncCachedItemRepository(AsyncSqlAlchemyItemRepository(db), item_cache))
+
+@router.get("/", response_model=List[ItemResponse], summary="搜尋物品列表")
+async def search_items(
+    response: Response,
+    keyword: Optional[str] = None,
+    category: Optional[ItemCategory] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    format: Optional[str] = Query(None, pattern="^ndjson$"),
+    service: AsyncItemQueryService = Depends(get_async_item_service)
+):
+    if format == "ndjson":
+        return StreamingResponse(_stream_items(keyword, category), media_type="application/x-ndjson")
+
+    try:
+        page = await service.search_items(keyword, category, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page.items
+
+async def _stream_items(keyword: Optional[str], category: Optional[ItemCategory]):
+    # 串流回應送出時 Request 的 AsyncSession 可能已經關閉，所以這裡自己開一個
+    async with AsyncSessionLocal() as db:
+        service = AsyncItemQueryService(AsyncSqlAlchemyItemRepository(db))
+        async for line in ndjson_lines_async(
+            service.iter_items(keyword, category),
+            lambda item: ItemResponse.model_validate(item, from_attributes=True).model_dump_json(by_alias=True)
+        ):
+            yield line
+
+@router.get("/me", response_model=List[ItemResponse], summary="取得我的物品清單 (含歷史紀錄)")
+async def get_my_items(
+    current_user: User = Depends(get_current_user_async),
+    service: AsyncItemQueryService = Depends(get_async_item_service)
+):
+    return await service.get_user_items(current_user.id)
+
+# /categories 必須在 /{item_id} 之前註冊，否則會被當成 item_id
+router.get("/categories", response_model=List[dict], summary="取得物品分類清單")(get_categories)
+
+@router.get("/{item_id}", response_model=ItemResponse, summary="取得特定物品詳情")
+async def get_item(
+    item_id: str,
+    request: Request,
+    response: Response,
+    service: AsyncItemQueryService = Depends(get_async_item_service)
+):
+    item = await service.get_item(item_id)
+    if not item:
+        raise HTTPException(status_code=404, detail="Item not found")
+
+    not_modified = conditional_response(request, response, item_etag(item), "/items/{item_id}")
+    if not_modified:
+        return not_modified
+    return item
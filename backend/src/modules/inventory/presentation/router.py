@@ -1,16 +1,32 @@
+import json
+import os
 from typing import List, Optional
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, status
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import ValidationError
 
+from ....database import ReadSessionLocal
+from ....http_cache import CachedJSON, conditional_response, weak_etag
+from ....pagination import MAX_PAGE_SIZE, ndjson_lines
+
 # 引入 IAM 模組的驗證功能 (確保只有登入的使用者能刊登)
 from ...iam.dependencies import get_current_user
 from ...iam.domain.entity import User
 
 # 引入 Items 模組的 Service 與 DTO
-from ..application.service import ItemService
-from ..application.dtos import ItemResponse
+from ..application.service import UPLOAD_URL_EXPIRES_SECONDS, ItemDraft, ItemService
+from ..application.dtos import (
+    BatchCreateResponse, BatchItemInput, BatchItemResult, CreateUploadRequest, ItemResponse, PresignedUploadResponse
+)
 from ..domain.entity import ItemCategory
+from ..domain.repository import ImageAlreadyUsedError
 from ..dependencies import get_item_service
+from ..infrastructure.repository import SqlAlchemyItemRepository
+from ..infrastructure.upload_limits import ALLOWED_IMAGE_TYPES, MAX_IMAGE_BYTES, ImageTooLargeError, SizeLimitedReader
+
+# 批次刊登一次最多幾筆
+MAX_BATCH_ITEMS = int(os.getenv("ITEM_BATCH_MAX_ITEMS", "50"))
 
 # 定義 Router
 router = APIRouter(
@@ -25,7 +41,7 @@ router = APIRouter(
     "/", 
     response_model=ItemResponse, 
     status_code=status.HTTP_201_CREATED,
-    summary="刊登新物品 (需上傳圖片)"
+    summary="刊登新物品 (上傳圖片，或使用 /items/uploads 已上傳的 image_key)"
 )
 async def create_item(
     # 使用 Form(...) 來接收表單欄位，因為要配合檔案上傳 (Multipart)
@@ -33,8 +49,9 @@ async def create_item(
     description: str = Form(..., description="物品詳細說明"),
     category: ItemCategory = Form(..., description="物品分類 (TEXTBOOK, 3C, DAILY, OTHER)"),
     
-    # 使用 File(...) 來接收圖片檔案
-    image: UploadFile = File(..., description="物品照片"),
+    # 圖片二選一：直接上傳檔案，或是先用 POST /items/uploads 上傳到 S3 再給 image_key
+    image: Optional[UploadFile] = File(None, description="物品照片"),
+    image_key: Optional[str] = Form(None, description="POST /items/uploads 回傳的 image_key"),
     
     # 依賴注入：取得當前登入的使用者 (如果沒登入會報錯 401)
     current_user: User = Depends(get_current_user),
@@ -45,32 +62,165 @@ async def create_item(
     """
     刊登物品的 API。
     前端需使用 'multipart/form-data' 格式發送 Request。
+    建議改用 image_key：圖片由瀏覽器直接上傳到 S3，不經過 API Server。
     """
+    if (image is None) == (image_key is None):
+        raise HTTPException(status_code=400, detail="Provide either image or image_key.")
+
+    if image_key is not None:
+        try:
+            new_item = await run_in_threadpool(
+                service.create_item_from_upload,
+                owner_id=current_user.id,
+                title=title,
+                description=description,
+                category=category,
+                image_key=image_key,
+                allowed_types=ALLOWED_IMAGE_TYPES,
+                max_bytes=MAX_IMAGE_BYTES
+            )
+        except ImageAlreadyUsedError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        new_item.owner_name = current_user.name
+        return new_item
+
     # 簡單驗證檔案類型 (可選)
-    if image.content_type not in ["image/jpeg", "image/png", "image/jpg", "image/heic", "image/webp"]:
+    if image.content_type not in ALLOWED_IMAGE_TYPES:
         raise HTTPException(status_code=400, detail="Only JPEG or PNG or heic or webp images are allowed.")
 
-    # 讀取檔案內容 (bytes)
-    file_content = await image.read()
+    # 檔案大小檢查 (multipart 解析時已經知道大小，不用讀檔)
+    if image.size is not None and image.size > MAX_IMAGE_BYTES:
+        raise HTTPException(status_code=413, detail=f"Image must be smaller than {MAX_IMAGE_BYTES} bytes.")
 
     try:
         # 呼叫 Service 處理業務邏輯 (上傳 S3 + 寫入 DB)
-        new_item = service.create_item(
+        # 上傳與 DB 寫入都是阻塞的，丟到 threadpool 執行，不要卡住 event loop
+        new_item = await run_in_threadpool(
+            service.create_item,
             owner_id=current_user.id,
             title=title,
             description=description,
             category=category,
-            file_content=file_content,
+            file_obj=SizeLimitedReader(image.file, MAX_IMAGE_BYTES),
             filename=image.filename or "unknown_file",
             content_type=image.content_type
         )
         new_item.owner_name = current_user.name
         
         return new_item
-        
-    except Exception as e:
-        # 捕捉未預期的錯誤
-        raise HTTPException(status_code=500, detail=str(e))
+
+    except ImageTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ImageAlreadyUsedError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # 其他未預期的錯誤 (S3 / DB) 不轉成 HTTPException：記錄 traceback 後回傳一般的 500，不把內部訊息傳給前端
+
+# ---------------------------------------------
+# 1-0. 取得直接上傳到 S3 的簽章 (Presigned POST)
+# ---------------------------------------------
+@router.post(
+    "/uploads",
+    response_model=PresignedUploadResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="取得圖片直接上傳到 S3 的簽章"
+)
+def create_upload(
+    request: CreateUploadRequest,
+    current_user: User = Depends(get_current_user),
+    service: ItemService = Depends(get_item_service)
+):
+    """
+    1. 前端呼叫這個 API 取得 upload_url 與 fields
+    2. 用 multipart/form-data POST 到 upload_url：先放 fields 的所有欄位，最後放 file 欄位
+    3. 上傳成功後呼叫 POST /items，用 image_key 取代 image
+    S3 會檢查檔案大小與 Content-Type，不符合時直接拒絕上傳。
+    """
+    if request.content_type not in ALLOWED_IMAGE_TYPES:
+        raise HTTPException(status_code=400, detail="Only JPEG or PNG or heic or webp images are allowed.")
+    if request.size is not None and request.size > MAX_IMAGE_BYTES:
+        raise HTTPException(status_code=413, detail=f"Image must be smaller than {MAX_IMAGE_BYTES} bytes.")
+
+    upload = service.create_upload(current_user.id, request.content_type, MAX_IMAGE_BYTES)
+    return PresignedUploadResponse(
+        image_key=upload.key,
+        upload_url=upload.url,
+        fields=upload.fields,
+        max_bytes=MAX_IMAGE_BYTES,
+        expires_in=UPLOAD_URL_EXPIRES_SECONDS
+    )
+
+# ---------------------------------------------
+# 1-1. 批次刊登 (一次刊登多個物品，例如搬家出清)
+# ---------------------------------------------
+@router.post(
+    "/batch",
+    response_model=BatchCreateResponse,
+    summary="批次刊登物品 (每個物品一張圖片)"
+)
+async def create_items_batch(
+    items: str = Form(..., description='物品資料 (JSON 陣列)，例如 [{"title": "...", "description": "...", "category": "OTHER"}]'),
+    images: List[UploadFile] = File(..., description="物品照片，依順序對應 items"),
+    current_user: User = Depends(get_current_user),
+    service: ItemService = Depends(get_item_service)
+):
+    """
+    前端使用 'multipart/form-data'：items 欄位放 JSON 陣列，images 欄位依相同順序放多張圖片。
+    每一筆各自成功或失敗 (results 依 items 的順序)，不會因為其中一筆失敗而整批失敗。
+    """
+    try:
+        raw_items = json.loads(items)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="items must be a JSON array")
+    if not isinstance(raw_items, list) or not raw_items:
+        raise HTTPException(status_code=400, detail="items must be a non-empty JSON array")
+    if len(raw_items) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_ITEMS} items per batch.")
+    if len(images) != len(raw_items):
+        raise HTTPException(status_code=400, detail="Each item needs exactly one image.")
+
+    # 先檢查欄位與圖片，不合格的直接記為失敗，其他的交給 Service 上傳與寫入
+    results: List[Optional[BatchItemResult]] = [None] * len(raw_items)
+    drafts: List[ItemDraft] = []
+    draft_indexes: List[int] = []
+    for index, (raw, image) in enumerate(zip(raw_items, images)):
+        error = None
+        if image.content_type not in ALLOWED_IMAGE_TYPES:
+            error = "Only JPEG or PNG or heic or webp images are allowed."
+        elif image.size is not None and image.size > MAX_IMAGE_BYTES:
+            error = f"Image must be smaller than {MAX_IMAGE_BYTES} bytes."
+        else:
+            try:
+                data = BatchItemInput.model_validate(raw)
+            except ValidationError as e:
+                error = f"Invalid item: {e.errors()[0]['msg']}"
+
+        if error:
+            results[index] = BatchItemResult(index=index, success=False, error=error)
+            continue
+        drafts.append(ItemDraft(
+            title=data.title,
+            description=data.description,
+            category=data.category,
+            file_obj=SizeLimitedReader(image.file, MAX_IMAGE_BYTES),
+            filename=image.filename or "unknown_file",
+            content_type=image.content_type
+        ))
+        draft_indexes.append(index)
+
+    outcomes = await run_in_threadpool(service.create_items, current_user.id, drafts)
+    for index, outcome in zip(draft_indexes, outcomes):
+        item = None
+        if outcome.item:
+            outcome.item.owner_name = current_user.name
+            item = ItemResponse.model_validate(outcome.item, from_attributes=True)
+        results[index] = BatchItemResult(index=index, success=item is not None, item=item, error=outcome.error)
+
+    created = sum(1 for result in results if result.success)
+    return BatchCreateResponse(created=created, failed=len(results) - created, results=results)
 
 # ---------------------------------------------
 # 2. 搜尋/列表物品 (Search Items)
@@ -81,8 +231,12 @@ async def create_item(
     summary="搜尋物品列表"
 )
 def search_items(
+    response: Response,
     keyword: Optional[str] = None,
     category: Optional[ItemCategory] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="每頁筆數 (不給則回傳全部)"),
+    cursor: Optional[str] = Query(None, description="上一頁回傳的 X-Next-Cursor"),
+    format: Optional[str] = Query(None, pattern="^ndjson$", description="ndjson: 以串流方式匯出全部資料"),
     service: ItemService = Depends(get_item_service)
 ):
     """
@@ -90,8 +244,29 @@ def search_items(
     可以透過 Query Parameters 進行篩選：
     - ?keyword=計算機 (搜尋標題)
     - ?category=3C (篩選分類)
+    - ?limit=20&cursor=... (分頁，下一頁的 cursor 放在 X-Next-Cursor Header)
+    - ?format=ndjson (串流匯出，每行一筆 JSON)
     """
-    return service.search_items(keyword, category)
+    if format == "ndjson":
+        return StreamingResponse(_stream_items(keyword, category), media_type="application/x-ndjson")
+
+    try:
+        page = service.search_items(keyword, category, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page.items
+
+def _stream_items(keyword: Optional[str], category: Optional[ItemCategory]):
+    # 串流回應送出時 Request 的 DB Session 可能已經關閉，所以這裡自己開一個 (唯讀，可用 Replica)
+    db = ReadSessionLocal()
+    try:
+        items = SqlAlchemyItemRepository(db).iter_search(keyword, category)
+        yield from ndjson_lines(items, lambda item: ItemResponse.model_validate(item, from_attributes=True).model_dump_json(by_alias=True))
+    finally:
+        db.close()
 
 # ---------------------------------------------
 # 3. 取得目前登入使用者的所有物品 (包含歷史狀態)
@@ -123,27 +298,30 @@ def get_my_items(
     response_model=List[dict],
     summary="取得物品分類清單"
 )
-def get_categories():
+async def get_categories(request: Request):
     """
-    從 ItemCategory Enum 動態產生分類清單。
+    從 ItemCategory Enum 動態產生分類清單 (啟動時產生一次，支援 If-None-Match → 304)。
+    不需要 DB 也沒有 I/O，用 async 直接在 event loop 回應，省掉丟到 threadpool 的成本。
     """
-    # 定義中文名稱對照
-    CATEGORY_MAP = {
-        ItemCategory.TEXTBOOK: "教科書",
-        ItemCategory.ELECTRONICS: "3C周邊",
-        ItemCategory.DAILY_USE: "生活用品",
-        ItemCategory.FOODSTUFF: "食品",
-        ItemCategory.FURNITURE: "家具",
-        ItemCategory.OTHER: "其他",
+    return CATEGORIES_RESPONSE.respond(request, "/items/categories")
+
+# 定義中文名稱對照
+CATEGORY_MAP = {
+    ItemCategory.TEXTBOOK: "教科書",
+    ItemCategory.ELECTRONICS: "3C周邊",
+    ItemCategory.DAILY_USE: "生活用品",
+    ItemCategory.FOODSTUFF: "食品",
+    ItemCategory.FURNITURE: "家具",
+    ItemCategory.OTHER: "其他",
+}
+
+CATEGORIES_RESPONSE = CachedJSON([
+    {
+        "id": category.value,
+        "name": CATEGORY_MAP.get(category, category.value)
     }
-    
-    return [
-        {
-            "id": category.value,
-            "name": CATEGORY_MAP.get(category, category.value)
-        }
-        for category in ItemCategory
-    ]
+    for category in ItemCategory
+])
 
 # ---------------------------------------------
 # 4. 取得單一物品詳情 (Get Item Detail)
@@ -155,6 +333,8 @@ def get_categories():
 )
 def get_item(
     item_id: str,
+    request: Request,
+    response: Response,
     service: ItemService = Depends(get_item_service)
 ):
     # 這裡假設你的 Service 有實作 get_item_by_id (建議補上)
@@ -163,5 +343,13 @@ def get_item(
     
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
-        
-    return item
\ No newline at end of file
+
+    # 內容沒變 (If-None-Match 符合) 就回 304，不用再送一次 Body
+    not_modified = conditional_response(request, response, item_etag(item), "/items/{item_id}")
+    if not_modified:
+        return not_modified
+    return item
+
+def item_etag(item) -> str:
+    # 物品本身的修改會更新 updated_at；刊登者改名不會，所以名字也一起算進去
+    return weak_etag(item.id, item.updated_at, item.owner_name)
\ No newline at end of file
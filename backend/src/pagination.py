@@ -0,0 +1,99 @@
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from sqlalchemy import and_, or_
+
+T = TypeVar("T")
+
+# 分頁時每次最多回傳的筆數
+MAX_PAGE_SIZE = 100
+
+# 串流 (NDJSON) 時，每次從 Server-side cursor 取回的筆數
+STREAM_BATCH_SIZE = 500
+
+# Keyset 游標: (created_at, id)
+KeysetPosition = Tuple[datetime, str]
+
+
+@dataclass
+class Page(Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+
+def encode_cursor(created_at: datetime, row_id: str) -> str:
+    """把 (created_at, id) 編碼成前端看不懂的 opaque cursor"""
+    raw = json.dumps([created_at.isoformat(), row_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> KeysetPosition:
+    """解碼 cursor，格式不正確時丟出 ValueError"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), str(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def to_db_precision(value: Optional[datetime]) -> Optional[datetime]:
+    """
+    MySQL 的 DATETIME 不存小數秒 (寫入時四捨五入)。Keyset 用到的時間在寫入前先截到秒，
+    DB、Entity 與記憶體內的搜尋索引比較 (created_at, id) 時才會一致。
+    """
+    return value.replace(microsecond=0) if value is not None else None
+
+
+def apply_keyset(query, created_column, id_column, after: Optional[KeysetPosition]):
+    """
+    依 (created_at DESC, id DESC) 排序，並只取 after 之後的資料。
+    WHERE created_at < :c OR (created_at = :c AND id < :id)
+    """
+    if after:
+        created_at, row_id = after
+        query = query.filter(
+            or_(
+                created_column < created_at,
+                and_(created_column == created_at, id_column < row_id),
+            )
+        )
+    return query.order_by(created_column.desc(), id_column.desc())
+
+
+def to_page(rows: List[T], limit: int, key: Callable[[T], KeysetPosition]) -> Page[T]:
+    """
+    rows 應該多查一筆 (limit + 1)，用來判斷是否還有下一頁。
+    """
+    if len(rows) <= limit:
+        return Page(items=rows)
+    rows = rows[:limit]
+    return Page(items=rows, next_cursor=encode_cursor(*key(rows[-1])))
+
+
+def ndjson_lines(rows: Iterable[T], serialize: Callable[[T], str]) -> Iterator[bytes]:
+    """把資料一筆一筆轉成 NDJSON (每行一個 JSON)"""
+    for row in rows:
+        yield (serialize(row) + "\n").encode("utf-8")
+
+
+async def ndjson_lines_async(
+    rows: AsyncIterable[T], serialize: Callable[[T], str]
+) -> AsyncIterator[bytes]:
+    """ndjson_lines 的 async 版本 (rows 來自 AsyncSession.stream)"""
+    async for row in rows:
+        yield (serialize(row) + "\n").encode("utf-8")
@@ -0,0 +1,257 @@
+import logging
+import os
+import re
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Deque, Iterator, List, Optional
+
+from fastapi import APIRouter, HTTPException
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# 開發用：SQL_PROFILE=true 時記錄每個請求的所有 SQL，並找出 N+1
+SQL_PROFILE_ENABLED = os.getenv("SQL_PROFILE", "false").lower() == "true"
+
+# 同一個形狀的 SQL 在一個請求內出現幾次以上就視為 N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_PROFILE_N_PLUS_ONE_THRESHOLD", "3"))
+
+# 每個請求最多記錄幾筆 SQL / 保留最近幾個請求的結果
+MAX_STATEMENTS = 1000
+MAX_PROFILES = 50
+
+_SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+_IN_LIST = re.compile(
+    r"\((?:\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*,)+\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*\)"
+)
+_WHITESPACE = re.compile(r"\s+")
+
+
+@dataclass
+class StatementRecord:
+    statement: str
+    seconds: float
+    origin: str
+
+
+@dataclass
+class SqlProfile:
+    label: str = ""
+    statements: List[StatementRecord] = field(default_factory=list)
+    dropped: int = 0
+
+    @property
+    def count(self) -> int:
+        return len(self.statements) + self.dropped
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(s.seconds for s in self.statements)
+
+    def n_plus_one(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> List[dict]:
+        """同樣形狀的 SQL 重複出現 threshold 次以上 (通常是迴圈裡的 lazy load)"""
+        shapes = Counter(statement_shape(s.statement) for s in self.statements)
+        suspects = []
+        for shape, count in shapes.most_common():
+            if count < threshold:
+                break
+            origins = Counter(
+                s.origin
+                for s in self.statements
+                if statement_shape(s.statement) == shape
+            )
+            suspects.append(
+                {"statement": shape, "count": count, "origins": dict(origins)}
+            )
+        return suspects
+
+    def summary(self) -> dict:
+        return {
+            "label": self.label,
+            "queries": self.count,
+            "total_ms": round(self.total_seconds * 1000, 2),
+            "n_plus_one": self.n_plus_one(),
+            "statements": [
+                {
+                    "statement": s.statement,
+                    "ms": round(s.seconds * 1000, 3),
+                    "origin": s.origin,
+                }
+                for s in self.statements
+            ],
+        }
+
+    def header_value(self) -> str:
+        suspects = self.n_plus_one()
+        return f"queries={self.count}; time_ms={self.total_seconds * 1000:.1f}; n_plus_one={len(suspects)}"
+
+
+def statement_shape(statement: str) -> str:
+    """去掉空白差異、把 IN (?, ?, ?) 縮成 IN (...)，讓同一種查詢可以歸在一起"""
+    return _IN_LIST.sub("(...)", _WHITESPACE.sub(" ", statement).strip())
+
+
+def _origin() -> str:
+    """呼叫這個 SQL 的程式碼位置 (專案內最接近的一層，略過 SQLAlchemy 與本檔)"""
+    for frame in reversed(traceback.extract_stack()):
+        if frame.filename.startswith(_SRC_DIR) and frame.filename != __file__:
+            return f"{os.path.relpath(frame.filename, _SRC_DIR)}:{frame.lineno} in {frame.name}"
+    return "<unknown>"
+
+
+# 目前請求的 Profile (Middleware 使用)
+_current_profile: ContextVar[Optional[SqlProfile]] = ContextVar(
+    "sql_profile", default=None
+)
+# profile_sql() 使用中的 Profile：記錄整個 Process 的 SQL
+# (TestClient 會在另一個執行緒處理請求，contextvar 傳不過去)
+_process_profiles: List[SqlProfile] = []
+_process_lock = threading.Lock()
+
+
+def _active_profiles() -> List[SqlProfile]:
+    profile = _current_profile.get()
+    profiles = [profile] if profile is not None else []
+    if _process_profiles:
+        with _process_lock:
+            profiles.extend(p for p in _process_profiles if p is not profile)
+    return profiles
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_profile.get() is not None or _process_profiles:
+        context._profile_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not hasattr(context, "_profile_start"):
+        return
+    profiles = _active_profiles()
+    if not profiles:
+        return
+    record = StatementRecord(
+        statement, time.perf_counter() - context._profile_start, _origin()
+    )
+    with _process_lock:
+        for profile in profiles:
+            if len(profile.statements) >= MAX_STATEMENTS:
+                profile.dropped += 1
+            else:
+                profile.statements.append(record)
+
+
+def install_profiler_hooks() -> None:
+    if event.contains(Engine, "after_cursor_execute", _after_cursor_execute):
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def profile_sql(label: str = "") -> Iterator[SqlProfile]:
+    """
+    記錄區塊執行期間整個 Process 的所有 SQL (不需要開啟 SQL_PROFILE)，例如:
+
+        with profile_sql() as profile:
+            client.get("/exchanges?role=owner")
+        logger.info(profile.summary())
+    """
+    install_profiler_hooks()
+    profile = SqlProfile(label=label)
+    with _process_lock:
+        _process_profiles.append(profile)
+    try:
+        yield profile
+    finally:
+        with _process_lock:
+            _process_profiles.remove(profile)
+
+
+@contextmanager
+def assert_max_queries(limit: int, label: str = "") -> Iterator[SqlProfile]:
+    """
+    區塊內的 SQL 超過 limit 筆就丟出 AssertionError (附上 N+1 的位置)，
+    可以在測試裡包住一次 API 呼叫，防止之後改壞變成 N+1。
+    """
+    with profile_sql(label) as profile:
+        yield profile
+    if profile.count > limit:
+        details = "\n".join(
+            f"  {s['count']}x {s['statement'][:120]} <- {', '.join(s['origins'])}"
+            for s in profile.n_plus_one()
+        )
+        raise AssertionError(
+            f"{label or 'block'} executed {profile.count} queries (limit {limit})"
+            + (f"\nRepeated statements:\n{details}" if details else "")
+        )
+
+
+# --- 最近的請求紀錄 (給 debug endpoint 看) ---
+_recent_profiles: Deque[dict] = deque(maxlen=MAX_PROFILES)
+_recent_lock = threading.Lock()
+
+
+class SqlProfilerMiddleware:
+    """
+    每個請求各自記錄 SQL，結果放在 X-SQL-Profile Header，
+    完整內容 (含每筆 SQL 與呼叫位置) 可從 GET /internal/sql-profiles 查看。
+    串流回應在送出 Header 之後執行的 SQL 只會出現在 debug endpoint。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = SqlProfile(label=f"{scope['method']} {scope['path']}")
+        token = _current_profile.set(profile)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append(
+                    (b"x-sql-profile", profile.header_value().encode("latin-1"))
+                )
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_profile.reset(token)
+            summary = profile.summary()
+            if summary["n_plus_one"]:
+                logger.warning(
+                    f"Possible N+1 in {profile.label}: "
+                    + "; ".join(
+                        f"{s['count']}x {s['statement'][:80]}"
+                        for s in summary["n_plus_one"]
+                    )
+                )
+            with _recent_lock:
+                _recent_profiles.append(summary)
+
+
+router = APIRouter(prefix="/internal", tags=["Internal"])
+
+
+@router.get("/sql-profiles")
+def read_sql_profiles(n_plus_one_only: bool = False):
+    if not SQL_PROFILE_ENABLED:
+        raise HTTPException(
+            status_code=404, detail="SQL profiling is disabled (set SQL_PROFILE=true)"
+        )
+    with _recent_lock:
+        profiles = list(_recent_profiles)
+    if n_plus_one_only:
+        profiles = [p for p in profiles if p["n_plus_one"]]
+    return list(reversed(profiles))
@@ -0,0 +1,63 @@
+from typing import Callable
+
+from sqlalchemy.orm import Session
+
+# 狀態存在 Session.info，同一個 Session 上的所有 Repository 都看得到
+_DEPTH_KEY = "unit_of_work_depth"
+_CALLBACKS_KEY = "unit_of_work_after_commit"
+
+
+class UnitOfWork:
+    """
+    把同一個 Session 上的多個 Repository 操作合併成一個 Transaction。
+
+        with UnitOfWork(db):
+            item_repo.save(target)    # 只 flush，不 commit
+            exchange_repo.save(exchange)
+        # 離開時 commit 一次；發生例外 (包含 HTTPException) 則 rollback
+
+    可以巢狀使用，只有最外層會 commit。
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def __enter__(self) -> "UnitOfWork":
+        self.db.info[_DEPTH_KEY] = self.db.info.get(_DEPTH_KEY, 0) + 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        depth = self.db.info[_DEPTH_KEY] - 1
+        self.db.info[_DEPTH_KEY] = depth
+        if depth > 0:
+            return False
+
+        callbacks = self.db.info.pop(_CALLBACKS_KEY, [])
+        if exc_type is not None:
+            self.db.rollback()
+            return False
+
+        self.db.commit()
+        for callback in callbacks:
+            callback()
+        return False
+
+
+def in_unit_of_work(db: Session) -> bool:
+    return db.info.get(_DEPTH_KEY, 0) > 0
+
+
+def commit_or_flush(db: Session) -> None:
+    """Repository 存檔時使用：在 UnitOfWork 裡只 flush，交給外層一起 commit"""
+    if in_unit_of_work(db):
+        db.flush()
+    else:
+        db.commit()
+
+
+def after_commit(db: Session, callback: Callable[[], None]) -> None:
+    """commit 成功後才執行 (例如更新搜尋索引)；不在 UnitOfWork 裡就直接執行"""
+    if in_unit_of_work(db):
+        db.info.setdefault(_CALLBACKS_KEY, []).append(callback)
+    else:
+        callback()
@@ -0,0 +1,37 @@
+from typing import Any, Dict
+
+from sqlalchemy.orm import Session
+
+
+def upsert(db: Session, model, values: Dict[str, Any], update: Dict[str, Any]) -> None:
+    """
+    INSERT，主鍵已存在就改成 UPDATE (單一 SQL，不需要先 SELECT)。
+    update 的值可以是運算式，例如 {"value": Model.value + 1} (以既有那一列計算)。
+    - MySQL: INSERT ... ON DUPLICATE KEY UPDATE
+    - SQLite / PostgreSQL: INSERT ... ON CONFLICT (主鍵) DO UPDATE
+    """
+    table = model.__table__
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+
+        stmt = insert(table).values(**values).on_duplicate_key_update(**update)
+    elif dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+
+        stmt = (
+            insert(table)
+            .values(**values)
+            .on_conflict_do_update(
+                index_elements=[c.name for c in table.primary_key.columns],
+                set_=update,
+            )
+        )
+    else:
+        raise NotImplementedError(f"upsert is not supported for {dialect}")
+
+    db.execute(stmt)
@@ -0,0 +1,160 @@
+"""
+測試使用 SQLite (每個測試重建一次資料表)，不需要 MySQL / AWS。
+執行: cd backend && pip install -r requirements-dev.txt && python -m pytest
+"""
+import os
+import tempfile
+from datetime import datetime, timedelta
+from itertools import count
+
+# 要在 import src 之前設定 (database.py 在 import 時就會建立 Engine)
+_TMP_DIR = tempfile.mkdtemp(prefix="backend-tests-")
+os.environ.update(
+    {
+        "DATABASE_URL": f"sqlite:///{_TMP_DIR}/test.db",
+        "ASYNC_DATABASE_URL": f"sqlite+aiosqlite:///{_TMP_DIR}/test.db",
+        "DB_ASYNC_ENABLED": "false",
+        "OUTBOX_DISPATCH_ENABLED": "false",
+        "OUTBOX_BROADCAST_ENABLED": "false",
+        "S3_BUCKET_NAME": "test-bucket",
+        "AWS_ACCESS_KEY_ID": "testing",
+        "AWS_SECRET_ACCESS_KEY": "testing",
+        "AWS_DEFAULT_REGION": "us-east-1",
+    }
+)
+for _name in ("REPLICA_DATABASE_URL", "DB_REPLICA_HOST", "ITEM_CACHE_REDIS_URL", "SQL_PROFILE"):
+    os.environ.pop(_name, None)
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from src.database import SessionLocal, engine  # noqa: E402
+from src.main import app  # noqa: E402  (同時掛上 Session hooks)
+from src.modules.exchanges.domain.entity import ExchangeStatus  # noqa: E402
+from src.modules.exchanges.infrastructure.models import ExchangeModel  # noqa: E402
+from src.modules.iam.dependencies import get_current_user, get_current_user_async  # noqa: E402
+from src.modules.iam.domain.entity import User  # noqa: E402
+from src.modules.iam.infrastructure.models import Base, UserModel  # noqa: E402
+from src.modules.inventory.domain.entity import ItemCategory, ItemStatus  # noqa: E402
+from src.modules.inventory.infrastructure.item_cache import item_cache  # noqa: E402
+from src.modules.inventory.infrastructure.models import ItemModel  # noqa: E402
+from src.sql_profiler import assert_max_queries as _assert_max_queries  # noqa: E402
+
+_ids = count(1)
+
+
+@pytest.fixture(autouse=True)
+def clean_database():
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    item_cache.clear()
+    yield
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def assert_max_queries():
+    """
+    with assert_max_queries(3):
+        client.get(...)
+    區塊內 (包含 TestClient 處理請求的執行緒) 的 SQL 超過上限就失敗，訊息會列出重複的 SQL 與呼叫位置
+    """
+    return _assert_max_queries
+
+
+@pytest.fixture
+def login_as():
+    """login_as(user) 之後的請求都以這個使用者身分呼叫 (跳過 Cognito 驗證)"""
+
+    def _login(user: User) -> User:
+        app.dependency_overrides[get_current_user] = lambda: user
+        app.dependency_overrides[get_current_user_async] = lambda: user
+        return user
+
+    return _login
+
+
+@pytest.fixture
+def make_user(db):
+    def _make(user_id: str = None, name: str = None) -> User:
+        user_id = user_id or f"user-{next(_ids)}"
+        name = name or user_id.upper()
+        db.add(UserModel(id=user_id, email=f"{user_id}@example.com", name=name))
+        db.commit()
+        return User(id=user_id, email=f"{user_id}@example.com", password_hash="", name=name)
+
+    return _make
+
+
+@pytest.fixture
+def make_item(db):
+    def _make(owner: User, title: str = None, status: ItemStatus = ItemStatus.AVAILABLE, **fields) -> ItemModel:
+        item_id = f"item-{next(_ids)}"
+        item = ItemModel(
+            id=item_id,
+            owner_id=owner.id,
+            title=title or "item",
+            description=fields.pop("description", "description"),
+            category=fields.pop("category", ItemCategory.OTHER),
+            status=status,
+            image_url=fields.pop("image_url", f"https://example.com/{item_id}.jpg"),
+            **fields,
+        )
+        db.add(item)
+        db.commit()
+        return item
+
+    return _make
+
+
+@pytest.fixture
+def make_exchange(db):
+    """直接寫入 DB (不經過 Service / Domain Event)，用來準備大量資料"""
+    base_time = datetime(2026, 1, 1)
+
+    def _make(requester: User, target: ItemModel, offered: ItemModel = None, status=ExchangeStatus.PENDING) -> ExchangeModel:
+        n = next(_ids)
+        exchange = ExchangeModel(
+            id=f"exchange-{n}",
+            requester_id=requester.id,
+            owner_id=target.owner_id,
+            target_item_id=target.id,
+            offered_item_id=offered.id if offered else None,
+            status=status,
+            message="",
+            created_at=base_time + timedelta(seconds=n),
+            updated_at=base_time + timedelta(seconds=n),
+        )
+        db.add(exchange)
+        db.commit()
+        return exchange
+
+    return _make
+
+
+@pytest.fixture
+def s3_storage():
+    """moto 模擬的 S3 (不會連到 AWS)，bucket 已建立"""
+    from moto import mock_aws
+
+    from src.modules.inventory.infrastructure.s3_uploader import S3ImageStorage
+
+    with mock_aws():
+        storage = S3ImageStorage()
+        storage.s3_client.create_bucket(Bucket=storage.bucket_name)
+        yield storage
@@ -0,0 +1,76 @@
+import asyncio
+import os
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.modules.exchanges.domain.entity import ExchangeStatus
+from src.modules.exchanges.presentation import async_router as exchange_async_router
+from src.modules.exchanges.presentation import router as exchange_router
+from src.modules.inventory.infrastructure.item_cache import AsyncCachedItemRepository, item_cache
+from src.modules.inventory.presentation import async_router as item_async_router
+from src.modules.inventory.presentation import router as item_router
+
+
+@pytest.fixture
+def async_sessions(monkeypatch):
+    """測試時 DB_ASYNC_ENABLED=false，自己建立連到同一個 SQLite 的 AsyncSession"""
+    engine = create_async_engine(os.environ["ASYNC_DATABASE_URL"])
+    sessions = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    monkeypatch.setattr(item_async_router, "AsyncSessionLocal", sessions)
+    monkeypatch.setattr(exchange_async_router, "AsyncSessionLocal", sessions)
+    yield sessions
+    asyncio.run(engine.dispose())
+
+
+async def _collect(lines) -> bytes:
+    return b"".join([line async for line in lines])
+
+
+def test_async_get_item_goes_through_the_shared_item_cache(db, async_sessions, make_user, make_item):
+    item = make_item(make_user(), title="lamp")
+
+    async def get_title() -> str:
+        async with async_sessions() as session:
+            service = item_async_router.get_async_item_service(session)
+            assert isinstance(service.repo, AsyncCachedItemRepository)
+            return (await service.get_item(item.id)).title
+
+    assert asyncio.run(get_title()) == "lamp"
+    assert item_cache.get(item.id).title == "lamp"
+
+    # 沒有清快取就直接改 DB：還是拿到快取裡的值
+    item.title = "desk lamp"
+    db.commit()
+    assert asyncio.run(get_title()) == "lamp"
+
+    # 同步版 save / outbox 事件清掉之後重新查 DB
+    item_cache.invalidate(item.id)
+    assert asyncio.run(get_title()) == "desk lamp"
+
+
+@pytest.mark.parametrize("keyword", [None, "lamp"])
+def test_async_item_export_streams_the_same_lines_as_the_sync_export(async_sessions, make_user, make_item, keyword):
+    owner = make_user()
+    for n in range(5):
+        make_item(owner, title=f"lamp {n}")
+    make_item(owner, title="chair")
+
+    expected = b"".join(item_router._stream_items(keyword, None))
+    streamed = asyncio.run(_collect(item_async_router._stream_items(keyword, None)))
+    assert streamed == expected
+    assert streamed.count(b"\n") == (5 if keyword else 6)
+
+
+def test_async_exchange_export_streams_the_same_lines_as_the_sync_export(
+    async_sessions, make_user, make_item, make_exchange
+):
+    owner, requester = make_user(), make_user()
+    for status in (ExchangeStatus.PENDING, ExchangeStatus.ACCEPTED, ExchangeStatus.REJECTED):
+        make_exchange(requester, make_item(owner), offered=make_item(requester), status=status)
+
+    for user, role in ((requester, "requester"), (owner, "owner")):
+        expected = b"".join(exchange_router._stream_exchanges(user.id, role))
+        streamed = asyncio.run(_collect(exchange_async_router._stream_exchanges(user.id, role)))
+        assert streamed == expected
+        assert streamed.count(b"\n") == 3
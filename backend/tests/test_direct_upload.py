@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+import pytest
+import requests
+
+from src.main import app
+from src.modules.inventory.dependencies import get_image_storage
+from src.modules.inventory.infrastructure import upload_sweeper
+from src.modules.inventory.infrastructure.upload_sweeper import sweep_orphan_uploads
+from src.database import SessionLocal
+
+FORM = {"title": "lamp", "description": "desk lamp", "category": "OTHER"}
+
+
+@pytest.fixture
+def direct_upload(client, s3_storage):
+    """POST /items/uploads 拿簽章 -> 照前端的方式 POST 到 S3 (moto)，回傳 image_key"""
+    app.dependency_overrides[get_image_storage] = lambda: s3_storage
+
+    def _upload(filename="photo.png", content_type="image/png", body=b"\x89PNG" + b"0" * 1024, send=True):
+        response = client.post("/items/uploads", json={"filename": filename, "content_type": content_type})
+        assert response.status_code == 201
+        upload = response.json()
+        if send:
+            s3 = requests.post(
+                upload["upload_url"], data=upload["fields"], files={"file": (filename, body, content_type)}
+            )
+            assert s3.status_code in (200, 204)
+        return upload["image_key"]
+
+    yield _upload
+    app.dependency_overrides.pop(get_image_storage, None)
+
+
+def test_presigned_upload_key_extension_comes_from_content_type(direct_upload, login_as, make_user, s3_storage):
+    owner = login_as(make_user())
+    key = direct_upload(filename="index.html", content_type="image/png")
+
+    assert key.startswith(f"uploads/{owner.id}/") and key.endswith(".png")
+    head = s3_storage.head_image(key)
+    assert head.content_type == "image/png" and head.size == 1028
+
+
+def test_create_item_from_upload(client, direct_upload, login_as, make_user, s3_storage):
+    login_as(make_user())
+    key = direct_upload()
+
+    response = client.post("/items/", data={**FORM, "image_key": key})
+    assert response.status_code == 201
+    assert response.json()["image_url"] == s3_storage.url_for(key)
+
+    # 同一張圖片不能刊登成第二個物品
+    again = client.post("/items/", data={**FORM, "image_key": key})
+    assert again.status_code == 409
+
+
+def test_create_item_rejects_missing_and_foreign_uploads(client, direct_upload, login_as, make_user):
+    login_as(make_user())
+    other_users_key = direct_upload()
+
+    login_as(make_user())
+    response = client.post("/items/", data={**FORM, "image_key": other_users_key})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid image_key"
+
+    # 拿了簽章但沒有真的上傳
+    never_uploaded = direct_upload(send=False)
+    response = client.post("/items/", data={**FORM, "image_key": never_uploaded})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Uploaded image not found"
+
+
+def test_sweeper_keeps_recent_and_attached_uploads(client, direct_upload, login_as, make_user, s3_storage, monkeypatch):
+    login_as(make_user())
+    attached, orphan = direct_upload(), direct_upload()
+    assert client.post("/items/", data={**FORM, "image_key": attached}).status_code == 201
+
+    # 簽章有效時間 + 寬限期內的檔案不刪 (可能正要呼叫 POST /items)
+    assert sweep_orphan_uploads(s3_storage, SessionLocal, older_than=timedelta(0)) == 0
+    assert s3_storage.head_image(orphan) is not None
+
+    monkeypatch.setattr(upload_sweeper, "MIN_ORPHAN_AGE", timedelta(0))
+    assert sweep_orphan_uploads(s3_storage, SessionLocal, older_than=timedelta(0)) == 1
+    assert s3_storage.head_image(orphan) is None
+    assert s3_storage.head_image(attached) is not None
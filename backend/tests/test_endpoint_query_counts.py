@@ -0,0 +1,41 @@
+import pytest
+
+from src.modules.exchanges.infrastructure.models import MessageModel
+
+
+@pytest.fixture
+def chat(db, login_as, make_user, make_item, make_exchange):
+    """requester 登入、跟 owner 有一筆交換；post(n) 由兩人輪流送出 n 則訊息"""
+    requester = make_user()
+    owner = make_user()
+    exchange = make_exchange(requester, make_item(owner), make_item(requester))
+
+    def _post(count: int) -> None:
+        db.add_all(
+            MessageModel(exchange_id=exchange.id, sender_id=(requester.id, owner.id)[n % 2], content=f"message {n}")
+            for n in range(count)
+        )
+        db.commit()
+
+    login_as(requester)
+    return exchange.id, _post
+
+
+# 訊息數量不影響 SQL 數量 (sender 不可以在迴圈裡 lazy load)
+@pytest.mark.parametrize("messages", [1, 40])
+def test_message_list_query_count(client, assert_max_queries, chat, messages):
+    exchange_id, post = chat
+    post(messages)
+    with assert_max_queries(2, "GET /exchanges/{id}/messages"):
+        response = client.get(f"/exchanges/{exchange_id}/messages")
+    assert response.status_code == 200
+    assert len(response.json()) == messages
+
+
+@pytest.mark.parametrize("messages", [1, 40])
+def test_exchange_detail_query_count(client, assert_max_queries, chat, messages):
+    exchange_id, post = chat
+    post(messages)
+    with assert_max_queries(2, "GET /exchanges/{id}"):
+        response = client.get(f"/exchanges/{exchange_id}")
+    assert response.status_code == 200
@@ -0,0 +1,238 @@
+"""
+多個執行緒同時接受同一個物品的不同申請，只能有一筆成交。
+SQLite 沒有 SELECT ... FOR UPDATE，這裡用 BEGIN IMMEDIATE 讓寫入的 Transaction 互相排隊
+(效果等同於 MySQL 上 _lock_items 的 row lock)，驗證上鎖後的重新檢查與自動拒絕。
+"""
+import threading
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import mysql
+from sqlalchemy.orm import sessionmaker
+
+from src.database import DATABASE_URL, SessionLocal
+from src.modules.exchanges.application.dtos import UpdateExchangeStatusRequest
+from src.modules.exchanges.application.service import ExchangeService
+from src.modules.exchanges.domain.entity import ExchangeStatus
+from src.modules.exchanges.infrastructure.models import ExchangeModel, OutboxEventModel
+from src.modules.exchanges.infrastructure.repository import SqlAlchemyExchangeRepository
+from src.modules.inventory.domain.entity import ItemStatus
+from src.modules.inventory.infrastructure.item_cache import CachedItemRepository, item_cache
+from src.modules.inventory.infrastructure.models import ItemModel
+from src.modules.inventory.infrastructure.repository import SqlAlchemyItemRepository
+
+THREADS = 8
+
+
+@pytest.fixture
+def locking_sessions():
+    engine = create_engine(DATABASE_URL, connect_args={"timeout": 30, "check_same_thread": False})
+
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        # 關掉 pysqlite 自己的 BEGIN，改由下面的 begin 事件送出 BEGIN IMMEDIATE
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    yield sessionmaker(bind=engine, autoflush=False)
+    engine.dispose()
+
+
+def _service(db) -> ExchangeService:
+    item_repo = CachedItemRepository(SqlAlchemyItemRepository(db), item_cache)
+    return ExchangeService(SqlAlchemyExchangeRepository(db), item_repo, db)
+
+
+def _run_concurrently(session_factory, calls):
+    barrier = threading.Barrier(len(calls))
+    results = [None] * len(calls)
+
+    def worker(index, call):
+        db = session_factory()
+        try:
+            barrier.wait()
+            call(_service(db))
+            results[index] = "ok"
+        except HTTPException as e:
+            results[index] = e.status_code
+        except Exception as e:  # pragma: no cover - 測試失敗時顯示原因
+            results[index] = repr(e)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=worker, args=(i, call)) for i, call in enumerate(calls)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=60)
+    return results
+
+
+def test_concurrent_accepts_on_one_item_settle_exactly_one(db, locking_sessions, make_user, make_item, make_exchange):
+    owner = make_user()
+    target = make_item(owner)
+    exchanges = [make_exchange(make_user(), target) for _ in range(THREADS)]
+    accept = UpdateExchangeStatusRequest(action="accept")
+    # 先取出 id：fixture 的物件屬於測試的 Session，不能在其他 Thread 讀 (會觸發 lazy load)
+    owner_id = owner.id
+
+    results = _run_concurrently(
+        locking_sessions,
+        [lambda service, e=exchange.id: service.update_status(owner_id, e, accept) for exchange in exchanges],
+    )
+
+    assert results.count("ok") == 1, results
+    assert all(result == 400 for result in results if result != "ok"), results
+
+    db.expire_all()
+    statuses = [db.get(ExchangeModel, exchange.id).status for exchange in exchanges]
+    assert statuses.count(ExchangeStatus.ACCEPTED) == 1
+    assert statuses.count(ExchangeStatus.REJECTED) == THREADS - 1
+    assert db.get(ItemModel, target.id).status == ItemStatus.TRADING
+
+
+def test_concurrent_accepts_sharing_an_offered_item(db, locking_sessions, make_user, make_item, make_exchange):
+    # 同一個人拿同一個物品去換兩個不同的物品，兩邊同時接受只能成交一筆
+    requester = make_user()
+    offered = make_item(requester)
+    owners = [make_user() for _ in range(2)]
+    exchanges = [make_exchange(requester, make_item(owner), offered) for owner in owners]
+    accept = UpdateExchangeStatusRequest(action="accept")
+
+    results = _run_concurrently(
+        locking_sessions,
+        [
+            lambda service, o=owner.id, e=exchange.id: service.update_status(o, e, accept)
+            for owner, exchange in zip(owners, exchanges)
+        ],
+    )
+
+    assert sorted(map(str, results)) == ["400", "ok"], results
+    db.expire_all()
+    assert db.get(ItemModel, offered.id).status == ItemStatus.TRADING
+
+
+def test_non_member_is_rejected_before_taking_locks(db, make_user, make_item, make_exchange, monkeypatch):
+    owner, requester, stranger = make_user(), make_user(), make_user()
+    exchange = make_exchange(requester, make_item(owner), make_item(requester))
+    service = _service(db)
+
+    locked = []
+    monkeypatch.setattr(ExchangeService, "_lock_items", lambda self, *ids: locked.append(ids) or {})
+
+    for call in (service.cancel_exchange, service.confirm_exchange):
+        with pytest.raises(HTTPException) as error:
+            call(stranger.id, exchange.id)
+        assert error.value.status_code == 403
+    assert locked == []
+
+    # 雙方之一則照常上鎖 (依 ID 排序)
+    service.cancel_exchange(requester.id, exchange.id)
+    assert locked == [(exchange.target_item_id, exchange.offered_item_id)]
+
+
+def test_lock_items_uses_sorted_order(db, make_user, make_item, monkeypatch):
+    owner = make_user()
+    first, second = make_item(owner), make_item(owner)
+    service = _service(db)
+    order = []
+    monkeypatch.setattr(
+        service.item_repo, "get_by_id_for_update", lambda item_id: order.append(item_id) or None
+    )
+
+    service._lock_items(second.id, None, first.id)
+    assert order == sorted([first.id, second.id])
+
+
+def test_auto_reject_locks_the_rows_it_reads(db, make_user, make_item, make_exchange, monkeypatch):
+    owner = make_user()
+    target = make_item(owner)
+    accepted, *others = [make_exchange(make_user(), target) for _ in range(3)]
+    service = _service(db)
+
+    statements = []
+    execute = db.execute
+    monkeypatch.setattr(
+        db, "execute", lambda stmt, *args, **kwargs: statements.append(stmt) or execute(stmt, *args, **kwargs)
+    )
+    service.update_status(owner.id, accepted.id, UpdateExchangeStatusRequest(action="accept"))
+
+    # 先鎖住要拒絕的 PENDING 請求 (依 ID 排序)，再 UPDATE
+    selects = [str(s.compile(dialect=mysql.dialect())) for s in statements if s.is_select]
+    assert any("ORDER BY exchanges.id FOR UPDATE" in sql for sql in selects), selects
+
+
+def test_rejected_events_match_the_rows_actually_rejected(
+    db, locking_sessions, make_user, make_item, make_exchange
+):
+    # 接受其中一筆的同時，另一位申請人取消自己的申請：被取消的不可以再記 ExchangeRejected
+    owner = make_user()
+    target = make_item(owner)
+    accepted, cancelled, *pending = [make_exchange(make_user(), target) for _ in range(4)]
+    owner_id, accepted_id = owner.id, accepted.id
+    cancelled_id, canceller_id = cancelled.id, cancelled.requester_id
+
+    results = _run_concurrently(
+        locking_sessions,
+        [
+            lambda service: service.update_status(owner_id, accepted_id, UpdateExchangeStatusRequest(action="accept")),
+            lambda service: service.cancel_exchange(canceller_id, cancelled_id),
+        ],
+    )
+
+    assert results[0] == "ok", results
+    db.expire_all()
+    rejected = {
+        exchange_id
+        for exchange_id, in db.query(ExchangeModel.id).filter(ExchangeModel.status == ExchangeStatus.REJECTED)
+    }
+    events = [
+        row.aggregate_id
+        for row in db.query(OutboxEventModel).filter(OutboxEventModel.event_type == "ExchangeRejected")
+    ]
+    assert sorted(events) == sorted(rejected)
+    assert {exchange.id for exchange in pending} <= rejected
+    assert (cancelled_id in rejected) == (results[1] == 400)
+
+
+@pytest.mark.parametrize("status", [ExchangeStatus.ACCEPTED, ExchangeStatus.CANCELLED, ExchangeStatus.REJECTED])
+def test_reject_requires_a_pending_exchange(db, make_user, make_item, make_exchange, status):
+    owner = make_user()
+    exchange = make_exchange(make_user(), make_item(owner), status=status)
+
+    with pytest.raises(HTTPException) as error:
+        _service(db).update_status(owner.id, exchange.id, UpdateExchangeStatusRequest(action="reject"))
+    assert error.value.status_code == 400
+
+    db.expire_all()
+    assert db.get(ExchangeModel, exchange.id).status == status
+    assert db.query(OutboxEventModel).count() == 0
+
+
+def test_update_location_keeps_changes_committed_while_waiting_for_the_lock(
+    db, make_user, make_item, make_exchange, monkeypatch
+):
+    owner, requester = make_user(), make_user()
+    exchange = make_exchange(requester, make_item(owner), status=ExchangeStatus.ACCEPTED)
+    service = _service(SessionLocal())
+    lock_items = service._lock_items
+
+    def confirm_then_lock(*item_ids):
+        # 等鎖的期間，對方在另一個 Transaction 確認了交換
+        other = SessionLocal()
+        other.get(ExchangeModel, exchange.id).requester_confirmed = True
+        other.commit()
+        other.close()
+        return lock_items(*item_ids)
+
+    monkeypatch.setattr(service, "_lock_items", confirm_then_lock)
+    service.update_location(owner.id, exchange.id, 3)
+    service.db.close()
+
+    db.expire_all()
+    saved = db.get(ExchangeModel, exchange.id)
+    assert (saved.meetup_location_id, saved.requester_confirmed) == (3, True)
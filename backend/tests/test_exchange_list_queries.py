@@ -0,0 +1,37 @@
+import pytest
+
+from src.modules.exchanges.application import service as exchange_service
+from src.sql_profiler import profile_sql
+
+
+def _count_list_queries(client, role: str):
+    with profile_sql() as profile:
+        response = client.get(f"/exchanges?role={role}")
+    assert response.status_code == 200
+    return profile.count, response.json()
+
+
+@pytest.mark.parametrize("read_model", [True, False])
+@pytest.mark.parametrize("role", ["requester", "owner"])
+def test_exchange_list_statement_count_does_not_grow(
+    client, login_as, make_user, make_item, make_exchange, monkeypatch, read_model, role
+):
+    monkeypatch.setattr(exchange_service, "EXCHANGE_READ_MODEL_ENABLED", read_model)
+    requester = make_user()
+    owner = make_user()
+    viewer = requester if role == "requester" else owner
+    login_as(viewer)
+
+    target = make_item(owner)
+    make_exchange(requester, target, make_item(requester))
+    small_count, small = _count_list_queries(client, role)
+    assert len(small) == 1
+
+    for _ in range(30):
+        make_exchange(requester, make_item(owner), make_item(requester))
+    large_count, large = _count_list_queries(client, role)
+    assert len(large) == 31
+
+    # 列表變長，SQL 數量不變 (沒有每筆交換各自查一次)
+    assert large_count == small_count
+    assert large_count <= 2
@@ -0,0 +1,41 @@
+from src.database import SessionLocal
+from src.modules.exchanges.infrastructure.models import ExchangeViewModel, OutboxEventModel
+from src.modules.exchanges.infrastructure.outbox import OutboxDispatcher
+from src.modules.exchanges.infrastructure.read_model import subscribe_projection
+from src.modules.iam.infrastructure.models import UserModel
+from src.sql_profiler import profile_sql
+
+
+def _nicknames(db, exchange_ids):
+    db.expire_all()
+    return [db.get(ExchangeViewModel, exchange_id).document["requester"]["nickname"] for exchange_id in exchange_ids]
+
+
+def test_rename_is_reprojected_by_the_outbox_dispatcher(db, make_user, make_item, make_exchange):
+    requester = make_user(name="OLD")
+    owner = make_user()
+    exchange_ids = [make_exchange(requester, make_item(owner)).id for _ in range(3)]
+    assert _nicknames(db, exchange_ids) == ["OLD"] * 3
+
+    # 登入時更新暱稱：同一個 Transaction 只記一筆事件，不重算交換
+    db.get(UserModel, requester.id).name = "NEW"
+    with profile_sql() as profile:
+        db.commit()
+    assert not [s for s in profile.statements if "exchange_views" in s.statement]
+    assert _nicknames(db, exchange_ids) == ["OLD"] * 3
+    events = db.query(OutboxEventModel).filter(OutboxEventModel.event_type == "UserProfileChanged").all()
+    assert [(e.aggregate_id, e.payload) for e in events] == [(requester.id, {"user_id": requester.id})]
+
+    dispatcher = OutboxDispatcher(session_factory=SessionLocal)
+    subscribe_projection(dispatcher)
+    dispatcher.dispatch_batch()
+    assert _nicknames(db, exchange_ids) == ["NEW"] * 3
+
+
+def test_unchanged_profile_records_no_event(db, make_user):
+    user = make_user(name="SAME")
+    model = db.get(UserModel, user.id)
+    model.name = "SAME"
+    model.email = "changed@example.com"
+    db.commit()
+    assert db.query(OutboxEventModel).count() == 0
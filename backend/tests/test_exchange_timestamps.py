@@ -0,0 +1,33 @@
+import time
+
+from src.modules.exchanges.domain.entity import Exchange, ExchangeStatus
+
+
+def test_exchange_entity_timestamps_are_taken_at_creation():
+    first = Exchange(id="a", requester_id="r", owner_id="o", target_item_id="t", offered_item_id=None, status=ExchangeStatus.PENDING)
+    time.sleep(0.01)
+    second = Exchange(id="b", requester_id="r", owner_id="o", target_item_id="t", offered_item_id=None, status=ExchangeStatus.PENDING)
+    assert second.created_at > first.created_at
+
+
+def test_created_exchanges_are_listed_newest_first(client, login_as, make_user, make_item):
+    owner = make_user()
+    requester = login_as(make_user())
+    first_target, second_target = make_item(owner), make_item(owner)
+
+    first = client.post(f"/items/{first_target.id}/exchanges", json={"message": "first"})
+    time.sleep(0.01)
+    second = client.post(f"/items/{second_target.id}/exchanges", json={"message": "second"})
+    assert first.status_code == second.status_code == 201
+
+    listed = client.get("/exchanges?role=requester").json()
+    assert [row["exchange_id"] for row in listed] == [second.json()["id"], first.json()["id"]]
+
+    # 用 cursor 分頁也要依建立時間排序，不會漏掉或重複
+    page = client.get("/exchanges?role=requester&limit=1")
+    assert [row["exchange_id"] for row in page.json()] == [second.json()["id"]]
+    next_page = client.get(f"/exchanges?role=requester&limit=1&cursor={page.headers['X-Next-Cursor']}")
+    assert [row["exchange_id"] for row in next_page.json()] == [first.json()["id"]]
+
+    detail = client.get(f"/exchanges/{first.json()['id']}").json()
+    assert detail["created_at"] < client.get(f"/exchanges/{second.json()['id']}").json()["created_at"]
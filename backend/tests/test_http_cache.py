@@ -0,0 +1,66 @@
+from datetime import datetime
+
+import pytest
+
+from src.http_cache import http_cache_bytes_saved, http_cache_responses
+from src.modules.inventory.infrastructure.item_cache import item_cache
+
+REVALIDATIONS = 9
+
+
+def _revalidate(client, path: str, times: int = REVALIDATIONS):
+    """SPA 的行為：第一次拿完整內容，之後每次都帶 If-None-Match 回來確認"""
+    first = client.get(path)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    responses = [client.get(path, headers={"If-None-Match": etag}) for _ in range(times)]
+    return first, responses
+
+
+def _cache_stats(route: str):
+    results = http_cache_responses.snapshot()
+    return (
+        results.get(f"result=not_modified,route={route}", 0),
+        results.get(f"result=full,route={route}", 0),
+        http_cache_bytes_saved.snapshot().get(f"route={route}", 0),
+    )
+
+
+@pytest.mark.parametrize("path", ["/locations", "/items/categories"])
+def test_reference_data_is_revalidated_with_304(client, path):
+    before = _cache_stats(path)
+    first, responses = _revalidate(client, path)
+
+    assert [r.status_code for r in responses] == [304] * REVALIDATIONS
+    assert all(r.content == b"" and r.headers["ETag"] == first.headers["ETag"] for r in responses)
+
+    not_modified, full, bytes_saved = (a - b for a, b in zip(_cache_stats(path), before))
+    assert not_modified / (not_modified + full) == REVALIDATIONS / (REVALIDATIONS + 1)
+    assert bytes_saved == REVALIDATIONS * len(first.content) > 0
+
+
+def test_item_detail_revalidates_until_the_item_changes(client, db, make_user, make_item):
+    route = "/items/{item_id}"
+    owner = make_user()
+    item = make_item(owner, title="lamp")
+    path = f"/items/{item.id}"
+
+    before = _cache_stats(route)
+    first, responses = _revalidate(client, path)
+    assert [r.status_code for r in responses] == [304] * REVALIDATIONS
+    # 物品詳情的 304 沒有序列化 Body，省下的大小用第一次的完整回應估計
+    saved = sum(len(first.content) - len(r.content) for r in responses)
+    assert saved == REVALIDATIONS * len(first.content)
+
+    # 物品被修改後，舊的 ETag 不再符合
+    item.title = "desk lamp"
+    item.updated_at = datetime(2030, 1, 1)
+    db.commit()
+    item_cache.invalidate(item.id)
+    changed = client.get(path, headers={"If-None-Match": first.headers["ETag"]})
+    assert changed.status_code == 200
+    assert changed.json()["title"] == "desk lamp"
+    assert changed.headers["ETag"] != first.headers["ETag"]
+
+    not_modified, full, _ = (a - b for a, b in zip(_cache_stats(route), before))
+    assert (not_modified, full) == (REVALIDATIONS, 2)
@@ -0,0 +1,124 @@
+import io
+import logging
+import os
+import time
+
+from PIL import Image
+
+from src.modules.inventory.application.service import ItemDraft, ItemService
+from src.modules.inventory.domain.entity import ItemCategory
+from src.modules.inventory.infrastructure.image_processing import (
+    VARIANT_SIZES,
+    ProcessPoolImageProcessor,
+    render_variants,
+)
+from src.modules.inventory.infrastructure.repository import SqlAlchemyItemRepository
+
+logger = logging.getLogger(__name__)
+
+
+def _photo(width=2400, height=1800, orientation=None) -> bytes:
+    image = Image.merge("RGB", [Image.effect_noise((width, height), 40)] * 2 + [Image.linear_gradient("L").resize((width, height))])
+    exif = Image.Exif()
+    exif[0x010F] = "TestCamera"  # Make
+    if orientation:
+        exif[0x0112] = orientation
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=92, exif=exif)
+    return buffer.getvalue()
+
+
+def test_variants_are_resized_stripped_and_smaller():
+    original = _photo(orientation=6)  # 6 = 需要順時針轉 90 度
+
+    start = time.perf_counter()
+    runs = 3
+    for _ in range(runs):
+        variants = render_variants(original)
+    elapsed = time.perf_counter() - start
+
+    total = sum(len(variant.content) for variant in variants.values())
+    logger.info(
+        f"{runs / elapsed:.1f} images/s, original {len(original)} bytes, "
+        f"variants {total} bytes ({1 - len(variants['card'].content) / len(original):.0%} saved for card)"
+    )
+
+    assert set(variants) == set(VARIANT_SIZES)
+    for name, variant in variants.items():
+        with Image.open(io.BytesIO(variant.content)) as image:
+            assert max(image.size) == VARIANT_SIZES[name]
+            # 依 EXIF 轉正：直式
+            assert image.height > image.width
+            assert "exif" not in image.info
+        assert variant.content_type == "image/webp"
+
+    # 列表用的小圖比原圖小非常多
+    assert len(variants["thumb"].content) < len(original) * 0.02
+    assert len(variants["card"].content) < len(original) * 0.2
+
+
+class RecordingProcessor:
+    """記錄收到的參數，確認原圖是以檔案路徑交給縮圖 Process"""
+
+    def __init__(self):
+        self.sources = []
+
+    def generate_variants(self, source):
+        assert isinstance(source, str) and os.path.exists(source)
+        with open(source, "rb") as f:
+            self.sources.append((source, f.read()))
+        return render_variants(source)
+
+
+def test_create_item_passes_a_file_path_and_uploads_all_variants(db, make_user, s3_storage):
+    owner = make_user()
+    original = _photo(800, 600)
+    processor = RecordingProcessor()
+    service = ItemService(SqlAlchemyItemRepository(db), s3_storage, processor)
+
+    item = service.create_item(owner.id, "lamp", "desk lamp", ItemCategory.OTHER, io.BytesIO(original), "lamp.jpg", "image/jpeg")
+
+    [(path, content)] = processor.sources
+    assert content == original
+    assert not os.path.exists(path)  # 暫存檔用完就刪掉
+
+    assert set(item.image_variants) == set(VARIANT_SIZES)
+    client = s3_storage.s3_client
+    for url in item.image_variants.values():
+        key = url.removeprefix(s3_storage.url_for(""))
+        assert client.head_object(Bucket=s3_storage.bucket_name, Key=key)["ContentType"] == "image/webp"
+
+
+def test_process_pool_reads_from_path(tmp_path):
+    path = tmp_path / "photo.jpg"
+    path.write_bytes(_photo(1000, 800))
+    processor = ProcessPoolImageProcessor(max_workers=1)
+    try:
+        variants = processor.generate_variants(str(path))
+    finally:
+        processor.shutdown()
+    assert set(variants) == set(VARIANT_SIZES)
+
+
+def test_batch_create_deletes_uploaded_images_when_saving_fails(db, make_user, s3_storage):
+    owner = make_user()
+    processor = RecordingProcessor()
+    repo = SqlAlchemyItemRepository(db)
+
+    def save_all(items):
+        raise RuntimeError("database is down")
+
+    repo.save_all = save_all
+    service = ItemService(repo, s3_storage, processor)
+    drafts = [
+        ItemDraft(f"lamp {n}", "desk lamp", ItemCategory.OTHER, io.BytesIO(_photo(400, 300)), "lamp.jpg", "image/jpeg")
+        for n in range(2)
+    ]
+
+    outcomes = service.create_items(owner.id, drafts)
+
+    assert [outcome.error for outcome in outcomes] == ["Failed to save item"] * 2
+    assert len(processor.sources) == 2  # 原圖與縮圖都已經上傳過
+    # 沒有物品會引用的原圖與縮圖都刪掉了
+    client = s3_storage.s3_client
+    assert client.list_objects_v2(Bucket=s3_storage.bucket_name, Prefix="items/").get("KeyCount", 0) == 0
@@ -0,0 +1,177 @@
+import time
+from datetime import datetime
+
+from src.database import SessionLocal
+from src.modules.exchanges.infrastructure.models import ExchangeModel
+from src.modules.exchanges.infrastructure.outbox import OutboxDispatcher
+from src.modules.iam.infrastructure.models import UserModel
+from src.modules.inventory.domain.entity import Item, ItemCategory, ItemStatus
+from src.modules.inventory.infrastructure.item_cache import (
+    CachedItemRepository,
+    ItemCache,
+    item_cache,
+    subscribe_invalidation,
+)
+from src.modules.inventory.infrastructure.models import ItemModel
+from src.modules.inventory.infrastructure.repository import SqlAlchemyItemRepository
+from src.unit_of_work import UnitOfWork
+
+
+class FakeRedis:
+    """只實作 ItemCache 用到的 get / set (ex / nx)，行為同 redis-py (值以 bytes 回傳)"""
+
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        value, expires_at = self.values.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.values[key]
+            return None
+        return value
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and self.get(key) is not None:
+            return None
+        self.values[key] = (value.encode("utf-8"), time.monotonic() + ex if ex else None)
+        return True
+
+
+def _item(item_id="item-1", title="lamp", status=ItemStatus.AVAILABLE) -> Item:
+    return Item(
+        id=item_id,
+        owner_id="owner",
+        title=title,
+        description="description",
+        category=ItemCategory.OTHER,
+        status=status,
+        created_at=datetime(2026, 1, 1),
+        owner_name="OWNER",
+    )
+
+
+def test_shared_tier_is_used_across_processes_and_returns_copies():
+    redis = FakeRedis()
+    first, second = ItemCache(shared_client=redis), ItemCache(shared_client=redis)
+    first.put(_item())
+
+    cached = second.get("item-1")
+    assert cached == _item()
+    cached.title = "changed"
+    assert second.get("item-1").title == "lamp"
+    assert first.get("item-1").title == "lamp"
+
+
+def test_invalidate_writes_a_tombstone_that_blocks_stale_fills():
+    redis = FakeRedis()
+    cache, other = ItemCache(shared_client=redis), ItemCache(shared_client=redis)
+    cache.put(_item())
+
+    # 回填開始 (查 DB 前記下版本) 之後物品被修改
+    generation = cache.generation()
+    other_generation = other.generation()
+    cache.invalidate("item-1")
+
+    cache.put(_item(title="stale"), generation)
+    # 其他 Process 不知道這次 invalidate (本機那層靠 TTL)，但不能把舊資料寫回 shared
+    other.put(_item(title="stale"), other_generation)
+    assert cache.get("item-1") is None
+    assert redis.get("item:item-1") == ItemCache.TOMBSTONE.encode()
+
+    # tombstone 過期後可以正常回填
+    redis.values["item:item-1"] = (ItemCache.TOMBSTONE.encode(), time.monotonic() - 1)
+    cache.put(_item(title="fresh"), cache.generation())
+    assert ItemCache(shared_client=redis).get("item-1").title == "fresh"
+
+
+def test_fill_is_dropped_when_a_save_lands_during_the_read(db, make_user, make_item):
+    owner = make_user()
+    model = make_item(owner, title="lamp")
+    cache = ItemCache(shared_client=FakeRedis())
+    repo = CachedItemRepository(SqlAlchemyItemRepository(db), cache)
+
+    original_get = repo.inner.get_by_id
+
+    def get_then_concurrent_save(item_id):
+        item = original_get(item_id)
+        # 讀完 DB、還沒 put 之前，另一個請求修改並 invalidate
+        other = CachedItemRepository(SqlAlchemyItemRepository(db), cache)
+        changed = original_get(item_id)
+        changed.title = "desk lamp"
+        other.save(changed)
+        return item
+
+    repo.inner.get_by_id = get_then_concurrent_save
+    assert repo.get_by_id(model.id).title == "lamp"
+
+    repo.inner.get_by_id = original_get
+    assert repo.get_by_id(model.id).title == "desk lamp"
+
+
+def test_broken_shared_client_falls_back_to_the_database(db, make_user, make_item):
+    class BrokenRedis:
+        def get(self, key):
+            raise ConnectionError("down")
+
+        set = get
+
+    owner = make_user()
+    model = make_item(owner, title="lamp")
+    repo = CachedItemRepository(SqlAlchemyItemRepository(db), ItemCache(shared_client=BrokenRedis()))
+    assert repo.get_by_id(model.id).title == "lamp"
+    repo.cache.invalidate(model.id)
+    assert repo.get_by_id(model.id).title == "lamp"
+
+
+def test_create_exchange_checks_availability_against_the_database(client, db, login_as, make_user, make_item):
+    owner = make_user()
+    target = make_item(owner)
+    repo = CachedItemRepository(SqlAlchemyItemRepository(db), item_cache)
+    assert repo.get_by_id(target.id).status == ItemStatus.AVAILABLE
+
+    # 不經過 Repository 修改 (快取裡還是上架中)
+    db.query(ItemModel).filter(ItemModel.id == target.id).update({"status": ItemStatus.TRADING})
+    db.commit()
+    assert item_cache.get(target.id).status == ItemStatus.AVAILABLE
+
+    login_as(make_user())
+    response = client.post(f"/items/{target.id}/exchanges", json={"message": "hi"})
+    assert response.status_code == 400
+    assert db.query(ExchangeModel).count() == 0
+
+
+def test_owner_rename_invalidates_cached_items(client, db, make_user, make_item):
+    owner = make_user(name="OLD")
+    item = make_item(owner)
+    first = client.get(f"/items/{item.id}")
+    assert first.json()["owner_name"] == "OLD"
+    assert item_cache.get(item.id) is not None
+
+    db.get(UserModel, owner.id).name = "NEW"
+    db.commit()
+    dispatcher = OutboxDispatcher(session_factory=SessionLocal)
+    subscribe_invalidation(dispatcher)
+    dispatcher.dispatch_batch()
+
+    # 刊登者改名後 ETag 也要跟著變
+    renamed = client.get(f"/items/{item.id}", headers={"If-None-Match": first.headers["ETag"]})
+    assert renamed.status_code == 200
+    assert renamed.json()["owner_name"] == "NEW"
+
+
+def test_save_all_invalidates_after_commit(db, make_user):
+    owner = make_user()
+    cache = ItemCache()
+    repo = CachedItemRepository(SqlAlchemyItemRepository(db), cache)
+    fresh = _item("item-new", title="lamp")
+    fresh.owner_id = owner.id
+
+    cache.put(_item("item-new", title="stale"))
+    with UnitOfWork(db):
+        repo.save_all([fresh])
+        assert cache.get("item-new") is None
+        # commit 前另一個請求把舊值填回去
+        cache.put(_item("item-new", title="stale"))
+
+    assert cache.get("item-new") is None
+    assert repo.get_by_id("item-new").title == "lamp"
@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta
+
+from src.modules.inventory.domain.entity import Item, ItemCategory, ItemStatus
+from src.modules.inventory.infrastructure.models import ItemModel
+from src.modules.inventory.infrastructure.repository import SqlAlchemyItemRepository
+from src.modules.inventory.infrastructure.search import InvertedIndexSearchBackend, tokenize
+
+
+def _add_items(db, owner_id, count, title, status=ItemStatus.AVAILABLE, category=ItemCategory.OTHER, start=0):
+    base_time = datetime(2026, 1, 1)
+    db.add_all(
+        ItemModel(
+            id=f"{status.value.lower()}-{category.value.lower()}-{start + n:05d}",
+            owner_id=owner_id,
+            title=title,
+            description="description",
+            category=category,
+            status=status,
+            created_at=base_time + timedelta(seconds=start + n),
+        )
+        for n in range(count)
+    )
+    db.commit()
+
+
+def test_tokenize_indexes_cjk_unigrams_and_bigrams():
+    assert tokenize("舊書") == ["舊", "書", "舊書"]
+    assert tokenize("舊書", for_query=True) == ["舊書"]
+    assert tokenize("書", for_query=True) == ["書"]
+
+
+def test_single_cjk_character_matches(db, make_user):
+    owner = make_user()
+    _add_items(db, owner.id, 1, "二手教科書")
+    repo = SqlAlchemyItemRepository(db, InvertedIndexSearchBackend())
+
+    assert [item.title for item in repo.search("書", None)] == ["二手教科書"]
+    assert [item.title for item in repo.search("教科", None)] == ["二手教科書"]
+    assert repo.search("手書", None) == []
+
+
+def test_filters_are_applied_before_paging(db, make_user):
+    owner = make_user()
+    # 大量命中但已下架 / 分類不符的物品，不可以擠掉真正要找的物品
+    _add_items(db, owner.id, 1500, "計算機", status=ItemStatus.TRADED, start=0)
+    _add_items(db, owner.id, 1500, "計算機", category=ItemCategory.TEXTBOOK, start=1500)
+    _add_items(db, owner.id, 5, "計算機", category=ItemCategory.ELECTRONICS, start=3000)
+    repo = SqlAlchemyItemRepository(db, InvertedIndexSearchBackend())
+
+    assert len(repo.search("計算機", ItemCategory.ELECTRONICS)) == 5
+    assert len(repo.search("計算機", None)) == 1505
+
+    # 依 cursor 分頁走完整份結果，不會漏掉或重複
+    seen, after = [], None
+    while True:
+        page = repo.search("計算機", ItemCategory.TEXTBOOK, limit=400, after=after)
+        seen.extend(item.id for item in page)
+        if len(page) < 400:
+            break
+        after = (page[-1].created_at, page[-1].id)
+    assert len(seen) == len(set(seen)) == 1500
+    assert seen == sorted(seen, reverse=True)
+
+
+def test_index_follows_status_changes(db, make_user):
+    owner = make_user()
+    _add_items(db, owner.id, 2, "計算機")
+    backend = InvertedIndexSearchBackend()
+    repo = SqlAlchemyItemRepository(db, backend)
+    assert len(repo.search("計算機", None, limit=10)) == 2
+
+    item = repo.get_by_id("available-other-00000")
+    item.status = ItemStatus.TRADING
+    repo.save(item)
+    assert [found.id for found in repo.search("計算機", None, limit=10)] == ["available-other-00001"]
+
+    item.status = ItemStatus.AVAILABLE
+    repo.save(item)
+    assert len(repo.search("計算機", None, limit=10)) == 2
+
+
+def test_paging_covers_an_item_indexed_through_save(db, make_user):
+    owner = make_user()
+    _add_items(db, owner.id, 4, "計算機")
+    backend = InvertedIndexSearchBackend()
+    repo = SqlAlchemyItemRepository(db, backend)
+    assert len(repo.search("計算機", None, limit=10)) == 4
+
+    # 與第 2 筆同一秒建立，但帶小數秒 (MySQL 的 DATETIME 不存小數秒)
+    created_at = datetime(2026, 1, 1) + timedelta(seconds=2, microseconds=600000)
+    repo.save(
+        Item(
+            id="available-other-00002a", owner_id=owner.id, title="計算機", description="description",
+            category=ItemCategory.OTHER, status=ItemStatus.AVAILABLE, created_at=created_at,
+        )
+    )
+    stored = db.get(ItemModel, "available-other-00002a").created_at
+    assert stored == created_at.replace(microsecond=0)
+    assert backend._index._doc_attrs["available-other-00002a"].created_at == stored
+
+    # 游標 (從 DB 讀回的 created_at) 與索引內的值一致：每一頁都不會漏掉或重複
+    seen, after = [], None
+    while True:
+        page = repo.search("計算機", None, limit=1, after=after)
+        seen.extend(item.id for item in page)
+        if not page:
+            break
+        after = (page[-1].created_at, page[-1].id)
+    assert seen == [
+        "available-other-00003", "available-other-00002a", "available-other-00002",
+        "available-other-00001", "available-other-00000",
+    ]
+
+
+def test_search_endpoint_pages_with_cursor(client, make_user, make_item):
+    owner = make_user()
+    ids = [make_item(owner, title=f"lamp {n}").id for n in range(3)]
+
+    first = client.get("/items/?limit=2")
+    assert first.status_code == 200
+    second = client.get(f"/items/?limit=2&cursor={first.headers['X-Next-Cursor']}")
+    assert [item["id"] for item in first.json() + second.json()] == ids[::-1]
+    assert "X-Next-Cursor" not in second.headers
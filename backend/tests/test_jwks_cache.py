@@ -0,0 +1,136 @@
+import threading
+import time
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+
+from src.modules.iam.infrastructure import cognito
+from src.modules.iam.infrastructure.cognito import CognitoIdentityProvider, JwksKeyStore
+
+CLIENT_ID = "app-client"
+
+
+def _rsa_key(kid: str):
+    private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    public_pem = private.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    private_pem = private.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    return private_pem, {**jwk.construct(public_pem, "RS256").to_dict(), "kid": kid, "use": "sig"}
+
+
+KEYS = {kid: _rsa_key(kid) for kid in ("key-1", "key-2")}
+
+
+def _token(kid: str) -> str:
+    claims = {"email": "user@example.com", "aud": CLIENT_ID, "exp": int(time.time()) + 3600}
+    return jwt.encode(claims, KEYS[kid][0], algorithm="RS256", headers={"kid": kid})
+
+
+class FakeJwksEndpoint:
+    """取代 requests.get：回傳 keys 組成的 JWKS，記錄下載次數；gate 可以讓下載卡住"""
+
+    def __init__(self, keys):
+        self.keys = list(keys)
+        self.fetches = 0
+        self.gate = None
+
+    def __call__(self, url, timeout=None):
+        self.fetches += 1
+        if self.gate is not None:
+            assert self.gate.wait(5)
+        return self
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"keys": self.keys}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def jwks(monkeypatch):
+    endpoint = FakeJwksEndpoint([KEYS["key-1"][1]])
+    monkeypatch.setattr(cognito.requests, "get", endpoint)
+    monkeypatch.setattr(cognito, "_jwks_stores", {})
+    return endpoint
+
+
+def _provider() -> CognitoIdentityProvider:
+    return CognitoIdentityProvider("us-east-1", "pool", CLIENT_ID, "auth.example.com", "http://localhost", "")
+
+
+def test_providers_share_one_fetch(jwks):
+    first, second = _provider(), _provider()
+    assert first.verify_token(_token("key-1")).email == "user@example.com"
+    assert second.verify_token(_token("key-1")).email == "user@example.com"
+    assert jwks.fetches == 1
+
+
+def test_unknown_kid_triggers_exactly_one_refresh(jwks):
+    clock = FakeClock()
+    store = JwksKeyStore("https://jwks", ttl=3600, clock=clock)
+    store.get_key("key-1")
+
+    # Cognito 輪替金鑰：同時有很多請求帶著新的 kid，只下載一次
+    clock.now += 60
+    jwks.keys.append(KEYS["key-2"][1])
+    jwks.gate = threading.Event()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(store.get_key("key-2"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    jwks.gate.set()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 8
+    assert jwks.fetches == 2
+
+    # 亂填的 kid 不會一直觸發下載
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            store.get_key("bogus")
+    assert jwks.fetches == 2
+
+
+def test_expired_ttl_refetches_and_serves_stale_keys_meanwhile(jwks):
+    clock = FakeClock()
+    store = JwksKeyStore("https://jwks", ttl=60, clock=clock)
+    cached = store.get_key("key-1")
+    store.get_key("key-1")
+    assert jwks.fetches == 1
+
+    clock.now += 61
+    jwks.gate = threading.Event()
+    refresher = threading.Thread(target=store.get_key, args=("key-1",))
+    refresher.start()
+    while jwks.fetches < 2:
+        time.sleep(0.001)
+
+    # 下載中 (卡在 gate) 其他請求不等鎖，直接用舊的公鑰
+    assert store.get_key("key-1") is cached
+    jwks.gate.set()
+    refresher.join()
+    assert jwks.fetches == 2
+    assert store.get_key("key-1") is not cached
+
+
+def test_malformed_key_is_skipped(jwks):
+    jwks.keys = [{"kid": "broken", "kty": "RSA", "n": "not-base64!"}, KEYS["key-1"][1]]
+    store = JwksKeyStore("https://jwks", ttl=60)
+    assert store.get_key("key-1") is not None
+    with pytest.raises(ValueError):
+        store.get_key("broken")
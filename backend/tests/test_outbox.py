@@ -0,0 +1,158 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.database import SessionLocal
+from src.modules.exchanges.domain.events import UserProfileChanged
+from src.modules.exchanges.infrastructure import outbox
+from src.modules.exchanges.infrastructure.models import OutboxEventModel
+from src.modules.exchanges.infrastructure.outbox import OutboxDispatcher, record_event
+from src.unit_of_work import UnitOfWork
+
+
+class FakeNow:
+    def __init__(self):
+        self.value = datetime(2026, 1, 1, 12, 0, 0)
+
+    def __call__(self) -> datetime:
+        return self.value
+
+    def advance(self, seconds: float) -> None:
+        self.value += timedelta(seconds=seconds)
+
+
+def _record(db, *user_ids):
+    with UnitOfWork(db):
+        for user_id in user_ids:
+            record_event(db, UserProfileChanged(user_id=user_id))
+
+
+def _dispatcher(received, **options) -> OutboxDispatcher:
+    dispatcher = OutboxDispatcher(session_factory=SessionLocal, **options)
+    dispatcher.subscribe(UserProfileChanged, lambda event: received.append(event.user_id))
+    return dispatcher
+
+
+def test_event_is_dispatched_only_after_commit(db, monkeypatch):
+    woken = []
+    monkeypatch.setattr(outbox, "_wakeup_listeners", [lambda: woken.append(True)])
+    received = []
+    dispatcher = _dispatcher(received)
+
+    with UnitOfWork(db):
+        record_event(db, UserProfileChanged(user_id="u1"))
+        db.flush()
+        assert dispatcher.dispatch_batch() == 0
+        assert received == [] and woken == []
+
+    assert woken == [True]
+    assert dispatcher.dispatch_batch() == 1
+    assert received == ["u1"]
+    # 已分送的不會再送一次
+    assert dispatcher.dispatch_batch() == 0
+    assert received == ["u1"]
+
+
+def test_rollback_discards_the_event(db, monkeypatch):
+    woken = []
+    monkeypatch.setattr(outbox, "_wakeup_listeners", [lambda: woken.append(True)])
+    received = []
+
+    with pytest.raises(RuntimeError):
+        with UnitOfWork(db):
+            record_event(db, UserProfileChanged(user_id="u1"))
+            raise RuntimeError("state change failed")
+
+    assert db.query(OutboxEventModel).count() == 0
+    assert _dispatcher(received).dispatch_batch() == 0
+    assert received == [] and woken == []
+
+
+def test_failing_handler_retries_with_backoff_in_order(db):
+    now = FakeNow()
+    received, failures = [], [RuntimeError("down"), RuntimeError("still down")]
+
+    def flaky(event):
+        if event.user_id == "u1" and failures:
+            raise failures.pop(0)
+        received.append(event.user_id)
+
+    first = OutboxDispatcher(session_factory=SessionLocal, retry_base=1, now=now)
+    first.subscribe(UserProfileChanged, flaky)
+    # 另一台機器也要遵守同一個重試時間 (寫在 DB)
+    second = OutboxDispatcher(session_factory=SessionLocal, retry_base=1, now=now)
+    second.subscribe(UserProfileChanged, flaky)
+    _record(db, "u1", "u2")
+
+    assert first.dispatch_batch() == 0
+    row = db.query(OutboxEventModel).order_by(OutboxEventModel.id).first()
+    assert (row.attempts, row.last_error, row.locked_until) == (1, "down", now.value + timedelta(seconds=1))
+    assert second.dispatch_batch() == 0 and len(failures) == 1
+
+    now.advance(1)
+    assert second.dispatch_batch() == 0  # 第二次失敗，改等 2 秒
+    assert failures == []
+    now.advance(1)
+    assert first.dispatch_batch() == 0 and received == []
+    now.advance(1)
+    assert first.dispatch_batch() == 2
+    assert received == ["u1", "u2"]
+
+    db.expire_all()
+    assert [(r.attempts, r.locked_by, r.locked_until) for r in db.query(OutboxEventModel).order_by(OutboxEventModel.id)] == [
+        (2, None, None),
+        (0, None, None),
+    ]
+
+
+def test_concurrent_dispatchers_do_not_double_deliver(db):
+    user_ids = [f"u{n}" for n in range(30)]
+    _record(db, *user_ids)
+    received = []
+    lock = threading.Lock()
+
+    def slow_handler(event):
+        time.sleep(0.002)
+        with lock:
+            received.append(event.user_id)
+
+    def run(dispatcher):
+        deadline = time.monotonic() + 10
+        while len(received) < len(user_ids) and time.monotonic() < deadline:
+            dispatcher.dispatch_batch()
+
+    dispatchers = []
+    for _ in range(3):
+        dispatcher = OutboxDispatcher(session_factory=SessionLocal, batch_size=4)
+        dispatcher.subscribe(UserProfileChanged, slow_handler)
+        dispatchers.append(dispatcher)
+    threads = [threading.Thread(target=run, args=(d,)) for d in dispatchers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 每筆剛好一次，而且依寫入順序
+    assert received == user_ids
+    assert db.query(OutboxEventModel).filter(OutboxEventModel.dispatched_at.is_(None)).count() == 0
+
+
+def test_broadcast_handlers_run_in_every_process(db):
+    # 兩個 Dispatcher 代表兩台機器
+    seen = {"a": [], "b": []}
+    dispatchers = {}
+    for name in seen:
+        dispatcher = OutboxDispatcher(session_factory=SessionLocal)
+        dispatcher.subscribe_broadcast(UserProfileChanged, lambda event, name=name: seen[name].append(event.user_id))
+        dispatcher.reset_broadcast_cursor()
+        dispatchers[name] = dispatcher
+
+    _record(db, "u1", "u2")
+    # 分送 (只有一台處理) 與 broadcast 互不影響
+    assert _dispatcher([]).dispatch_batch() == 2
+    for dispatcher in dispatchers.values():
+        assert dispatcher.tail_broadcast() == 2
+        assert dispatcher.tail_broadcast() == 0
+    assert seen == {"a": ["u1", "u2"], "b": ["u1", "u2"]}
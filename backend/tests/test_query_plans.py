@@ -0,0 +1,80 @@
+"""
+用 Alembic migration 建立資料表 (不是 create_all)，實際跑一次熱門流程，
+再對收集到的 SQL 執行 EXPLAIN QUERY PLAN，確認有用到複合索引。
+"""
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import event, text
+
+from src.database import engine
+from src.modules.iam.infrastructure.models import Base
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def migrated_schema():
+    Base.metadata.drop_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "migrations"))
+    command.upgrade(config, "head")
+
+
+@pytest.fixture
+def captured_sql():
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            statements.append((" ".join(statement.split()), parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    yield statements
+    event.remove(engine, "before_cursor_execute", capture)
+
+
+def _plans(statements, *fragments):
+    """符合所有 fragments 的 SQL 與它的 EXPLAIN QUERY PLAN"""
+    with engine.connect() as conn:
+        return [
+            (statement, " | ".join(row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", params)))
+            for statement, params in list(statements)
+            if not statement.startswith("EXPLAIN") and all(fragment in statement for fragment in fragments)
+        ]
+
+
+def test_hot_path_queries_use_composite_indexes(migrated_schema, captured_sql, client, login_as, make_user, make_item):
+    owner, requester, other = make_user(), make_user(), make_user()
+    target, offered = make_item(owner), make_item(requester)
+
+    login_as(requester)
+    accepted = client.post(f"/items/{target.id}/exchanges", json={"offered_item_id": offered.id, "message": "hi"})
+    login_as(other)
+    assert client.post(f"/items/{target.id}/exchanges", json={"message": "me too"}).status_code == 201
+    login_as(owner)
+    assert client.patch(f"/exchanges/{accepted.json()['id']}/status", json={"action": "accept"}).status_code == 200
+    assert client.get("/items/me").status_code == 200
+    assert client.get("/items/?category=3C&limit=20").status_code == 200
+
+    # 重複申請檢查 / 自動拒絕其他申請 (同時比對兩個欄位時，SQLite 可能選另一個複合索引)
+    composite = ("ix_exchanges_target_item_id_status", "ix_exchanges_offered_item_id_status")
+    for column, index in zip(("target_item_id", "offered_item_id"), composite):
+        plans = _plans(captured_sql, "FROM exchanges", f"exchanges.{column} = ?", "exchanges.status = ?")
+        assert any(index in plan for _, plan in plans), plans
+        for statement, plan in plans:
+            assert any(name in plan for name in composite), (statement, plan)
+
+    # 搜尋: status + category 再依 created_at 排序
+    search_plans = _plans(captured_sql, "FROM items", "items.status = ?", "items.category = ?", "ORDER BY items.created_at DESC")
+    assert search_plans
+    for statement, plan in search_plans:
+        assert "ix_items_status_category_created_at" in plan, (statement, plan)
+
+    # 所有查 exchanges 的 SQL 都不可以全表掃描
+    for statement, plan in _plans(captured_sql, "exchanges", "WHERE"):
+        assert "SCAN exchanges" not in plan, (statement, plan)
@@ -0,0 +1,161 @@
+import asyncio
+import fnmatch
+import threading
+import time
+from collections import defaultdict
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from src.modules.exchanges.domain.entity import ExchangeStatus
+from src.modules.exchanges.infrastructure.realtime import (
+    InProcessChatBroker,
+    RedisChatBroker,
+    realtime_dropped,
+)
+from src.modules.iam.infrastructure.token_cache import verified_token_cache
+
+
+class FakePubSubHub:
+    """
+    多台機器共用的 Redis (只實作 RedisChatBroker 用到的 publish / pubsub)。
+    sync_client() 給 publish 用 (在 threadpool 呼叫)，async_client() 給 listener 用。
+    """
+
+    def __init__(self):
+        self._subscriptions = defaultdict(list)  # pattern -> [(loop, queue)]
+        self._lock = threading.Lock()
+
+    def publish(self, channel: str, data: str) -> int:
+        with self._lock:
+            targets = [
+                (loop, queue, pattern)
+                for pattern, subscribers in self._subscriptions.items()
+                if fnmatch.fnmatchcase(channel, pattern)
+                for loop, queue in subscribers
+            ]
+        for loop, queue, pattern in targets:
+            event = {"type": "pmessage", "pattern": pattern.encode(), "channel": channel.encode(), "data": data.encode()}
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+        return len(targets)
+
+    def pubsub(self):
+        return FakePubSub(self)
+
+    def _subscribe(self, pattern, loop, queue):
+        with self._lock:
+            self._subscriptions[pattern].append((loop, queue))
+
+    def _unsubscribe(self, queue):
+        with self._lock:
+            for subscribers in self._subscriptions.values():
+                subscribers[:] = [(loop, q) for loop, q in subscribers if q is not queue]
+
+
+class FakePubSub:
+    def __init__(self, hub: FakePubSubHub):
+        self.hub = hub
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    async def psubscribe(self, pattern: str) -> None:
+        self.hub._subscribe(pattern, asyncio.get_running_loop(), self.queue)
+        self.queue.put_nowait({"type": "psubscribe", "pattern": None, "channel": pattern.encode(), "data": 1})
+
+    async def listen(self):
+        while True:
+            yield await self.queue.get()
+
+    async def aclose(self) -> None:
+        self.hub._unsubscribe(self.queue)
+
+
+def _publish_from_thread(broker, exchange_id, message):
+    # 同步的 Service 是在 threadpool 裡呼叫 publish_message
+    thread = threading.Thread(target=broker.publish_message, args=(exchange_id, message))
+    thread.start()
+    thread.join()
+
+
+def test_message_published_from_a_worker_thread_reaches_the_subscriber():
+    async def scenario():
+        broker = InProcessChatBroker()
+        await broker.start()
+        async with broker.subscribe("ex-1") as queue, broker.subscribe("ex-2") as other:
+            _publish_from_thread(broker, "ex-1", {"id": 1})
+            assert await asyncio.wait_for(queue.get(), 1) == {"id": 1}
+            assert other.empty()
+        await broker.stop()
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_drops_the_oldest_message():
+    async def scenario():
+        broker = InProcessChatBroker(queue_size=2)
+        await broker.start()
+        dropped = realtime_dropped.snapshot().get("", 0)
+        async with broker.subscribe("ex-1") as queue:
+            for n in range(3):
+                broker.publish_message("ex-1", {"id": n})
+            await asyncio.sleep(0)  # 讓 call_soon_threadsafe 排進來的分送執行
+            assert [queue.get_nowait() for _ in range(queue.qsize())] == [{"id": 1}, {"id": 2}]
+        assert realtime_dropped.snapshot()[""] == dropped + 1
+        await broker.stop()
+
+    asyncio.run(scenario())
+
+
+def test_redis_broker_fans_out_to_other_instances():
+    async def scenario():
+        hub = FakePubSubHub()
+        sender, receiver = RedisChatBroker(hub, hub), RedisChatBroker(hub, hub)
+        await sender.start()
+        await receiver.start()
+        async with sender.subscribe("ex-1") as local, receiver.subscribe("ex-1") as remote:
+            await asyncio.sleep(0.01)  # 等兩台的 listener 完成 psubscribe
+            _publish_from_thread(sender, "ex-1", {"id": 7})
+            # 送出的那台也是從 Redis 收到，再推給自己的連線
+            assert await asyncio.wait_for(remote.get(), 1) == {"id": 7}
+            assert await asyncio.wait_for(local.get(), 1) == {"id": 7}
+        await sender.stop()
+        await receiver.stop()
+
+    asyncio.run(scenario())
+
+
+def _token_for(user) -> str:
+    # 已驗證過的 Token 放進快取，WebSocket 驗證時直接命中 (不用連 Cognito)
+    token = f"token-{user.id}"
+    verified_token_cache.put(token, user, time.time() + 60)
+    return token
+
+
+@pytest.fixture(autouse=True)
+def clear_token_cache():
+    yield
+    verified_token_cache.clear()
+
+
+def test_non_member_is_closed_with_policy_violation(client, make_user, make_item, make_exchange):
+    owner, requester, outsider = make_user(), make_user(), make_user()
+    exchange = make_exchange(requester, make_item(owner))
+
+    for query in (f"?token={_token_for(outsider)}", "", "?token=unknown"):
+        with pytest.raises(WebSocketDisconnect) as closed:
+            with client.websocket_connect(f"/exchanges/{exchange.id}/ws{query}"):
+                pass
+        assert closed.value.code == 1008
+
+
+def test_member_receives_new_messages(client, login_as, make_user, make_item, make_exchange):
+    owner, requester = make_user(), make_user()
+    exchange = make_exchange(requester, make_item(owner), status=ExchangeStatus.ACCEPTED)
+    exchange_id = exchange.id
+
+    with client.websocket_connect(f"/exchanges/{exchange_id}/ws?token={_token_for(requester)}") as websocket:
+        login_as(owner)
+        response = client.post(f"/exchanges/{exchange_id}/messages", json={"content": "see you at 3pm"})
+        assert response.status_code == 200
+        pushed = websocket.receive_json()
+        assert pushed["id"] == response.json()["id"]
+        assert pushed["content"] == "see you at 3pm"
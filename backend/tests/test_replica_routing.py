@@ -0,0 +1,56 @@
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from src import database
+from src.modules.iam.infrastructure.models import Base, UserModel
+from src.modules.inventory.infrastructure.item_cache import item_cache
+from src.modules.inventory.infrastructure.models import ItemModel
+
+HEADERS = {"Authorization": "Bearer requester-token"}
+
+
+@pytest.fixture
+def replica(tmp_path, monkeypatch):
+    """另一個 SQLite 檔案當 Replica (只有資料表、沒有資料，可以看出請求走哪一邊)"""
+    replica_engine = create_engine(f"sqlite:///{tmp_path}/replica.db")
+    Base.metadata.create_all(replica_engine)
+    monkeypatch.setattr(
+        database, "ReplicaSessionLocal", sessionmaker(bind=replica_engine, info={database._READ_REPLICA_KEY: True})
+    )
+    monkeypatch.setattr(database, "recent_writers", database.RecentWriters(ttl_seconds=60))
+    yield replica_engine
+    replica_engine.dispose()
+
+
+def test_reads_go_to_replica_and_stick_to_primary_after_a_write(client, replica, login_as, make_user, make_item):
+    owner = make_user()
+    requester = make_user()
+    target = make_item(owner, title="lamp")
+
+    # 唯讀請求走 Replica (Replica 上沒有資料)
+    assert client.get("/items/", headers=HEADERS).json() == []
+
+    login_as(requester)
+    response = client.post(f"/items/{target.id}/exchanges", json={"message": "hi"}, headers=HEADERS)
+    assert response.status_code == 201
+
+    # 剛寫入的使用者在黏著時間內改讀 Primary，其他人仍然走 Replica
+    assert [item["id"] for item in client.get("/items/", headers=HEADERS).json()] == [target.id]
+    assert client.get("/items/").json() == []
+
+
+def test_replica_reads_do_not_fill_the_item_cache(client, replica, make_user, make_item):
+    owner = make_user()
+    item = make_item(owner, title="lamp")
+    # Replica 上的資料還停在舊的標題
+    with replica.begin() as conn:
+        conn.execute(insert(UserModel).values(id=owner.id, email=owner.email, name=owner.name))
+        conn.execute(
+            insert(ItemModel).values(
+                id=item.id, owner_id=owner.id, title="old lamp", description="", category=item.category, status=item.status
+            )
+        )
+
+    assert client.get(f"/items/{item.id}").json()["title"] == "old lamp"
+    assert item_cache.get(item.id) is None
@@ -0,0 +1,93 @@
+import io
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.modules.inventory.application.service import ItemService
+from src.modules.inventory.domain.repository import ImageAlreadyUsedError
+from src.modules.inventory.infrastructure.s3_uploader import TRANSFER_CONFIG
+from src.modules.inventory.infrastructure.upload_limits import ImageTooLargeError, SizeLimitedReader
+
+MB = 1024 * 1024
+
+
+def _key_of(storage, url: str) -> str:
+    return url.removeprefix(storage.url_for(""))
+
+
+def test_upload_stream_uses_multipart_for_large_files(s3_storage):
+    body = bytes(range(256)) * (20 * MB // 256)
+    assert len(body) > TRANSFER_CONFIG.multipart_threshold
+
+    url = s3_storage.upload_stream(io.BytesIO(body), "photo.png", "image/png")
+
+    head = s3_storage.s3_client.head_object(Bucket=s3_storage.bucket_name, Key=_key_of(s3_storage, url))
+    assert head["ContentLength"] == len(body)
+    assert head["ContentType"] == "image/png"
+    # Multipart Upload 的 ETag 結尾是 -<段數>
+    assert head["ETag"].strip('"').endswith("-3")
+
+
+def test_upload_stream_small_file_is_single_put(s3_storage):
+    url = s3_storage.upload_stream(io.BytesIO(b"x" * 1024), "photo.jpg", "image/jpeg")
+
+    head = s3_storage.s3_client.head_object(Bucket=s3_storage.bucket_name, Key=_key_of(s3_storage, url))
+    assert head["ContentLength"] == 1024
+    assert "-" not in head["ETag"]
+
+
+def test_size_limit_aborts_upload_midway(s3_storage):
+    source = io.BytesIO(b"x" * (20 * MB))
+    reader = SizeLimitedReader(source, max_bytes=10 * MB)
+
+    with pytest.raises(ImageTooLargeError):
+        s3_storage.upload_stream(reader, "photo.jpg", "image/jpeg")
+
+    # 中途就停止讀取，也沒有留下物件或未完成的 Multipart Upload
+    assert source.tell() < 20 * MB
+    client, bucket = s3_storage.s3_client, s3_storage.bucket_name
+    assert client.list_objects_v2(Bucket=bucket).get("KeyCount", 0) == 0
+    assert not client.list_multipart_uploads(Bucket=bucket).get("Uploads")
+
+
+def test_create_item_rejects_oversized_image(client, login_as, make_user, monkeypatch):
+    from src.modules.inventory.presentation import router as item_router
+
+    monkeypatch.setattr(item_router, "MAX_IMAGE_BYTES", 1024)
+    login_as(make_user())
+
+    response = client.post(
+        "/items/",
+        data={"title": "lamp", "description": "desk lamp", "category": "OTHER"},
+        files={"image": ("lamp.jpg", b"x" * 2048, "image/jpeg")},
+    )
+    assert response.status_code == 413
+
+
+@pytest.mark.parametrize(
+    "error, status_code, detail",
+    [
+        (ImageAlreadyUsedError("Image already used"), 409, "Image already used"),
+        (ValueError("Unsupported image"), 400, "Unsupported image"),
+        (RuntimeError("Access denied for user 'admin'@'10.0.0.5'"), 500, None),
+    ],
+)
+def test_create_item_maps_errors_without_leaking_internals(login_as, make_user, monkeypatch, error, status_code, detail):
+    def create_item(self, **kwargs):
+        raise error
+
+    monkeypatch.setattr(ItemService, "create_item", create_item)
+    login_as(make_user())
+
+    with TestClient(app, raise_server_exceptions=False) as client:
+        response = client.post(
+            "/items/",
+            data={"title": "lamp", "description": "desk lamp", "category": "OTHER"},
+            files={"image": ("lamp.jpg", b"x" * 16, "image/jpeg")},
+        )
+    assert response.status_code == status_code
+    if detail:
+        assert response.json()["detail"] == detail
+    else:
+        assert "admin" not in response.text
@@ -0,0 +1,107 @@
+import pytest
+from fastapi import HTTPException
+
+from src.modules.iam.application.interfaces import IdentityData
+from src.modules.iam.dependencies import authenticate_token
+from src.modules.iam.domain.entity import User
+from src.modules.iam.infrastructure import token_cache
+from src.modules.iam.infrastructure.token_cache import VerifiedTokenCache
+
+NOW = 1_000_000.0
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = NOW
+
+    def time(self):
+        return self.now
+
+
+class CountingProvider:
+    def __init__(self):
+        self.verified = []
+
+    def verify_token(self, token: str) -> IdentityData:
+        self.verified.append(token)
+        email = token.split(":")[0]
+        return IdentityData(email=email, name=email, avatar_url=None, expires_at=NOW + 3600)
+
+
+class CountingUserRepo:
+    def __init__(self):
+        self.lookups = 0
+
+    def get_by_email(self, email: str):
+        self.lookups += 1
+        return User(id=email, email=email, password_hash="", name=email)
+
+
+class FakeAuthService:
+    def __init__(self):
+        self.identity_provider = CountingProvider()
+        self.user_repo = CountingUserRepo()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(token_cache, "time", fake)
+    return fake
+
+
+@pytest.fixture
+def cache(monkeypatch, clock):
+    cache = VerifiedTokenCache(max_size=10)
+    monkeypatch.setattr("src.modules.iam.dependencies.verified_token_cache", cache)
+    return cache
+
+
+def test_cache_hit_skips_verification(cache):
+    service = FakeAuthService()
+    first = authenticate_token("a@example.com:token", service)
+    second = authenticate_token("a@example.com:token", service)
+
+    assert first == second and first is not second
+    assert service.identity_provider.verified == ["a@example.com:token"]
+    assert service.user_repo.lookups == 1
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 1}
+
+
+def test_expired_entry_is_evicted_and_not_served(cache, clock):
+    user = User(id="a", email="a@example.com", password_hash="", name="A")
+    cache.put("token", user, NOW + 60)
+    assert cache.get("token") == user
+
+    clock.now = NOW + 60
+    assert cache.get("token") is None
+    assert cache.stats()["size"] == 0
+
+    # 已過期的 Token 不放進快取；過期後用同一張 Token 會重新驗證 (verify_token 負責拒絕)
+    cache.put("expired", user, NOW)
+    assert cache.stats()["size"] == 0
+
+
+def test_invalidate_user_removes_only_that_users_entries(cache):
+    service = FakeAuthService()
+    for token in ("a@example.com:phone", "a@example.com:laptop", "b@example.com:phone"):
+        authenticate_token(token, service)
+    assert cache.stats()["size"] == 3
+
+    cache.invalidate_user("a@example.com")
+    assert cache.stats()["size"] == 1
+    assert cache.get("a@example.com:phone") is None
+    assert cache.get("b@example.com:phone").email == "b@example.com"
+
+    # 清掉之後重新驗證並查 DB
+    authenticate_token("a@example.com:phone", service)
+    assert service.identity_provider.verified.count("a@example.com:phone") == 2
+
+
+def test_unknown_user_is_rejected_and_not_cached(cache):
+    service = FakeAuthService()
+    service.user_repo.get_by_email = lambda email: None
+    with pytest.raises(HTTPException) as error:
+        authenticate_token("ghost@example.com:token", service)
+    assert error.value.status_code == 401
+    assert cache.stats()["size"] == 0